@@ -212,7 +212,7 @@ const UserProfile = ({ targetProfile, currentUser, articles, onBack, onLike, onA
                   {currentUser.recommendations.map((rec, idx) => (
                       <div key={idx} style={styles.recommendationCard}>
                           <div style={{fontWeight: 'bold', color: 'white'}}>{rec.name}</div>
-                          <div style={{fontSize: 12, color: '#94a3b8', marginBottom: 5}}>{rec.area}</div>
+                          <div style={{fontSize: 12, color: '#94a3b8', marginBottom: 5}}>{rec.direction}</div>
                           <div style={{fontSize: 13, color: '#4ade80'}}>Match: {rec.score}%</div>
                           <div style={{fontSize: 11, color: '#64748b', fontStyle: 'italic'}}>{rec.reason}</div>
                       </div>
@@ -335,7 +335,7 @@ const SearchPage = ({ users, search, setSearch, onSelectUser, onBack, t }) => {
   );
 };
 
-const HomePage = ({ onSearch, onRegister, currentUser, articles, users, onLike, t }) => {
+const HomePage = ({ onSearch, onRegister, currentUser, articles, topArticles, users, onLike, t }) => {
   return (
     <div style={styles.container}>
       <div style={styles.hero}>
@@ -349,7 +349,7 @@ const HomePage = ({ onSearch, onRegister, currentUser, articles, users, onLike,
       <div style={{display: 'grid', gridTemplateColumns: '2fr 1fr', gap: 30}}>
         <div>
           <h3 style={{color: 'white'}}>{t('home_feed')} <span style={{fontSize:12, color:'#94a3b8', marginLeft:10}}>{t('trend_sub')}</span></h3>
-          {[...articles].sort((a,b) => (b.likes || 0) - (a.likes || 0)).slice(0, 4).map(art => (
+          {topArticles.map(art => (
             <ArticleCard key={art.id} art={art} currentUser={currentUser} onLike={onLike} t={t} />
           ))}
         </div>
@@ -381,6 +381,7 @@ export default function App() {
   
   const [currentUser, setCurrentUser] = useState(null);
   const [articles, setArticles] = useState([]);
+  const [topArticles, setTopArticles] = useState([]); // Тренды для главной: считает сервер (/articles/top)
   const [users, setUsers] = useState([]);
   const [targetProfile, setTargetProfile] = useState(null);
   const [search, setSearch] = useState('');
@@ -394,10 +395,12 @@ export default function App() {
         try {
             const resA = await fetch(`${API_URL}/articles`);
             const resU = await fetch(`${API_URL}/users`);
+            const resT = await fetch(`${API_URL}/articles/top?k=4&mode=trending`);
             if(resA.ok && resU.ok) {
                 setArticles(await resA.json());
                 setUsers(await resU.json());
             }
+            if(resT.ok) setTopArticles(await resT.json());
         } catch(e) {
             console.error("Нет связи с Python:", e);
         }
@@ -471,6 +474,7 @@ export default function App() {
         
     setCurrentUser({ ...currentUser, likedArticles: updatedLiked });
     setArticles(prev => prev.map(a => a.id === artId ? { ...a, likes: (a.likes || 0) + (isLiked ? -1 : 1) } : a));
+    setTopArticles(prev => prev.map(a => a.id === artId ? { ...a, likes: (a.likes || 0) + (isLiked ? -1 : 1) } : a));
 
     // Отправка в Python
     await fetch(`${API_URL}/like`, {
@@ -521,7 +525,7 @@ export default function App() {
         </div>
       </header>
 
-      {view === 'home' && <HomePage onSearch={() => setView('search')} onRegister={() => setView('register')} currentUser={currentUser} articles={articles} users={users} onLike={handleLike} t={t} />}
+      {view === 'home' && <HomePage onSearch={() => setView('search')} onRegister={() => setView('register')} currentUser={currentUser} articles={articles} topArticles={topArticles} users={users} onLike={handleLike} t={t} />}
       {view === 'login' && <LoginPage onLogin={handleLogin} onToReg={() => setView('register')} onHome={() => setView('home')} t={t} />}
       {view === 'register' && <RegistrationPage onRegister={handleRegister} onBack={() => setView('login')} loading={loading} t={t} />}
       {view === 'search' && <SearchPage users={users} search={search} setSearch={setSearch} onSelectUser={(u) => { setTargetProfile(u); setView('profile'); }} onBack={() => setView('home')} t={t} />}
@@ -1,384 +1,122 @@
 import os
-import json
-import requests
-from dataclasses import dataclass
-from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
-from flask import Flask, jsonify, request
+import sys
+import time
+from datetime import datetime, timezone
+from functools import partial
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, Table
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
-from collections import defaultdict
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sqlalchemy import select
+
+# Общие модули из database/ импортируются "плоско", как в data_saver.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database'))
+import catalog
+import metrics
+from arxiv_parser import ArxivorgArticleParser, normalize_query
+from arxiv_async import ArxivClientThread, aiohttp
+from database import Article, Base, LiveRecommender, Session, User, engine, save_articles, utc_now
+from likes import LikeBuffer, toggle_like
+from trending import TOP_MAX, TrendingIndex
+from profiler import RequestProfiler
+from response_cache import DataVersion, ResponseCache
+from serialization import FastJSONProvider, stream_json_array, stream_rows
+from single_flight import SingleFlight
 
 # ==========================================
-# 1. PARSER ENGINE 
+# 1. FLASK & DATABASE SETUP
 # ==========================================
 
-@dataclass
-class ArticleDTO:
-    """Данные полученной статьи."""
-    source_name: str
-    source_url: str
-    title: str
-    authors: list[str]
-    article_url: str
-    article_direction: str
-    certain_directions: list[str]
-
-class ArxivorgArticleParser:
-    """Класс парсера статей для arxiv.org."""
-    BASE_URL = 'https://arxiv.org/'
-    SEARCH_URL = 'https://arxiv.org/search/?searchtype=all&source=header&query='
-    SOURCE_NAME = 'arxiv.org'
-    
-    DIRECTIONS_KEYWORDS = {
-        "Информатика и компьютерные науки": [
-            "информатика", "компьютер", "программирование", "алгоритм", "база данных",
-            "вычислительная техника", "кибернетика", "искусственный интеллект",
-            "машинное обучение", "нейронные сети", "компьютерное зрение", "анализ данных",
-            "большие данные", "веб-разработка", "мобильные приложения", "облачные вычисления",
-            "кибербезопасность", "криптография", "блокчейн", "виртуальная реальность",
-            "интернет вещей", "робототехника", "автоматизация", "цифровизация",
-            "программное обеспечение", "аппаратное обеспечение", "сети", "сервер",
-            "фронтенд", "бэкенд", "фуллстек", "devops", "agile", "scrum",
-            "computer science", "informatics", "programming", "algorithm", "database",
-            "software", "hardware", "computing", "artificial intelligence", "ai",
-            "machine learning", "neural networks", "deep learning", "computer vision",
-            "data science", "big data", "web development", "mobile apps", "cloud computing",
-            "cybersecurity", "cryptography", "blockchain", "virtual reality", "vr",
-            "internet of things", "iot", "robotics", "automation", "digitalization",
-            "frontend", "backend", "fullstack", "devops", "agile", "scrum"
-        ],
-        "Математика": [
-            "математика", "алгебра", "геометрия", "анализ", "исчисление",
-            "дифференциальные уравнения", "теория вероятностей", "статистика",
-            "численные методы", "оптимизация", "топология", "теория чисел",
-            "комбинаторика", "теория графов", "математическая логика", "теория множеств",
-            "математическое моделирование", "вычислительная математика", "линейная алгебра",
-            "дискретная математика", "функциональный анализ", "теория вероятностей",
-            "математическая статистика", "теория игр", "финансовая математика",
-            "mathematics", "algebra", "geometry", "calculus", "analysis",
-            "differential equations", "probability theory", "statistics",
-            "numerical methods", "optimization", "topology", "number theory",
-            "combinatorics", "graph theory", "mathematical logic", "set theory",
-            "mathematical modeling", "computational mathematics", "linear algebra",
-            "discrete mathematics", "functional analysis", "probability",
-            "mathematical statistics", "game theory", "financial mathematics"
-        ],
-        "Физика": [
-            "физика", "механика", "термодинамика", "оптика", "электричество",
-            "магнетизм", "квантовая физика", "ядерная физика", "астрофизика",
-            "теория относительности", "электродинамика", "статистическая физика",
-            "физика твердого тела", "физика плазмы", "акустика", "гидродинамика",
-            "молекулярная физика", "атомная физика", "физика элементарных частиц",
-            "космология", "гравитация", "физика конденсированного состояния",
-            "нанофизика", "биофизика", "геофизика",
-            "physics", "mechanics", "thermodynamics", "optics", "electricity",
-            "magnetism", "quantum physics", "nuclear physics", "astrophysics",
-            "relativity", "electrodynamics", "statistical physics",
-            "solid state physics", "plasma physics", "acoustics", "hydrodynamics",
-            "molecular physics", "atomic physics", "particle physics",
-            "cosmology", "gravity", "condensed matter physics",
-            "nanophysics", "biophysics", "geophysics"
-        ],
-        "Химия": [
-            "химия", "органическая химия", "неорганическая химия", "аналитическая химия",
-            "физическая химия", "биохимия", "химические реакции", "периодическая система",
-            "молекулы", "атомы", "соединения", "катализ", "полимеры", "нанохимия",
-            "электрохимия", "фотохимия", "радиохимия", "квантовая химия", "стереохимия",
-            "химическая кинетика", "химическое равновесие", "химическая термодинамика",
-            "материаловедение", "кристаллография", "спектроскопия",
-            "chemistry", "organic chemistry", "inorganic chemistry", "analytical chemistry",
-            "physical chemistry", "biochemistry", "chemical reactions", "periodic table",
-            "molecules", "atoms", "compounds", "catalysis", "polymers", "nanochemistry",
-            "electrochemistry", "photochemistry", "radiochemistry", "quantum chemistry",
-            "stereochemistry", "chemical kinetics", "chemical equilibrium", "chemical thermodynamics",
-            "materials science", "crystallography", "spectroscopy"
-        ],
-        "Биология": [
-            "биология", "генетика", "эволюция", "ботаника", "зоология",
-            "микробиология", "молекулярная биология", "клеточная биология",
-            "экология", "физиология", "анатомия", "биотехнология", "биоинформатика",
-            "генная инженерия", "иммунология", "вирусология", "биохимия",
-            "нейробиология", "биофизика", "палеонтология", "эмбриология",
-            "цитология", "гистология", "систематика", "биогеография",
-            "biology", "genetics", "evolution", "botany", "zoology",
-            "microbiology", "molecular biology", "cell biology",
-            "ecology", "physiology", "anatomy", "biotechnology", "bioinformatics",
-            "genetic engineering", "immunology", "virology", "biochemistry",
-            "neuroscience", "biophysics", "paleontology", "embryology",
-            "cytology", "histology", "taxonomy", "biogeography"
-        ],
-        "Русский язык и литература": [
-            "русский язык", "литература", "грамматика", "синтаксис", "морфология",
-            "поэзия", "проза", "фольклор", "лингвистика", "филология",
-            "пушкин", "толстой", "достоевский", "чехов", "русская классика",
-            "словообразование", "орфография", "пунктуация", "стилистика",
-            "риторика", "литературоведение", "поэтика", "текстология",
-            "диалектология", "палеография", "семантика", "прагматика",
-            "russian language", "literature", "grammar", "syntax", "morphology",
-            "poetry", "prose", "folklore", "linguistics", "philology",
-            "pushkin", "tolstoy", "dostoevsky", "chekhov", "russian classics",
-            "word formation", "spelling", "punctuation", "stylistics",
-            "rhetoric", "literary criticism", "poetics", "textual criticism",
-            "dialectology", "paleography", "semantics", "pragmatics"
-        ],
-        "История": [
-            "история", "археология", "древний мир", "средневековье", "новое время",
-            "исторические события", "цивилизация", "культура", "историография",
-            "всемирная история", "отечественная история", "история россии",
-            "античность", "ренессанс", "просвещение", "революция", "война",
-            "исторические источники", "архивы", "музееведение", "палеография",
-            "нумизматика", "геральдика", "историческая география",
-            "history", "archaeology", "ancient world", "middle ages", "modern era",
-            "historical events", "civilization", "culture", "historiography",
-            "world history", "national history", "russian history",
-            "antiquity", "renaissance", "enlightenment", "revolution", "war",
-            "historical sources", "archives", "museology", "paleography",
-            "numismatics", "heraldry", "historical geography"
-        ],
-        "Экономика": [
-            "экономика", "макроэкономика", "микроэкономика", "финансы", "банки",
-            "рынок", "инвестиции", "бизнес", "менеджмент", "маркетинг",
-            "бухгалтерия", "аудит", "налоги", "бюджет", "инфляция",
-            "безработица", "валютный курс", "фондовый рынок", "криптовалюты",
-            "предпринимательство", "логистика", "снабжение", "продажи",
-            "экономический рост", "международная торговля", "государственные финансы",
-            "economics", "macroeconomics", "microeconomics", "finance", "banks",
-            "market", "investment", "business", "management", "marketing",
-            "accounting", "audit", "taxes", "budget", "inflation",
-            "unemployment", "exchange rate", "stock market", "cryptocurrency",
-            "entrepreneurship", "logistics", "supply chain", "sales",
-            "economic growth", "international trade", "public finance"
-        ],
-        # ... (Можно добавить остальные категории, но для MVP этого достаточно)
-    }
-
-    def parse(self, target_name: str) -> list[ArticleDTO]:
-        """Запуск парсера."""
-        print(f"[PARSER] Starting parser for: {target_name}")
-        articles = self.parse_news_page(target_name)
-        return articles
-
-    def parse_news_page(self, target_name: str) -> list[ArticleDTO]:
-        """Основной парсер статей."""
-        result: list[ArticleDTO] = []
-        try:
-            search_query = target_name.replace(' ', '+')
-            url = f"{self.SEARCH_URL}{search_query}"
-            print(f"[PARSER] URL: {url}")
-
-            html_content = self.get_data(url)
-            if not html_content: return result
-
-            soup = BeautifulSoup(html_content, 'html.parser')
-            search_results = soup.find_all('li', class_='arxiv-result')
-
-            # Ограничим первыми 10 результатами для скорости
-            for i, item in enumerate(search_results[:10]):
-                try:
-                    article_dto = self.parse_article_item(item)
-                    if article_dto:
-                        result.append(article_dto)
-                except Exception as e:
-                    print(f"[PARSER] Error parsing result {i + 1}: {e}")
-                    continue
-        except Exception as e:
-            print(f"[PARSER] Error in parse_news_page: {e}")
-
-        print(f"[PARSER] Total parsed: {len(result)}")
-        return result
-
-    def parse_article_item(self, item) -> ArticleDTO | None:
-        try:
-            title_elem = item.find('p', class_='title')
-            title = title_elem.get_text().strip() if title_elem else "No title"
-
-            link_elems = item.find('p', class_='list-title is-inline-block').find_all('a')
-            article_url = ''
-            for el in link_elems:
-                if el.get_text() == 'pdf': # Приоритет на PDF
-                    article_url = el['href']
-                    break
-            if not article_url and link_elems: article_url = link_elems[0]['href']
-
-            authors = self.parse_authors(item)
-            direction = self.parse_direction(item)
-            source_url = self.BASE_URL
-
-            directions = []
-            # Проверка по ключевым словам
-            text_to_check = (title + " " + direction).lower()
-            for category, keywords in self.DIRECTIONS_KEYWORDS.items():
-                for k in keywords:
-                    if k in text_to_check:
-                        if category not in directions:
-                            directions.append(category)
-                        break # Достаточно одного совпадения для категории
-
-            return ArticleDTO(
-                source_name=self.SOURCE_NAME,
-                source_url=source_url,
-                title=title,
-                authors=authors,
-                article_url=article_url,
-                article_direction=direction,
-                certain_directions=directions
-            )
-        except Exception as e:
-            print(f"[PARSER] Item error: {e}")
-            return None
-
-    def parse_authors(self, item) -> list[str]:
-        authors = []
-        try:
-            authors_elems = item.find('p', class_='authors').find_all('a')
-            for elem in authors_elems: authors.append(elem.get_text().strip())
-        except: pass
-        return authors
-
-    def parse_direction(self, item) -> str:
-        direction = ""
-        try:
-            span_elem = item.find('span', class_='abstract-full')
-            if span_elem: direction = span_elem.get_text().strip()
-        except: pass
-        return direction
-
-    def get_data(self, url: str) -> str | None:
-        try:
-            headers = {'User-Agent': UserAgent().random}
-            resp = requests.get(url, headers=headers, timeout=15)
-            return resp.text if resp.status_code == 200 else None
-        except Exception as e:
-            print(f"[PARSER] HTTP Error: {e}")
-            return None
-
-# ==========================================
-# 2. FLASK & DATABASE SETUP
-# ==========================================
+# Схема, парсер и рекомендательная система общие с массовой загрузкой (database/main.py):
+# статьи, собранные офлайн, сразу участвуют в рекомендациях приложения, и наоборот.
+# База - DATABASE_URL или database/science_articles.db (см. database/storage.py).
 
 app = Flask(__name__)
+# JSON через orjson, если он установлен (JSON_ENCODER, см. serialization.py)
+app.json = FastJSONProvider(app)
 CORS(app)
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-db_path = os.path.join(BASE_DIR, 'database/science_articles.db')
-engine = create_engine(f'sqlite:///{db_path}', echo=False)
-Base = declarative_base()
-Session = sessionmaker(bind=engine)
-
-likes_table = Table('likes', Base.metadata,
-    Column('user_id', Integer, ForeignKey('users.id')),
-    Column('article_id', Integer, ForeignKey('articles.id'))
-)
-
-authors_articles = Table('authors_articles', Base.metadata,
-    Column('user_id', Integer, ForeignKey('users.id')),
-    Column('article_id', Integer, ForeignKey('articles.id'))
-)
-
-class User(Base):
-    __tablename__ = 'users'
-    id = Column(Integer, primary_key=True)
-    email = Column(String, unique=True)
-    password = Column(String)
-    first_name = Column(String)
-    last_name = Column(String)
-    role = Column(String, default="user")
-    academic_status = Column(String)
-    city = Column(String)
-    age = Column(Integer)
-    area = Column(String)
-    
-    articles = relationship("Article", secondary=authors_articles, back_populates="authors_users")
-    liked_articles = relationship("Article", secondary=likes_table)
-
-class Article(Base):
-    __tablename__ = 'articles'
-    id = Column(Integer, primary_key=True)
-    title = Column(String)
-    url = Column(String)
-    area = Column(String) 
-    citations = Column(Integer, default=0)
-    authors_text = Column(String) # Сохраняем список авторов строкой
-    
-    authors_users = relationship("User", secondary=authors_articles, back_populates="articles")
-
-Base.metadata.create_all(engine)
-
 # ==========================================
-# 3. ML ENGINE
+# 2. ML ENGINE
 # ==========================================
 
-class ScienceRecommender:
-    def __init__(self, db_engine):
-        self.engine = db_engine
-        self.tfidf_vectorizer = TfidfVectorizer(max_features=5000)
-        self.tfidf_matrix = None
-        self.name_to_idx = {}
-        self.idx_to_name = {}
-        self.authors_metadata = {}
-
-    def load_and_train(self):
-        print("[ML] Retraining model...")
-        session = Session()
-        users = session.query(User).all()
-        corpus = []
-        current_idx = 0
-        self.name_to_idx = {}
-        self.idx_to_name = {}
-        
-        for user in users:
-            # Текст для ML: заголовки статей + область
-            text_content = " ".join([a.title for a in user.articles]) + " " + (user.area or "")
-            
-            corpus.append(text_content)
-            full_name = f"{user.last_name} {user.first_name}"
-            self.name_to_idx[full_name] = current_idx
-            self.idx_to_name[current_idx] = full_name
-            self.authors_metadata[full_name] = {'area': user.area}
-            current_idx += 1
-            
-        session.close()
-        if corpus:
-            try:
-                self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(corpus)
-                self.cosine_sim_matrix = cosine_similarity(self.tfidf_matrix, self.tfidf_matrix)
-            except ValueError:
-                print("[ML] Not enough data to train yet.")
-
-    def get_recommendations(self, last_name, first_name):
-        full_name = f"{last_name} {first_name}"
-        if self.tfidf_matrix is None or full_name not in self.name_to_idx: return []
-        
-        idx = self.name_to_idx[full_name]
-        scores = list(enumerate(self.cosine_sim_matrix[idx]))
-        scores = sorted(scores, key=lambda x: x[1], reverse=True)
-        
-        recs = []
-        for cand_idx, score in scores:
-            cand_name = self.idx_to_name[cand_idx]
-            if cand_name == full_name: continue
-            if score < 0.05: continue # Отсекаем мусор
-            
-            recs.append({
-                'name': cand_name,
-                'score': int(score * 100),
-                'area': self.authors_metadata[cand_name]['area'],
-                'reason': 'Схожие научные интересы'
-            })
-        return recs[:3]
-
-# Инициализация
-recommender = ScienceRecommender(engine)
-arxiv_parser = ArxivorgArticleParser()
+# Модель авторов из database.py; переобучается в фоне и подменяется атомарно
+recommender = LiveRecommender(engine)
+# Регистрация ходит в arXiv через общий асинхронный клиент (arxiv_async.py: один пул
+# соединений, лимит частоты, повторы, отмена по таймауту); без aiohttp - синхронным парсером
+arxiv_parser = ArxivClientThread() if aiohttp is not None else ArxivorgArticleParser()
+# Одинаковые фамилии при регистрации: один запрос в arXiv на всех, кто пришел одновременно,
+# и результат в памяти на ARXIV_MEMO_TTL секунд (0 - только склейка, см. single_flight.py)
+app.config['ARXIV_MEMO_TTL'] = float(os.environ.get('ARXIV_MEMO_TTL', 600))
+arxiv_requests = SingleFlight(ttl=app.config['ARXIV_MEMO_TTL'], name='arxiv')
 
 # ==========================================
-# 4. API ROUTES
+# 3. API ROUTES
 # ==========================================
 
+# Рейтинг trending для главной страницы (см. database/trending.py): период полураспада лайка в часах
+app.config['TRENDING_HALF_LIFE_HOURS'] = float(os.environ.get('TRENDING_HALF_LIFE_HOURS', 24))
+trending = TrendingIndex(half_life_hours=app.config['TRENDING_HALF_LIFE_HOURS'])
+
+# Лайки: 0 - сразу в базу, иначе копятся и пишутся пачкой раз в столько секунд (см. database/likes.py)
+app.config['LIKE_BUFFER_INTERVAL'] = float(os.environ.get('LIKE_BUFFER_INTERVAL', 0))
+def likes_committed(state):
+    # Индекс trending обновляется после коммита - сбрасываем кэш ответов еще раз, уже с новым индексом
+    trending.apply(state)
+    response_cache.version.bump()
+
+like_buffer = LikeBuffer(Session, interval=app.config['LIKE_BUFFER_INTERVAL'], listener=likes_committed) \
+    if app.config['LIKE_BUFFER_INTERVAL'] > 0 else None
+
+# Порог "медленного" запроса в мс: такие запросы печатаются с разбивкой SQL. 0 - выключено
+app.config['SLOW_REQUEST_MS'] = float(os.environ.get('SLOW_REQUEST_MS', 0))
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    g.sql_stats, g.sql_token = metrics.start_request()
+
+@app.after_request
+def record_request_metrics(response):
+    if 'sql_token' not in g: return response
+    # Потоковые ответы (stream_json_array, выгрузки) формируются уже после after_request:
+    # время и SQL считаются, когда сервер закрывает ответ - после последнего отправленного байта
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    response.call_on_close(partial(observe_request, g.request_start, g.sql_stats, g.pop('sql_token'),
+                                   request.method, request.path, endpoint, response.status_code))
+    return response
+
+def observe_request(start, stats, token, method, path, endpoint, status):
+    metrics.finish_request(token)
+    elapsed = time.perf_counter() - start
+
+    metrics.HTTP_REQUEST_SECONDS.observe(elapsed, method=method, endpoint=endpoint, status=status)
+    metrics.HTTP_REQUEST_SQL_QUERIES.observe(stats.count, endpoint=endpoint)
+    metrics.HTTP_REQUEST_SQL_SECONDS.observe(stats.total_time, endpoint=endpoint)
+
+    slow_ms = app.config['SLOW_REQUEST_MS']
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        print(f"[SLOW] {method} {path} {elapsed * 1000:.0f} ms, "
+              f"SQL: {stats.count} запросов, {stats.total_time * 1000:.0f} ms")
+        for statement, count, duration in stats.breakdown():
+            print(f"[SLOW]   {count:>5}x {duration * 1000:8.1f} ms  {' '.join(statement.split())[:160]}")
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    # Токен остается здесь, только если after_request не дошел до ответа (необработанная ошибка)
+    token = g.pop('sql_token', None)
+    if token is not None: metrics.finish_request(token)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+# Профилирование запросов по требованию: PROFILE_ENABLED=1 и заголовок X-Profile
+# или доля выборки PROFILE_SAMPLE_RATE (см. profiler.py)
+profiler = RequestProfiler(app)
+
+# Кэш ответов каталога: версия данных растет после каждого коммита с записью,
+# ответы получают ETag (If-None-Match -> 304) и сжимаются (см. response_cache.py)
+response_cache = ResponseCache(app, DataVersion(engine))
+
 @app.route('/api/register', methods=['POST'])
 def register():
     data = request.json
@@ -390,7 +128,7 @@ def register():
     last_name = data.get('lastName', '')
     
     # 1. ЗАПУСК ПАРСЕРА
-    parsed_articles = arxiv_parser.parse(last_name)
+    parsed_articles = arxiv_requests.do(normalize_query(last_name), lambda: arxiv_parser.parse(last_name))
     
     # 2. Определение сферы (берем самую частую из найденных или "General")
     user_area = "General Science"
@@ -415,32 +153,15 @@ def register():
         city=data['city'], age=data.get('age'), area=user_area
     )
     
-    # 3. Сохранение статей
-    for dto in parsed_articles:
-        # Проверяем дубликаты по URL
-        existing_art = session.query(Article).filter_by(url=dto.article_url).first()
-        
-        if existing_art:
-            new_user.articles.append(existing_art)
-        else:
-            # Берем первое определенное направление для статьи или General
-            art_area = dto.certain_directions[0] if dto.certain_directions else "Scientific Article"
-            
-            new_art = Article(
-                title=dto.title,
-                url=dto.article_url,
-                area=art_area,
-                authors_text=", ".join(dto.authors),
-                citations=0
-            )
-            session.add(new_art)
-            new_user.articles.append(new_art)
-            
+    # 3. Сохранение статей - тем же путем, что и массовая загрузка (дубли по URL, авторы, индекс имен)
+    articles, _ = save_articles(session, parsed_articles)
+    new_user.articles.extend(articles)
+
     session.add(new_user)
     session.commit()
     
-    # 4. Переобучение ML
-    recommender.load_and_train()
+    # 4. Переобучение ML в фоне: ответ не ждет обучения, модель подменится атомарно
+    recommender.retrain_async()
 
     res_user = {
         'id': new_user.id, 'email': new_user.email, 'firstName': new_user.first_name,
@@ -456,7 +177,7 @@ def login():
     session = Session()
     user = session.query(User).filter_by(email=data['email'], password=data['password']).first()
     if user:
-        recs = recommender.get_recommendations(user.last_name, user.first_name)
+        recs = recommender.get_recommendations(f"{user.first_name} {user.last_name}")
         res = {
             'id': user.id, 'email': user.email, 'firstName': user.first_name, 'lastName': user.last_name,
             'role': user.role, 'area': user.area, 
@@ -468,47 +189,105 @@ def login():
         return jsonify(res)
     return jsonify({'error': 'Invalid credentials'}), 401
 
+@app.route('/api/recommendations/batch', methods=['POST'])
+def recommendations_batch():
+    """Рекомендации для списка авторов, ответ - поток JSON-строк (по одной на автора)."""
+    data = request.json or {}
+    # Проверяем до начала потока: после заголовка 200 ошибку уже не вернуть
+    authors = data.get('authors', []) if isinstance(data, dict) else None
+    if not isinstance(authors, list) or not all(isinstance(name, str) for name in authors):
+        return jsonify({'error': 'Invalid authors'}), 400
+    try:
+        top_n = int(data.get('topN', 3))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid topN'}), 400
+
+    def generate():
+        for name, recs in recommender.get_recommendations_batch(authors, top_n=top_n):
+            yield app.json.dumps_bytes({'author': name, 'recommendations': recs}) + b'\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def session_rows(iter_rows, *args):
+    """Строки каталога (catalog.py) потоком; сессия живет, пока ответ не отдан."""
+    with Session() as session:
+        yield from iter_rows(session.connection(), *args)
+
+# Большие списки: строки Core-запросов пачками и потоковый JSON (см. serialization.py)
 @app.route('/api/articles', methods=['GET'])
+@response_cache.cached
 def get_articles():
-    session = Session()
-    articles = session.query(Article).all()
-    res = []
-    for a in articles:
-        likes = session.query(likes_table).filter_by(article_id=a.id).count()
-        res.append({
-            'id': a.id, 'title': a.title, 'area': a.area, 
-            'citations': a.citations, 'likes': likes, 'url': a.url,
-            'authors': a.authors_text.split(', ') if a.authors_text else []
-        })
-    session.close()
+    return stream_json_array(session_rows(catalog.iter_articles))
+
+@app.route('/api/articles/top', methods=['GET'])
+@response_cache.cached
+def get_top_articles():
+    """Топ-k статей: mode=trending (лайки с затуханием, по умолчанию) или popular (всего лайков)."""
+    k = min(max(request.args.get('k', 4, type=int), 1), TOP_MAX)
+    mode = request.args.get('mode', 'trending')
+    if mode not in ('trending', 'popular'):
+        return jsonify({'error': 'Unknown mode'}), 400
+    with Session() as session:
+        conn = session.connection()
+        popular = select(Article.id).order_by(Article.like_count.desc(), Article.id)
+        if mode == 'popular':
+            res = catalog.fetch_articles(conn, list(conn.execute(popular.limit(k)).scalars()))
+        else:
+            trending.ensure_loaded(session.get_bind())
+            scores = dict(trending.top(k))
+            # Лайков меньше, чем мест (новая база): остаток - по общему числу лайков, включая статьи без лайков
+            if len(scores) < k:
+                backfill = conn.execute(popular.limit(k + len(scores))).scalars()
+                scores.update(dict.fromkeys([i for i in backfill if i not in scores][:k - len(scores)], 0.0))
+            res = [dict(article, trend=round(scores[article['id']], 3))
+                   for article in catalog.fetch_articles(conn, list(scores))]
     return jsonify(res)
 
 @app.route('/api/users', methods=['GET'])
+@response_cache.cached
 def get_users():
-    session = Session()
-    users = session.query(User).all()
-    res = []
-    for u in users:
-        res.append({
-            'id': u.id, 'email': u.email, 'firstName': u.first_name, 'lastName': u.last_name,
-            'role': u.role, 'academicStatus': u.academic_status, 'city': u.city, 'age': u.age, 'area': u.area,
-            'articles': [a.id for a in u.articles],
-            'likedArticles': [a.id for a in u.liked_articles]
-        })
-    session.close()
-    return jsonify(res)
+    return stream_json_array(session_rows(catalog.iter_users))
+
+@app.route('/api/export/<kind>', methods=['GET'])
+def export(kind):
+    """
+    Выгрузка каталога для аналитики: /api/export/articles или /api/export/authors,
+    format=ndjson (по умолчанию) или csv, since=ISO-время - только статьи, добавленные с этого момента.
+    X-Export-Until - значение since для следующей инкрементальной выгрузки.
+    """
+    if kind not in catalog.EXPORTS:
+        return jsonify({'error': 'Unknown export'}), 404
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Unknown format'}), 400
+    since = request.args.get('since')
+    if since:
+        try:
+            since = datetime.fromisoformat(since)
+        except ValueError:
+            return jsonify({'error': 'Invalid since'}), 400
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    until = utc_now()
+    query = catalog.export_query(kind, since or None)
+    response = stream_rows(list(query.selected_columns.keys()), session_rows(catalog.iter_export, query), fmt)
+    response.headers['X-Export-Until'] = until.isoformat()
+    return response
 
 @app.route('/api/like', methods=['POST'])
 def like():
     data = request.json
-    session = Session()
-    u = session.query(User).get(data['userId'])
-    a = session.query(Article).get(data['articleId'])
-    if a in u.liked_articles: u.liked_articles.remove(a)
-    else: u.liked_articles.append(a)
-    session.commit()
-    session.close()
-    return jsonify({'status': 'ok'})
+    user_id, article_id = int(data['userId']), int(data['articleId'])
+    if like_buffer is not None:
+        like_buffer.toggle(user_id, article_id)
+        return jsonify({'status': 'ok', 'queued': True})
+    with Session.begin() as session:
+        try:
+            liked = toggle_like(session.connection(), user_id, article_id)
+        except LookupError:
+            return jsonify({'error': 'User or article not found'}), 404
+    likes_committed({(user_id, article_id): liked})
+    return jsonify({'status': 'ok', 'liked': liked})
 
 if __name__ == '__main__':
     # Создаем админа при первом запуске
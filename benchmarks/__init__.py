@@ -0,0 +1,19 @@
+"""
+Бенчмарки рекомендательной системы, парсера и API.
+
+    python -m benchmarks.run --scale 1k --output bench_1k.json
+    python -m benchmarks.compare old.json new.json
+
+Данные генерируются синтетически (benchmarks/synthetic.py) во временные
+файлы SQLite, рабочая база database/science_articles.db не затрагивается.
+"""
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_DIR = os.path.join(ROOT_DIR, 'database')
+
+# Модули из database/ импортируются "плоско" (from database import ...), как в data_saver.py
+for path in (ROOT_DIR, DATABASE_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,51 @@
+"""
+Сравнение двух JSON-отчетов benchmarks/run.py (например, до и после коммита).
+
+    python -m benchmarks.compare bench_old.json bench_new.json --threshold 1.1
+
+Код возврата 1, если какой-то замер замедлился больше, чем в threshold раз.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(base, new, threshold=1.1):
+    """Строки сравнения: (замер, было, стало, отношение, регрессия?)."""
+    rows = []
+    for name in sorted(set(base['results']) | set(new['results'])):
+        old = base['results'].get(name, {}).get('mean_s')
+        cur = new['results'].get(name, {}).get('mean_s')
+        ratio = cur / old if old and cur is not None else None
+        rows.append((name, old, cur, ratio, ratio is not None and ratio > threshold))
+    return rows
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Сравнение результатов бенчмарков")
+    arg_parser.add_argument('base')
+    arg_parser.add_argument('new')
+    arg_parser.add_argument('--threshold', type=float, default=1.1)
+    args = arg_parser.parse_args(argv)
+
+    base, new = load(args.base), load(args.new)
+    print(f"base: {base['meta'].get('commit')} ({base['meta'].get('scale')})")
+    print(f"new:  {new['meta'].get('commit')} ({new['meta'].get('scale')})\n")
+
+    fmt = lambda value: f"{value * 1000:.3f}" if value is not None else "-"
+    regressions = 0
+    for name, old, cur, ratio, regressed in compare(base, new, args.threshold):
+        regressions += regressed
+        mark = "  <-- регрессия" if regressed else ""
+        ratio_text = f"{ratio:.2f}x" if ratio is not None else "-"
+        print(f"{name:<40} {fmt(old):>12} ms {fmt(cur):>12} ms {ratio_text:>8}{mark}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Конкурентная нагрузка на app.py: читатели (/api/login) и писатели (/api/like)
+одновременно, для каждого профиля SQLite.
+
+    python -m benchmarks.concurrency --scale 1k --readers 8 --writers 4 --duration 5
+
+Профили - из database/storage.py: "default" (настройки SQLAlchemy как есть)
+и "tuned" (WAL, synchronous=NORMAL, mmap, busy_timeout, пул). Для каждого
+профиля берется свежая копия одной и той же базы. В отчете - пропускная
+способность, задержки p50/p95/p99 и число ошибок (500, в т.ч. "database is locked").
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from benchmarks.run import git_commit
+from benchmarks.synthetic import SCALES, generate_articles, load_articles, load_users
+
+from storage import PROFILES, create_sqlite_engine
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(latencies, errors, duration):
+    return {
+        'ops': len(latencies),
+        'ops_per_s': len(latencies) / duration,
+        'errors': errors,
+        'p50_ms': percentile(latencies, 0.50) * 1000 if latencies else None,
+        'p95_ms': percentile(latencies, 0.95) * 1000 if latencies else None,
+        'p99_ms': percentile(latencies, 0.99) * 1000 if latencies else None,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else None,
+    }
+
+
+def run_load(web, n_users, n_articles, readers, writers, duration, seed=1):
+    """Запускает потоки на duration секунд; возвращает статистику по чтению и записи."""
+    client = web.app.test_client()
+    stop = threading.Event()
+    results = {'read': ([], [0]), 'write': ([], [0])}
+    lock = threading.Lock()
+
+    def reader(rng):
+        def op():
+            user_id = rng.randint(1, n_users)
+            return client.post('/api/login', json={'email': f"user{user_id}@example.org", 'password': 'password'})
+        return op
+
+    def writer(rng):
+        def op():
+            return client.post('/api/like', json={'userId': rng.randint(1, n_users),
+                                                  'articleId': rng.randint(1, n_articles)})
+        return op
+
+    def worker(kind, op):
+        latencies, errors = [], 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                ok = op().status_code < 500
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        with lock:
+            results[kind][0].extend(latencies)
+            results[kind][1][0] += errors
+
+    threads = [threading.Thread(target=worker, args=('read', reader(random.Random(seed + i))))
+               for i in range(readers)]
+    threads += [threading.Thread(target=worker, args=('write', writer(random.Random(seed + 1000 + i))))
+                for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {kind: summarize(latencies, errors[0], duration) for kind, (latencies, errors) in results.items()}
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Конкурентная нагрузка на SQLite: default vs tuned")
+    arg_parser.add_argument('--scale', default='1k', help=f"число статей: {', '.join(SCALES)} или число")
+    arg_parser.add_argument('--users', type=int, default=None)
+    arg_parser.add_argument('--readers', type=int, default=8)
+    arg_parser.add_argument('--writers', type=int, default=4)
+    arg_parser.add_argument('--duration', type=float, default=5.0, help="секунд на профиль")
+    arg_parser.add_argument('--profiles', default=','.join(PROFILES))
+    arg_parser.add_argument('--output', default=None)
+    args = arg_parser.parse_args(argv)
+
+    n_articles = SCALES.get(args.scale.lower()) or int(args.scale)
+    n_users = args.users or max(50, n_articles // 10)
+    corpus = generate_articles(n_articles)
+    # Ошибки 500 считаем, а не печатаем трассировки
+    logging.getLogger('app').setLevel(logging.CRITICAL)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='science_concurrency_') as tmp:
+        template = os.path.join(tmp, 'template.db')
+        os.environ['SCIENCE_DB_PATH'] = template
+        os.environ['SCIENCE_DB_PROFILE'] = 'default'
+        import app as web
+        web.app.logger.setLevel(logging.CRITICAL)
+        load_articles(web.engine, corpus, web.Base.metadata.tables)
+        load_users(web.engine, corpus, web.Base.metadata.tables, n_users=n_users)
+        web.engine.dispose()
+
+        for profile in args.profiles.split(','):
+            db_file = os.path.join(tmp, f'{profile}.db')
+            shutil.copyfile(template, db_file)
+            engine = create_sqlite_engine(db_file, profile=profile)
+            web.Session.configure(bind=engine)
+            print(f"[BENCH] {profile}: {args.readers} читателей, {args.writers} писателей, {args.duration} с...")
+            results[profile] = run_load(web, n_users, n_articles, args.readers, args.writers, args.duration)
+            engine.dispose()
+            for kind, stats in results[profile].items():
+                p99 = f"{stats['p99_ms']:.1f}" if stats['p99_ms'] is not None else "-"
+                print(f"[BENCH]   {kind:<5} {stats['ops_per_s']:9.1f} ops/s  p99 {p99:>8} ms  "
+                      f"ошибок: {stats['errors']}")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'scale': args.scale,
+            'articles': n_articles,
+            'users': n_users,
+            'readers': args.readers,
+            'writers': args.writers,
+            'duration_s': args.duration,
+        },
+        'results': results,
+    }
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return report
+
+
+if __name__ == '__main__':
+    main()
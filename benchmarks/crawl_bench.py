@@ -0,0 +1,177 @@
+"""
+Загрузка страниц arXiv с локального сервера-заглушки: синхронный парсер против
+асинхронного клиента (database/arxiv_async.py).
+
+    python -m benchmarks.crawl_bench --pages 48 --delay 0.3 --max-rate 8 --fail-rate 0.05
+
+Сервер (arxiv_replay.StubServer) отдает записанные страницы с задержкой, отвечает
+429 с Retry-After при превышении частоты и случайными 503. В отчете: время,
+потерянные страницы, повторы, максимум одновременных запросов на сервере,
+запросы, пришедшие до истечения Retry-After, и время отмены незавершенной загрузки.
+Отдельно - всплеск регистраций (--register-threads потоков, --register-names разных
+фамилий в разном написании) через ArxivClientThread без склейки и через
+single_flight.SingleFlight: сколько запросов дошло до сервера.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from benchmarks.run import git_commit
+
+from arxiv_async import AsyncArxivClient, ArxivClientThread, aiohttp
+from arxiv_parser import ArxivorgArticleParser, normalize_query
+from arxiv_replay import StubServer
+from metrics import PARSER_RETRIES
+from single_flight import SingleFlight
+
+
+def retries_total():
+    return int(sum(PARSER_RETRIES._values.values()))
+
+
+def server_stats(stub, seconds, pages, fetched):
+    return {
+        'seconds': seconds,
+        'pages_per_s': pages / seconds,
+        'lost_pages': sum(1 for html in fetched if not html),
+        'server_requests': stub.stats['requests'],
+        'server_statuses': {str(k): v for k, v in sorted(stub.stats['statuses'].items())},
+        'max_in_flight': stub.stats['max_in_flight'],
+        'retry_after_violations': stub.stats['violations'],
+    }
+
+
+def run_sync(stub, targets):
+    parser = ArxivorgArticleParser()
+    parser.SEARCH_URL = stub.search_url
+    stub.reset()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fetched = [parser.fetch_page(target) for target in targets]
+    return server_stats(stub, time.perf_counter() - start, len(targets), fetched)
+
+
+async def run_async(stub, targets, options):
+    parser = ArxivorgArticleParser()
+    parser.SEARCH_URL = stub.search_url
+    stub.reset()
+    retries = retries_total()
+    start = time.perf_counter()
+    async with AsyncArxivClient(parser=parser, **options) as client:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fetched = await asyncio.gather(*(client.fetch_page(target) for target in targets))
+    result = server_stats(stub, time.perf_counter() - start, len(targets), fetched)
+    result['retries'] = retries_total() - retries
+    return result
+
+
+async def run_cancel(stub, targets, options, after=0.5):
+    """Через after секунд отменяем загрузку: сколько ждать, пока все задачи завершатся."""
+    parser = ArxivorgArticleParser()
+    parser.SEARCH_URL = stub.search_url
+    stub.reset()
+    async with AsyncArxivClient(parser=parser, **options) as client:
+        tasks = [asyncio.create_task(client.fetch_page(target)) for target in targets]
+        await asyncio.sleep(after)
+        start = time.perf_counter()
+        for task in tasks:
+            task.cancel()
+        done = await asyncio.gather(*tasks, return_exceptions=True)
+        cancelled = sum(1 for result in done if isinstance(result, asyncio.CancelledError))
+        return {'cancel_s': time.perf_counter() - start, 'cancelled': cancelled, 'completed': len(tasks) - cancelled}
+
+
+def run_register_burst(stub, targets, options, threads, requests=None):
+    """Регистрации по targets в threads потоках; requests - SingleFlight или None (без склейки)."""
+    parser = ArxivorgArticleParser()
+    parser.SEARCH_URL = stub.search_url
+    client = ArxivClientThread(parser=parser, **options)
+    if requests is None:
+        parse = client.parse
+    else:
+        def parse(target):
+            return requests.do(normalize_query(target), lambda: client.parse(target))
+    stub.reset()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(threads) as pool:
+            fetched = list(pool.map(parse, targets))
+    finally:
+        client.close()
+    result = server_stats(stub, time.perf_counter() - start, len(targets), fetched)
+    result['distinct_queries'] = len({normalize_query(target) for target in targets})
+    return result
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Синхронная и асинхронная загрузка страниц arXiv")
+    arg_parser.add_argument('--pages', type=int, default=48)
+    arg_parser.add_argument('--delay', type=float, default=0.3, help="задержка ответа сервера, с")
+    arg_parser.add_argument('--max-rate', type=float, default=8, help="запросов в секунду до 429")
+    arg_parser.add_argument('--retry-after', type=float, default=1.0)
+    arg_parser.add_argument('--fail-rate', type=float, default=0.05)
+    arg_parser.add_argument('--concurrency', type=int, default=8)
+    arg_parser.add_argument('--rate', type=float, default=10, help="лимит клиента, запросов в секунду")
+    arg_parser.add_argument('--burst', type=int, default=4)
+    arg_parser.add_argument('--register-threads', type=int, default=16)
+    arg_parser.add_argument('--register-names', type=int, default=4, help="разных фамилий во всплеске регистраций")
+    arg_parser.add_argument('--skip-sync', action='store_true')
+    arg_parser.add_argument('--output', default=None)
+    args = arg_parser.parse_args(argv)
+    if aiohttp is None:
+        arg_parser.error("нужен пакет aiohttp")
+
+    options = {'concurrency': args.concurrency, 'rate': args.rate, 'burst': args.burst, 'backoff_base': 0.2}
+    results = {}
+    with StubServer(delay=args.delay, max_rate=args.max_rate, retry_after=args.retry_after,
+                    fail_rate=args.fail_rate) as stub:
+        queries = [url.split('query=', 1)[1].replace('+', ' ') for url in stub.transport.urls]
+        targets = [queries[i % len(queries)] for i in range(args.pages)]
+        if not args.skip_sync:
+            results['sync'] = run_sync(stub, targets)
+        results['async'] = asyncio.run(run_async(stub, targets, options))
+        results['async_cancel'] = asyncio.run(run_cancel(stub, targets, options))
+
+        # Одна фамилия приходит в разном написании: "Ivan Oseledets", "ivan  oseledets", ...
+        names = queries[:args.register_names]
+        burst = [(name, name.lower(), f" {name.upper()} ")[i % 3] for i, name in
+                 enumerate(names[i % len(names)] for i in range(args.register_threads * 2))]
+        results['register'] = run_register_burst(stub, burst, options, args.register_threads)
+        results['register_single_flight'] = run_register_burst(
+            stub, burst, options, args.register_threads, SingleFlight(ttl=600, name='bench'))
+
+    for name, result in results.items():
+        print(f"[BENCH] {name:<14} " + ", ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+                                                for k, v in result.items()))
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'server': {'delay': args.delay, 'max_rate': args.max_rate, 'retry_after': args.retry_after,
+                       'fail_rate': args.fail_rate},
+            'client': options,
+            'pages': args.pages,
+        },
+        'results': results,
+    }
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return report
+
+
+if __name__ == '__main__':
+    main()
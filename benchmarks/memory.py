@@ -0,0 +1,131 @@
+"""
+Память рекомендательной системы в пересчете на автора и на DTO статьи.
+
+    python -m benchmarks.memory --scale 1m --output memory_1m.json
+
+Строки авторства и пары соавторов берутся из синтетического корпуса
+(benchmarks/synthetic.py) и подаются прямо в ScienceRecommender.index_authors /
+index_coauthors - без базы и без TF-IDF. Память считает tracemalloc (numpy и
+scipy тоже регистрируют в нем свои буферы): сколько остается занято после
+заполнения таблиц, отдельно индекс имен (AuthorIndex) и таблицы рекомендателя.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+from itertools import combinations
+
+import pandas as pd
+
+from benchmarks.run import git_commit
+from benchmarks.synthetic import SCALES, generate_articles
+
+
+def traced(fn):
+    """(результат fn, прирост занятой памяти в байтах после сборки мусора)."""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    value = fn()
+    gc.collect()
+    return value, tracemalloc.get_traced_memory()[0] - before
+
+
+def authorship_frames(corpus):
+    rows = [(name, f"{article.title} {article.direction}", article.direction)
+            for article in corpus.articles for name in article.authors]
+    authors = pd.DataFrame(rows, columns=['author_name', 'text_content', 'article_direction'])
+    pairs = {pair for article in corpus.articles for pair in combinations(sorted(article.authors), 2)}
+    edges = pd.DataFrame(list(pairs), columns=['author_a', 'author_b'])
+    return authors, edges
+
+
+def measure_recommender(corpus):
+    import database as db
+
+    authors, edges = authorship_frames(corpus)
+    recommender = db.ScienceRecommender(db.engine)
+    _, tables = traced(lambda: len(recommender.index_authors(authors)))
+    _, graph = traced(lambda: recommender.index_coauthors(edges))
+    n = len(recommender.author_names)
+
+    # Без индекса имен остаются только таблицы рекомендателя (имена в них - те же объекты строк)
+    def drop_index():
+        recommender.author_index = None
+    _, index_freed = traced(drop_index)
+    return {
+        'authors': n,
+        'authorships': len(authors),
+        'coauthor_pairs': len(edges),
+        'bytes_per_author': (tables + graph) / n,
+        'author_index_bytes_per_author': -index_freed / n,
+        'tables_bytes_per_author': (tables + index_freed) / n,
+        'coauthors_matrix_bytes_per_author': graph / n,
+    }
+
+
+def measure_dtos(corpus, count=100_000):
+    from arxiv_parser import ParsedArticleDTO
+    from database import ArticleDTO
+
+    articles = corpus.articles[:count]
+    results = {}
+    for cls, extra in ((ArticleDTO, {}), (ParsedArticleDTO, {'certain_directions': []})):
+        # Поля - уже существующие строки и списки: считаем только сами объекты DTO и ссылки на них
+        dtos, size = traced(lambda: [
+            cls(source_name='arxiv.org', source_url='https://arxiv.org/', title=a.title, authors=a.authors,
+                article_url=a.url, article_direction=a.direction, **extra)
+            for a in articles
+        ])
+        results[f"{cls.__name__}_bytes"] = size / len(dtos) - 8  # минус указатель в списке
+        del dtos
+    return results
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Память на автора и на DTO статьи")
+    arg_parser.add_argument('--scale', default='100k', help=f"число статей: {', '.join(SCALES)} или число")
+    arg_parser.add_argument('--output', default=None, help="куда записать JSON (по умолчанию stdout)")
+    args = arg_parser.parse_args(argv)
+
+    n_articles = SCALES.get(args.scale.lower()) or int(args.scale)
+    print(f"[BENCH] Генерация корпуса: {n_articles} статей...")
+    corpus = generate_articles(n_articles)
+
+    with tempfile.TemporaryDirectory(prefix='science_bench_') as tmp:
+        # Импорт database.py создает схему - в пустой временной базе, а не в рабочей
+        os.environ['SCIENCE_DB_PATH'] = os.path.join(tmp, 'science.db')
+        tracemalloc.start()
+        results = measure_recommender(corpus)
+        results.update(measure_dtos(corpus))
+        tracemalloc.stop()
+    for name, value in results.items():
+        print(f"[BENCH] {name:<40} {value:12.1f}" if isinstance(value, float) else f"[BENCH] {name:<40} {value:12}")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'scale': args.scale,
+            'articles': n_articles,
+        },
+        'results': results,
+    }
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        print(f"[BENCH] Результаты записаны в {args.output}")
+    else:
+        print(payload)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Пропускная способность парсера arXiv на записанных страницах (без сети).
+
+    python -m benchmarks.parser_bench --repeat 3 --output parser.json
+
+Страницы берутся из database/fixtures/arxiv (см. database/arxiv_replay.py).
+Замеры по стадиям: получение страницы, разбор HTML (BeautifulSoup),
+parse_article_item, detect_directions и весь parse_news_page целиком.
+Разбор пачки страниц (--pool-pages, страницы повторяются по кругу) - в одном
+процессе и в пуле parse_pool.ParsePool из --workers процессов; в отчете ускорение.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+
+from benchmarks.run import BenchmarkRun, git_commit
+
+from bs4 import BeautifulSoup
+from arxiv_parser import ArxivorgArticleParser, parse_page_rows
+from arxiv_replay import ReplayTransport
+from parse_pool import ParsePool, default_workers
+
+
+def quiet(fn):
+    """Парсер много печатает - в замерах вывод глушим."""
+    def wrapper():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return wrapper
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк парсера arXiv на записанных страницах")
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--workers', type=int, default=None, help="процессов в пуле (по умолчанию PARSER_WORKERS)")
+    arg_parser.add_argument('--pool-pages', type=int, default=200, help="страниц в пачке для замера пула")
+    arg_parser.add_argument('--output', default=None)
+    args = arg_parser.parse_args(argv)
+
+    transport = ReplayTransport()
+    parser = ArxivorgArticleParser(transport=transport)
+    urls = transport.urls
+    queries = [url.split('query=', 1)[1].replace('+', ' ') for url in urls]
+    pages = [transport.get(url).text for url in urls]
+    run = BenchmarkRun()
+
+    run.measure('parser.get_data', quiet(lambda: [parser.get_data(url) for url in urls]),
+                repeat=args.repeat, per_call=len(urls))
+
+    soups = []
+
+    def make_soups():
+        soups.clear()
+        for page in pages:
+            soups.append(BeautifulSoup(page, 'html.parser').find_all('li', class_='arxiv-result'))
+    run.measure('parser.soup', make_soups, repeat=args.repeat, per_call=len(pages))
+
+    items = [item for page_items in soups for item in page_items]
+    parsed = run.measure('parser.parse_article_item', quiet(lambda: [parser.parse_article_item(i) for i in items]),
+                         repeat=args.repeat, per_call=len(items))
+
+    texts = [(dto.title, parser.parse_direction(item)) for dto, item in zip(parsed, items) if dto]
+    run.measure('parser.detect_directions', lambda: [parser.detect_directions(t, d) for t, d in texts],
+                repeat=args.repeat, per_call=len(texts))
+
+    # Весь parse_news_page: сеть (replay) + разбор + первые 10 результатов
+    articles = run.measure('parser.parse_news_page', quiet(lambda: [parser.parse_news_page(q) for q in queries]),
+                           repeat=args.repeat, per_call=len(queries))
+    per_page = run.results['parser.parse_news_page']['mean_s']
+    n_articles = sum(len(page_articles) for page_articles in articles)
+    run.results['parser.parse_news_page'].update({
+        'pages_per_s': 1 / per_page,
+        'articles_per_s': n_articles / (per_page * len(queries)),
+    })
+    full_page_s = sum(run.results[name]['mean_s'] * n for name, n in (
+        ('parser.get_data', len(urls)), ('parser.soup', len(pages)), ('parser.parse_article_item', len(items))))
+    run.results['parser.full_page_throughput'] = {
+        'mean_s': full_page_s / len(pages),
+        'pages_per_s': len(pages) / full_page_s,
+        'articles_per_s': len(items) / full_page_s,
+        'repeat': args.repeat,
+        'ops_per_call': 1,
+    }
+
+    # Пачка страниц: один процесс против пула (пул запущен заранее, старт меряется отдельно)
+    batch = [pages[i % len(pages)] for i in range(args.pool_pages)]
+    workers = default_workers() if args.workers is None else args.workers
+    run.measure('parser.pages (1 process)', quiet(lambda: [parse_page_rows(page) for page in batch]),
+                repeat=args.repeat, per_call=len(batch))
+    pool = run.measure('parser.pool_start', lambda: ParsePool(workers)) or ParsePool(workers)
+    with pool:
+        quiet(lambda: pool.map(batch[:max(1, workers)]))()  # импорт модулей в рабочих процессах
+        pool_name = f'parser.pages ({workers} processes)'
+        run.measure(pool_name, quiet(lambda: pool.map(batch)), repeat=args.repeat, per_call=len(batch),
+                    workers=workers, cpus=os.cpu_count())
+    speedup = run.results['parser.pages (1 process)']['mean_s'] / run.results[pool_name]['mean_s']
+    run.results[pool_name]['speedup'] = speedup
+
+    print(f"[BENCH] parse_news_page: {1 / per_page:.1f} pages/s, "
+          f"{run.results['parser.parse_news_page']['articles_per_s']:.1f} articles/s")
+    print(f"[BENCH] все результаты страниц: {len(pages) / full_page_s:.1f} pages/s, "
+          f"{len(items) / full_page_s:.1f} articles/s")
+    print(f"[BENCH] пул из {workers} процессов на {os.cpu_count()} ядрах: ускорение разбора x{speedup:.2f}")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'scale': 'arxiv-fixtures',
+            'pages': len(pages),
+            'items': len(items),
+        },
+        'results': run.results,
+    }
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+    else:
+        print(payload)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""
+Запуск бенчмарков на синтетическом корпусе.
+
+    python -m benchmarks.run --scale 1k --output bench_1k.json
+    python -m benchmarks.run --scale 100k --only train,get_recommendations
+
+Результат - JSON (метаданные запуска + время по каждому замеру), который
+можно сравнивать между коммитами через benchmarks/compare.py.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks import ROOT_DIR
+from benchmarks.synthetic import SCALES, article_url, generate_articles, load_articles, load_users
+
+
+class BenchmarkRun:
+    """Сбор замеров: имя -> статистика по повторам (в секундах)."""
+
+    def __init__(self, only=None):
+        self.only = set(only or [])
+        self.results = {}
+
+    def enabled(self, name):
+        return not self.only or name in self.only
+
+    def measure(self, name, fn, repeat=1, per_call=1, **extra):
+        """Выполняет fn repeat раз; per_call - сколько операций в одном вызове (для времени на операцию)."""
+        if not self.enabled(name):
+            return None
+        timings = []
+        value = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            value = fn()
+            timings.append((time.perf_counter() - start) / per_call)
+        self.results[name] = {
+            'mean_s': statistics.fmean(timings),
+            'min_s': min(timings),
+            'max_s': max(timings),
+            'repeat': repeat,
+            'ops_per_call': per_call,
+            **extra,
+        }
+        print(f"[BENCH] {name:<40} {self.results[name]['mean_s'] * 1000:10.3f} ms")
+        return value
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, text=True).strip()
+    except Exception:
+        return None
+
+
+class OfflineParser:
+    """Парсер без сети для /api/register: отдает статьи синтетического корпуса."""
+
+    def __init__(self, corpus, article_dto_cls, per_query=10):
+        self.corpus = corpus
+        self.article_dto_cls = article_dto_cls
+        self.per_query = per_query
+
+    def parse(self, target_name):
+        start = random.randrange(max(1, len(self.corpus.articles) - self.per_query))
+        return [
+            self.article_dto_cls(
+                source_name='arxiv.org', source_url='https://arxiv.org/', title=a.title, authors=a.authors,
+                article_url=a.url, article_direction=a.direction, certain_directions=[a.direction],
+            )
+            for a in self.corpus.articles[start:start + self.per_query]
+        ]
+
+
+def bench_bulk(run, corpus, sample_size, save_count):
+    """database/database.py: обучение, граф соавторов, рекомендации, сохранение статей."""
+    import database as bulk
+
+    # Загрузка нужна остальным замерам, даже если сама не замеряется (--only)
+    if run.measure('bulk.load_corpus', lambda: load_articles(bulk.engine, corpus, bulk.Base.metadata.tables)) is None:
+        load_articles(bulk.engine, corpus, bulk.Base.metadata.tables)
+
+    recommender = bulk.ScienceRecommender(bulk.engine)
+    run.measure('load_data', recommender.load_data)
+    run.measure('build_coauthors_graph', recommender.build_coauthors_graph)
+    if importlib.util.find_spec('pyarrow') is not None:
+        # Те же входы из колоночного снимка (database/snapshot.py)
+        import snapshot
+
+        snapshot_dir = os.path.join(os.path.dirname(os.environ['SCIENCE_DB_PATH']), 'snapshot')
+        run.measure('snapshot.export', lambda: snapshot.export_snapshot(bulk.engine, snapshot_dir))
+        if not os.path.exists(os.path.join(snapshot_dir, 'manifest.json')):
+            snapshot.export_snapshot(bulk.engine, snapshot_dir)
+        from_snapshot = bulk.ScienceRecommender(bulk.engine, snapshot_dir=snapshot_dir)
+        run.measure('load_data (snapshot)', from_snapshot.load_data)
+        run.measure('build_coauthors_graph (snapshot)', from_snapshot.build_coauthors_graph)
+    run.measure('train', lambda: bulk.ScienceRecommender(bulk.engine).train())
+
+    trained = bulk.ScienceRecommender(bulk.engine)
+    trained.train()
+    sample = random.Random(0).sample(corpus.author_names, min(sample_size, len(corpus.author_names)))
+    run.measure('get_recommendations', lambda: [trained.get_recommendations(name) for name in sample],
+                per_call=len(sample))
+    run.measure('get_recommendations_batch', lambda: list(trained.get_recommendations_batch(sample)),
+                per_call=len(sample))
+    # С графовой близостью (RECOMMENDER_GRAPH_WEIGHT): цена персонализированного PageRank
+    with_graph = bulk.ScienceRecommender(bulk.engine, graph_weight=0.3)
+    with_graph.train()
+    run.measure('get_recommendations_batch (graph 0.3)', lambda: list(with_graph.get_recommendations_batch(sample)),
+                per_call=len(sample))
+
+    # Номера после корпуса: иначе paper_key совпадёт с уже загруженными статьями и сохранять будет нечего
+    offset = len(corpus.articles)
+    new_articles = [
+        bulk.ArticleDTO('arxiv.org', 'https://arxiv.org/', f'{a.title} revisited {offset + i}', a.authors,
+                        article_url(offset + i), a.direction)
+        for i, a in enumerate(corpus.articles[:save_count])
+    ]
+    run.measure('save_list_of_articles', lambda: bulk.save_list_of_articles(new_articles),
+                per_call=max(1, len(new_articles)))
+
+
+def bench_app(run, corpus, n_users, sample_size, repeat):
+    """app.py: обучение и эндпоинты через тестовый клиент Flask (статьи уже загружены в bench_bulk)."""
+    import app as web
+
+    if run.measure('app.load_users', lambda: load_users(
+            web.engine, corpus, web.Base.metadata.tables, n_users=n_users)) is None:
+        load_users(web.engine, corpus, web.Base.metadata.tables, n_users=n_users)
+    run.measure('load_and_train', web.recommender.load_and_train)
+
+    client = web.app.test_client()
+    rng = random.Random(1)
+    user_ids = list(range(1, n_users + 1))
+    article_ids = list(range(1, len(corpus.articles) + 1))
+
+    def login():
+        user_id = rng.choice(user_ids)
+        return client.post('/api/login', json={'email': f"user{user_id}@example.org", 'password': 'password'})
+
+    def like():
+        return client.post('/api/like', json={'userId': rng.choice(user_ids), 'articleId': rng.choice(article_ids)})
+
+    def batch():
+        names = corpus.author_names[:sample_size]
+        return client.post('/api/recommendations/batch', json={'authors': names}).get_data()
+
+    # Сборка ответов без кэша (response_cache.py) - его эффект меряется отдельно ниже
+    web.app.config['RESPONSE_CACHE_ENABLED'] = False
+    run.measure('GET /api/articles', lambda: client.get('/api/articles').get_data(), repeat=repeat)
+    run.measure('GET /api/users', lambda: client.get('/api/users').get_data(), repeat=repeat)
+    run.measure('GET /api/articles/top', lambda: client.get('/api/articles/top?k=4').get_data(),
+                repeat=max(repeat, sample_size))
+    run.measure('GET /api/articles/top?mode=popular',
+                lambda: client.get('/api/articles/top?k=4&mode=popular').get_data(), repeat=max(repeat, sample_size))
+    run.measure('POST /api/login', login, repeat=max(repeat, sample_size))
+    run.measure('POST /api/like', like, repeat=max(repeat, sample_size))
+    run.measure('POST /api/recommendations/batch', batch, repeat=repeat)
+
+    web.app.config['RESPONSE_CACHE_ENABLED'] = True
+    client.get('/api/articles')
+    run.measure('GET /api/articles (cached)', lambda: client.get('/api/articles').get_data(),
+                repeat=max(repeat, sample_size))
+
+    # Регистрация последней: она запускает фоновое переобучение
+    from arxiv_parser import ParsedArticleDTO
+    web.arxiv_parser = OfflineParser(corpus, ParsedArticleDTO)
+    counter = iter(range(10 ** 9))
+
+    def register():
+        i = next(counter)
+        return client.post('/api/register', json={
+            'email': f"new{i}@example.org", 'password': 'password', 'firstName': 'Bench', 'lastName': f"User{i}",
+            'role': 'user', 'academicStatus': 'PhD', 'city': 'Sirius', 'age': 30,
+        })
+
+    run.measure('POST /api/register', register, repeat=max(repeat, 10))
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Бенчмарки рекомендательной системы и API")
+    arg_parser.add_argument('--scale', default='1k', help=f"число статей: {', '.join(SCALES)} или число")
+    arg_parser.add_argument('--users', type=int, default=None, help="пользователей в app.py (по умолчанию scale/10)")
+    arg_parser.add_argument('--sample', type=int, default=100, help="авторов для замеров рекомендаций/логина")
+    arg_parser.add_argument('--save-count', type=int, default=1000, help="статей для save_list_of_articles")
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--only', default='', help="через запятую: имена замеров")
+    arg_parser.add_argument('--skip-app', action='store_true', help="не запускать замеры app.py")
+    arg_parser.add_argument('--output', default=None, help="куда записать JSON (по умолчанию stdout)")
+    args = arg_parser.parse_args(argv)
+
+    n_articles = SCALES.get(args.scale.lower()) or int(args.scale)
+    n_users = args.users or max(50, n_articles // 10)
+    run = BenchmarkRun(only=[name for name in args.only.split(',') if name])
+
+    print(f"[BENCH] Генерация корпуса: {n_articles} статей...")
+    corpus = run.measure('generate_corpus', lambda: generate_articles(n_articles))
+    if corpus is None:
+        corpus = generate_articles(n_articles)
+
+    with tempfile.TemporaryDirectory(prefix='science_bench_') as tmp:
+        # app.py и database.py работают с одной схемой и одной базой
+        os.environ['SCIENCE_DB_PATH'] = os.path.join(tmp, 'science.db')
+        bench_bulk(run, corpus, args.sample, args.save_count)
+        if not args.skip_app:
+            bench_app(run, corpus, n_users, args.sample, args.repeat)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'scale': args.scale,
+            'articles': n_articles,
+            'authors': len(corpus.author_names),
+            'authorships': sum(len(a.authors) for a in corpus.articles),
+            'users': n_users,
+        },
+        'results': run.results,
+    }
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        print(f"[BENCH] Результаты записаны в {args.output}")
+    else:
+        print(payload)
+    return report
+
+
+if __name__ == '__main__':
+    main()
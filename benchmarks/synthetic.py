@@ -0,0 +1,198 @@
+"""
+Генератор синтетического корпуса для бенчмарков.
+
+Распределения приближены к реальным данным arXiv:
+- размер авторского коллектива - 1 + геометрическое распределение (чаще 2-4 автора);
+- продуктивность авторов - степенная (preferential attachment: у кого больше
+  статей, тот чаще попадает в новые), соавторы в основном из своего направления;
+- популярность статей для лайков - распределение Ципфа.
+"""
+import random
+from collections import Counter
+from itertools import accumulate
+from dataclasses import dataclass, field
+
+from sqlalchemy import bindparam
+
+from coauthor_graph import count_pairs, edge_rows
+from paper_key import paper_key
+from storage import bulk_insert, reset_sequences
+
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+DIRECTION_VOCABULARY = {
+    "Информатика и компьютерные науки": [
+        "neural", "networks", "deep", "learning", "algorithm", "database", "software",
+        "computer", "vision", "graph", "distributed", "compiler", "transformer", "cloud",
+    ],
+    "Математика": [
+        "algebra", "geometry", "topology", "theorem", "equations", "manifold", "operator",
+        "number", "theory", "probability", "combinatorics", "spectral", "calculus",
+    ],
+    "Физика": [
+        "quantum", "field", "plasma", "optics", "thermodynamics", "particle", "gravity",
+        "cosmology", "magnetic", "superconductivity", "lattice", "spin", "neutrino",
+    ],
+    "Химия": [
+        "molecular", "catalysis", "polymer", "synthesis", "spectroscopy", "crystal",
+        "electrochemistry", "reaction", "compounds", "kinetics", "organic",
+    ],
+    "Биология": [
+        "genome", "protein", "cell", "evolution", "sequencing", "immune", "bacteria",
+        "expression", "neurons", "bioinformatics", "virus", "enzyme",
+    ],
+}
+COMMON_WORDS = [
+    "analysis", "model", "method", "approach", "study", "new", "efficient", "large",
+    "scale", "structure", "dynamics", "properties", "framework", "results", "towards",
+]
+FIRST_NAMES = [
+    "Alexei", "Mikhail", "Sergei", "Anna", "Elena", "Dmitry", "Olga", "Ivan", "Maria",
+    "Pavel", "Natalia", "Andrey", "Yuri", "Irina", "Vladimir", "Tatiana", "Nikolai",
+    "Wei", "Li", "Hiroshi", "Maria", "John", "Laura", "Marco", "Pierre", "Hans",
+]
+SYLLABLES = ["ka", "lo", "mi", "ne", "ro", "vi", "ta", "su", "de", "pa", "zo", "ri", "ba", "go", "le", "tu"]
+SURNAME_ENDINGS = ["ov", "in", "ev", "sky", "enko", "ski", "er", "son"]
+
+
+def author_name(i: int) -> str:
+    """Уникальное правдоподобное имя автора по номеру."""
+    surname, n = "", i
+    while True:
+        surname += SYLLABLES[n % len(SYLLABLES)]
+        n //= len(SYLLABLES)
+        if n == 0:
+            break
+    surname = (surname + SURNAME_ENDINGS[i % len(SURNAME_ENDINGS)]).capitalize()
+    return f"{FIRST_NAMES[(i * 7) % len(FIRST_NAMES)]} {surname}"
+
+
+def article_url(i: int) -> str:
+    """Уникальная ссылка на arXiv по номеру статьи."""
+    return f"https://arxiv.org/abs/{2000 + i // 100000}.{i % 100000:05d}"
+
+
+@dataclass
+class SyntheticArticle:
+    title: str
+    url: str
+    direction: str
+    authors: list = field(default_factory=list)
+
+
+@dataclass
+class SyntheticCorpus:
+    articles: list            # list[SyntheticArticle]
+    author_names: list        # все уникальные авторы
+    author_directions: dict   # имя -> основное направление
+
+
+def generate_articles(n_articles: int, seed: int = 42, new_author_prob: float = 0.35) -> SyntheticCorpus:
+    rng = random.Random(seed)
+    directions = list(DIRECTION_VOCABULARY)
+    # Пулы "выступлений" авторов по направлениям: автор встречается в пуле столько раз,
+    # сколько у него статей -> выбор из пула = preferential attachment
+    pools = {d: [] for d in directions}
+    author_names, author_directions = [], {}
+    articles = []
+
+    for i in range(n_articles):
+        direction = rng.choice(directions)
+        team_size = 1
+        while team_size < 30 and rng.random() < 0.6:
+            team_size += 1
+
+        team = []
+        for _ in range(team_size):
+            pool = pools[direction if rng.random() < 0.9 else rng.choice(directions)]
+            if not pool or rng.random() < new_author_prob:
+                name = author_name(len(author_names))
+                author_names.append(name)
+                author_directions[name] = direction
+            else:
+                name = rng.choice(pool)
+            if name not in team:
+                team.append(name)
+        for name in team:
+            pools[author_directions[name]].append(name)
+
+        words = rng.sample(DIRECTION_VOCABULARY[direction], 3) + rng.sample(COMMON_WORDS, 2)
+        rng.shuffle(words)
+        articles.append(SyntheticArticle(
+            title=" ".join(words).capitalize(),
+            url=article_url(i),
+            direction=direction,
+            authors=team,
+        ))
+    return SyntheticCorpus(articles, author_names, author_directions)
+
+
+def load_articles(engine, corpus: SyntheticCorpus, tables: dict):
+    """Статьи, авторы (по строке на авторство) и граф соавторства в общую схему database/database.py."""
+    article_rows, author_rows = [], []
+    for article_id, article in enumerate(corpus.articles, start=1):
+        article_rows.append({
+            'id': article_id, 'source_name': 'arxiv.org', 'source_url': 'https://arxiv.org/',
+            'title': article.title, 'article_url': article.url, 'article_direction': article.direction,
+            'citations': 0,
+            'like_count': 0,
+            'paper_key': paper_key(article.url, article.title),
+        })
+        author_rows.extend({'name': name, 'article_id': article_id} for name in article.authors)
+
+    # bulk_insert: COPY для PostgreSQL, executemany для SQLite
+    with engine.begin() as conn:
+        bulk_insert(conn, tables['articles'], article_rows, chunk_size=50_000)
+        bulk_insert(conn, tables['authors'], author_rows, chunk_size=50_000)
+        bulk_insert(conn, tables['coauthor_edges'], edge_rows(count_pairs(a.authors for a in corpus.articles)),
+                    chunk_size=50_000)
+        reset_sequences(conn, [tables['articles'], tables['authors']])
+    return len(article_rows), len(author_rows)
+
+
+def load_users(engine, corpus: SyntheticCorpus, tables: dict, n_users: int, likes_per_user: float = 5.0,
+               seed: int = 42):
+    """
+    Пользователи веб-приложения поверх уже загруженных статей (load_articles):
+    users, authors_articles (статьи пользователя), likes и счетчики articles.like_count.
+    Пользователи - первые n_users авторов корпуса (как при регистрации через парсер).
+    """
+    rng = random.Random(seed)
+    user_ids = {}
+    user_rows = []
+    for user_id, name in enumerate(corpus.author_names[:n_users], start=1):
+        first_name, last_name = name.split(' ', 1)
+        user_ids[name] = user_id
+        user_rows.append({
+            'id': user_id, 'email': f"user{user_id}@example.org", 'password': 'password',
+            'first_name': first_name, 'last_name': last_name, 'role': 'user',
+            'academic_status': 'PhD', 'city': 'Sirius', 'age': 30, 'area': corpus.author_directions[name],
+        })
+
+    authorship_rows = []
+    for article_id, article in enumerate(corpus.articles, start=1):
+        authorship_rows.extend(
+            {'user_id': user_ids[name], 'article_id': article_id} for name in article.authors if name in user_ids
+        )
+
+    # Лайки: популярность статей по Ципфу (вес ~ 1 / rank)
+    n_articles = len(corpus.articles)
+    cum_weights = list(accumulate(1.0 / rank for rank in range(1, n_articles + 1)))
+    article_ids = range(1, n_articles + 1)
+    like_rows = []
+    for user_id in range(1, len(user_rows) + 1):
+        n_likes = min(n_articles, int(rng.expovariate(1.0 / likes_per_user)))
+        liked = set(rng.choices(article_ids, cum_weights=cum_weights, k=n_likes))
+        like_rows.extend({'user_id': user_id, 'article_id': article_id} for article_id in liked)
+
+    with engine.begin() as conn:
+        for table, rows in (('users', user_rows), ('authors_articles', authorship_rows), ('likes', like_rows)):
+            bulk_insert(conn, tables[table], rows, chunk_size=50_000)
+        articles = tables['articles']
+        like_counts = Counter(row['article_id'] for row in like_rows)
+        if like_counts:
+            conn.execute(articles.update().where(articles.c.id == bindparam('article_id'))
+                         .values(like_count=bindparam('likes')),
+                         [{'article_id': article_id, 'likes': count} for article_id, count in like_counts.items()])
+        reset_sequences(conn, [tables['users']])
+    return {'users': len(user_rows), 'authorships': len(authorship_rows), 'likes': len(like_rows)}
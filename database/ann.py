@@ -0,0 +1,206 @@
+"""
+Приближенный поиск ближайших соседей (ANN) для ScienceRecommender.
+
+Точный косинус по всем авторам перестает укладываться в realtime задолго
+до миллиона авторов. Здесь - подключаемые индексы над плотными векторами
+(TruncatedSVD от tfidf_matrix, строки L2-нормированы, поэтому косинус = dot):
+
+- ExactIndex - полный перебор одним матричным произведением (эталон);
+- LSHIndex - LSH на случайных гиперплоскостях с multi-probe и точным
+  переранжированием кандидатов. n_tables / n_bits / n_probes задают
+  компромисс между полнотой (recall) и задержкой.
+
+Оба индекса имеют одинаковый интерфейс: build(vectors), query(vectors, k) ->
+(ids, scores), где отсутствующие кандидаты дополнены id=-1 и score=-inf.
+"""
+import time
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+
+
+def reduce_dimensions(tfidf_matrix, n_components=128, random_state=42):
+    """TruncatedSVD (LSA) до n_components измерений, строки L2-нормированы, float32."""
+    n_components = min(n_components, tfidf_matrix.shape[0] - 1, tfidf_matrix.shape[1] - 1)
+    if n_components < 1:
+        vectors = np.asarray(tfidf_matrix.todense(), dtype=np.float32)
+    else:
+        svd = TruncatedSVD(n_components=n_components, random_state=random_state)
+        vectors = svd.fit_transform(tfidf_matrix).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(vectors / norms)
+
+
+def _top_k(ids, scores, k):
+    """Топ-k по строкам, отсортированный по убыванию сходства."""
+    if scores.shape[1] > k:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        ids = np.take_along_axis(ids, part, axis=1)
+        scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-scores, axis=1, kind='stable')
+    return np.take_along_axis(ids, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+class ExactIndex:
+    """Точный поиск: одно произведение матриц на блок запросов."""
+
+    def build(self, vectors):
+        self.vectors = vectors
+        return self
+
+    def query(self, queries, k):
+        scores = queries @ self.vectors.T
+        ids = np.broadcast_to(np.arange(self.vectors.shape[0]), scores.shape)
+        return _top_k(ids, scores, min(k, scores.shape[1]))
+
+
+class LSHIndex:
+    """
+    LSH на случайных гиперплоскостях (SimHash).
+
+    n_tables - число независимых хеш-таблиц (больше - выше recall, медленнее);
+    n_bits - бит в ключе (больше - меньше корзины и кандидатов, ниже recall);
+    n_probes - сколько соседних корзин (с перевернутым "ненадежным" битом)
+    дополнительно просматривать в каждой таблице.
+    """
+
+    def __init__(self, n_tables=8, n_bits=12, n_probes=2, random_state=42):
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.n_probes = n_probes
+        self.random_state = random_state
+        self.vectors = None
+        self.planes = None
+        self.tables = []
+
+    def _project(self, vectors):
+        # (n, n_tables, n_bits)
+        return np.einsum('nd,tbd->ntb', vectors, self.planes)
+
+    def _codes(self, projections):
+        weights = 1 << np.arange(self.n_bits, dtype=np.int64)
+        return ((projections > 0) * weights).sum(axis=2)
+
+    def build(self, vectors):
+        rng = np.random.default_rng(self.random_state)
+        self.vectors = vectors
+        self.planes = rng.standard_normal((self.n_tables, self.n_bits, vectors.shape[1])).astype(np.float32)
+
+        codes = self._codes(self._project(vectors))
+        self.tables = []
+        for t in range(self.n_tables):
+            order = np.argsort(codes[:, t], kind='stable')
+            keys, starts = np.unique(codes[order, t], return_index=True)
+            buckets = np.split(order, starts[1:])
+            self.tables.append(dict(zip(keys.tolist(), buckets)))
+        return self
+
+    def _probe_codes(self, projections, codes):
+        """Основной ключ + ключи с перевернутыми битами, ближайшими к гиперплоскости."""
+        if self.n_probes <= 0:
+            return codes[:, :, None]
+        n_flip = min(self.n_probes, self.n_bits)
+        flip_bits = np.argsort(np.abs(projections), axis=2)[:, :, :n_flip]
+        flipped = codes[:, :, None] ^ (1 << flip_bits)
+        return np.concatenate([codes[:, :, None], flipped], axis=2)
+
+    def query(self, queries, k):
+        projections = self._project(queries)
+        probes = self._probe_codes(projections, self._codes(projections))
+
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for q in range(len(queries)):
+            found = [
+                self.tables[t][code]
+                for t in range(self.n_tables)
+                for code in probes[q, t].tolist()
+                if code in self.tables[t]
+            ]
+            if not found:
+                continue
+            cand = np.unique(np.concatenate(found))
+            # Точное переранжирование кандидатов
+            cand_scores = self.vectors[cand] @ queries[q]
+            top_ids, top_scores = _top_k(cand[None, :], cand_scores[None, :], min(k, len(cand)))
+            ids[q, :top_ids.shape[1]] = top_ids[0]
+            scores[q, :top_scores.shape[1]] = top_scores[0]
+        return ids, scores
+
+
+def recall_at_k(exact_ids, approx_ids, k):
+    """Доля точных топ-k соседей, найденных приближенным поиском."""
+    hits = 0
+    for exact_row, approx_row in zip(exact_ids[:, :k], approx_ids[:, :k]):
+        hits += len(set(exact_row.tolist()) & set(approx_row.tolist()))
+    return hits / exact_ids[:, :k].size
+
+
+def benchmark(vectors, configs, k=10, n_queries=500, random_state=0):
+    """Recall@k и задержка на запрос для набора конфигураций LSH против точного поиска."""
+    rng = np.random.default_rng(random_state)
+    query_idx = rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)
+    queries = vectors[query_idx]
+
+    exact = ExactIndex().build(vectors)
+    start = time.perf_counter()
+    exact_ids = np.vstack([exact.query(queries[i:i + 1], k)[0] for i in range(len(queries))])
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    results = [{'index': 'exact', 'recall': 1.0, 'ms_per_query': exact_ms}]
+
+    for params in configs:
+        start = time.perf_counter()
+        index = LSHIndex(**params).build(vectors)
+        build_s = time.perf_counter() - start
+        start = time.perf_counter()
+        approx_ids = np.vstack([index.query(queries[i:i + 1], k)[0] for i in range(len(queries))])
+        ms = (time.perf_counter() - start) * 1000 / len(queries)
+        results.append({
+            'index': 'lsh', **params,
+            'recall': recall_at_k(exact_ids, approx_ids, k),
+            'ms_per_query': ms, 'build_s': build_s,
+        })
+    return results
+
+
+def synthetic_vectors(n, dim=128, n_clusters=200, noise=0.35, random_state=0):
+    """Кластеризованные нормированные векторы - замена реальному корпусу при больших N."""
+    rng = np.random.default_rng(random_state)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, n_clusters, n)] + noise * rng.standard_normal((n, dim)).astype(np.float32)
+    return np.ascontiguousarray(vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+
+
+# ==========================================
+# БЕНЧМАРК: recall@k против точного поиска
+# ==========================================
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Recall@k / latency для ANN-индексов")
+    arg_parser.add_argument('--synthetic', type=int, default=0,
+                            help="размер синтетического корпуса (0 - авторы из science_articles.db)")
+    arg_parser.add_argument('--dim', type=int, default=128)
+    arg_parser.add_argument('--k', type=int, default=10)
+    arg_parser.add_argument('--queries', type=int, default=500)
+    args = arg_parser.parse_args()
+
+    if args.synthetic:
+        data = synthetic_vectors(args.synthetic, dim=args.dim)
+    else:
+        from database import ScienceRecommender, engine
+        recommender = ScienceRecommender(engine)
+        recommender.train()
+        data = reduce_dimensions(recommender.tfidf_matrix, args.dim)
+
+    grid = [
+        {'n_tables': 4, 'n_bits': 12, 'n_probes': 0},
+        {'n_tables': 8, 'n_bits': 12, 'n_probes': 2},
+        {'n_tables': 16, 'n_bits': 12, 'n_probes': 4},
+        {'n_tables': 16, 'n_bits': 16, 'n_probes': 4},
+    ]
+    print(f"[ANN] {len(data)} векторов, dim={data.shape[1]}, k={args.k}")
+    for row in benchmark(data, grid, k=args.k, n_queries=args.queries):
+        params = f"tables={row.get('n_tables', '-')} bits={row.get('n_bits', '-')} probes={row.get('n_probes', '-')}"
+        print(f"{row['index']:<6} {params:<30} recall@{args.k}={row['recall']:.3f}  {row['ms_per_query']:.3f} ms/query")
@@ -0,0 +1,226 @@
+"""
+Асинхронный клиент arXiv для регистрации (app.py) и массовой загрузки (data_saver.py).
+
+- один aiohttp.ClientSession на клиент: общий пул соединений (keep-alive);
+- asyncio.Semaphore - не больше ARXIV_CONCURRENCY запросов одновременно;
+- TokenBucket - не чаще ARXIV_RATE запросов в секунду (с запасом ARXIV_BURST);
+  Retry-After из ответа 429/503 останавливает ведро для всех запросов клиента,
+  включая уже получившие маркер и ждущие семафор;
+- 429, 5xx и сетевые ошибки повторяются до ARXIV_MAX_RETRIES раз с
+  экспоненциальной задержкой и случайным разбросом (full jitter), но не меньше Retry-After;
+- отмена: CancelledError не перехватывается, ожидание в ведре и в паузе
+  между повторами прерывается сразу, соединение возвращается в пул.
+
+HTML разбирает тот же ArxivorgArticleParser (parse_page). ArxivClientThread -
+клиент в отдельном потоке со своим циклом событий для синхронного кода:
+все запросы приложения идут через один пул соединений и одно ведро.
+
+Нужен пакет aiohttp; без него app.py и data_saver.py работают через
+синхронный ArxivorgArticleParser.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from email.utils import parsedate_to_datetime
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from arxiv_parser import ArxivorgArticleParser
+from metrics import PARSER_FETCH_SECONDS, PARSER_RETRIES
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _env_float(name, default):
+    return float(os.environ.get(name, default))
+
+
+def retry_after_seconds(value):
+    """Retry-After в секундах: число или HTTP-дата; None, если заголовка нет или он не разобран."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Ведро маркеров: rate маркеров в секунду, не больше burst в запасе."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        """Не выдавать маркеры seconds секунд (Retry-After); запас при этом обнуляется."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self):
+        # Под замком ждет только первый в очереди: маркеры выдаются по порядку прихода
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    self._updated = time.monotonic()
+                    continue
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def wait_paused(self):
+        """Дождаться конца паузы (Retry-After), не забирая маркер."""
+        while (remaining := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(remaining)
+
+
+class AsyncArxivClient:
+    def __init__(self, concurrency=None, rate=None, burst=None, max_retries=None, timeout=None,
+                 backoff_base=0.5, backoff_cap=30.0, parser=None):
+        if aiohttp is None:
+            raise RuntimeError("Для AsyncArxivClient нужен пакет aiohttp")
+        self.parser = parser or ArxivorgArticleParser()
+        self.concurrency = int(concurrency or _env_float('ARXIV_CONCURRENCY', 4))
+        self.max_retries = int(_env_float('ARXIV_MAX_RETRIES', 4) if max_retries is None else max_retries)
+        self.timeout = timeout or _env_float('ARXIV_TIMEOUT', 30)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.bucket = TokenBucket(rate or _env_float('ARXIV_RATE', 1.0), int(burst or _env_float('ARXIV_BURST', 4)))
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def session(self):
+        if self._session is None:
+            headers = self.parser.request_headers()
+            headers.pop('Accept-Encoding')  # aiohttp сам выбирает поддерживаемые кодировки
+            self._session = aiohttp.ClientSession(
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    async def fetch(self, url):
+        """Текст страницы или None (4xx, исчерпаны повторы)."""
+        source = self.parser.SOURCE_NAME
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            delay = self._backoff(attempt)
+            try:
+                async with self._semaphore:
+                    # Маркер мог быть выдан до паузы, пока запрос ждал семафор: Retry-After,
+                    # полученный за это время другим запросом, действует и на него
+                    await self.bucket.wait_paused()
+                    start = time.perf_counter()
+                    async with self.session.get(url) as response:
+                        if response.status == 200:
+                            text = await response.text()
+                            PARSER_FETCH_SECONDS.observe(time.perf_counter() - start, source=source)
+                            return text
+                        if response.status not in RETRY_STATUSES:
+                            print(f"HTTP Error: {response.status}")
+                            return None
+                        retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+                        reason = str(response.status)
+                        if retry_after is not None:
+                            # Сервер просит подождать: пауза для всех запросов клиента, а не только этого.
+                            # Сразу, до выхода из async with: освобождение ответа - await, за него
+                            # успели бы уйти запросы, уже ждущие семафор
+                            self.bucket.pause(retry_after)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                retry_after, reason = None, type(e).__name__
+                print(f"Request error: {e!r}")
+
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            if attempt == self.max_retries:
+                break
+            PARSER_RETRIES.inc(source=source, reason=reason)
+            await asyncio.sleep(delay)
+        print(f"Giving up on {url} after {self.max_retries + 1} attempts")
+        return None
+
+    async def fetch_page(self, target_name):
+        return await self.fetch(self.parser.search_url(target_name))
+
+    async def parse(self, target_name):
+        """Как ArxivorgArticleParser.parse: список ParsedArticleDTO (пустой при ошибке)."""
+        html_content = await self.fetch_page(target_name)
+        if not html_content:
+            return []
+        # Разбор - работа процессора: в отдельном потоке, чтобы цикл событий не стоял
+        return await asyncio.to_thread(self.parser.parse_page, html_content)
+
+
+class ArxivClientThread:
+    """
+    AsyncArxivClient в фоновом потоке для синхронного кода (обработчики Flask).
+    parse(target_name) блокирует вызывающий поток; по таймауту запрос отменяется.
+    """
+
+    def __init__(self, timeout=None, **client_options):
+        self.timeout = timeout or _env_float('ARXIV_REGISTER_TIMEOUT', 60)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='arxiv-client', daemon=True)
+        self._thread.start()
+        # Клиент (семафор, ведро) создается внутри цикла, которому принадлежит
+        self.client = self._call(self._create(client_options))
+
+    @staticmethod
+    async def _create(client_options):
+        return AsyncArxivClient(**client_options)
+
+    def _call(self, coroutine, timeout=None):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def parse(self, target_name):
+        try:
+            return self._call(self.client.parse(target_name), self.timeout)
+        except FutureTimeoutError:
+            print(f"arXiv: запрос '{target_name}' отменен по таймауту ({self.timeout:.0f} с)")
+            return []
+
+    def close(self):
+        if self._loop.is_running():
+            self._call(self.client.close(), 10)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(10)
@@ -1,13 +1,15 @@
+import time
 from dataclasses import dataclass
 import requests
 from bs4 import BeautifulSoup
 from fake_useragent import UserAgent
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from metrics import PARSER_FETCH_SECONDS, PARSER_PARSE_SECONDS, PARSER_ARTICLES
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ParsedArticleDTO:
-    """DTO для спарсенных статей."""
+    """DTO для спарсенных статей (slots: без __dict__ на экземпляр)."""
     source_name: str
     source_url: str
     title: str
@@ -17,6 +19,11 @@ class ParsedArticleDTO:
     certain_directions: List[str]
 
 
+# Статья в компактном виде для передачи между процессами (parse_pool.py):
+# (title, authors, article_url, article_direction, certain_directions) - только строки и кортежи строк
+ArticleRow = Tuple[str, Tuple[str, ...], str, str, Tuple[str, ...]]
+
+
 class ArxivorgArticleParser:
     """Класс парсера статей для arxiv.org."""
 
@@ -27,21 +34,131 @@ class ArxivorgArticleParser:
     DIRECTIONS_KEYWORDS = {
         "Информатика и компьютерные науки": [
             "информатика", "компьютер", "программирование", "алгоритм", "база данных",
+            "вычислительная техника", "кибернетика", "искусственный интеллект",
+            "машинное обучение", "нейронные сети", "компьютерное зрение", "анализ данных",
+            "большие данные", "веб-разработка", "мобильные приложения", "облачные вычисления",
+            "кибербезопасность", "криптография", "блокчейн", "виртуальная реальность",
+            "интернет вещей", "робототехника", "автоматизация", "цифровизация",
+            "программное обеспечение", "аппаратное обеспечение", "сети", "сервер",
+            "фронтенд", "бэкенд", "фуллстек", "devops", "agile", "scrum",
             "computer science", "informatics", "programming", "algorithm", "database",
             "software", "hardware", "computing", "artificial intelligence", "ai",
             "machine learning", "neural networks", "deep learning", "computer vision",
+            "data science", "big data", "web development", "mobile apps", "cloud computing",
+            "cybersecurity", "cryptography", "blockchain", "virtual reality", "vr",
+            "internet of things", "iot", "robotics", "automation", "digitalization",
+            "frontend", "backend", "fullstack", "devops", "agile", "scrum"
         ],
         "Математика": [
             "математика", "алгебра", "геометрия", "анализ", "исчисление",
+            "дифференциальные уравнения", "теория вероятностей", "статистика",
+            "численные методы", "оптимизация", "топология", "теория чисел",
+            "комбинаторика", "теория графов", "математическая логика", "теория множеств",
+            "математическое моделирование", "вычислительная математика", "линейная алгебра",
+            "дискретная математика", "функциональный анализ", "теория вероятностей",
+            "математическая статистика", "теория игр", "финансовая математика",
             "mathematics", "algebra", "geometry", "calculus", "analysis",
+            "differential equations", "probability theory", "statistics",
+            "numerical methods", "optimization", "topology", "number theory",
+            "combinatorics", "graph theory", "mathematical logic", "set theory",
+            "mathematical modeling", "computational mathematics", "linear algebra",
+            "discrete mathematics", "functional analysis", "probability",
+            "mathematical statistics", "game theory", "financial mathematics"
         ],
         "Физика": [
             "физика", "механика", "термодинамика", "оптика", "электричество",
+            "магнетизм", "квантовая физика", "ядерная физика", "астрофизика",
+            "теория относительности", "электродинамика", "статистическая физика",
+            "физика твердого тела", "физика плазмы", "акустика", "гидродинамика",
+            "молекулярная физика", "атомная физика", "физика элементарных частиц",
+            "космология", "гравитация", "физика конденсированного состояния",
+            "нанофизика", "биофизика", "геофизика",
             "physics", "mechanics", "thermodynamics", "optics", "electricity",
+            "magnetism", "quantum physics", "nuclear physics", "astrophysics",
+            "relativity", "electrodynamics", "statistical physics",
+            "solid state physics", "plasma physics", "acoustics", "hydrodynamics",
+            "molecular physics", "atomic physics", "particle physics",
+            "cosmology", "gravity", "condensed matter physics",
+            "nanophysics", "biophysics", "geophysics"
+        ],
+        "Химия": [
+            "химия", "органическая химия", "неорганическая химия", "аналитическая химия",
+            "физическая химия", "биохимия", "химические реакции", "периодическая система",
+            "молекулы", "атомы", "соединения", "катализ", "полимеры", "нанохимия",
+            "электрохимия", "фотохимия", "радиохимия", "квантовая химия", "стереохимия",
+            "химическая кинетика", "химическое равновесие", "химическая термодинамика",
+            "материаловедение", "кристаллография", "спектроскопия",
+            "chemistry", "organic chemistry", "inorganic chemistry", "analytical chemistry",
+            "physical chemistry", "biochemistry", "chemical reactions", "periodic table",
+            "molecules", "atoms", "compounds", "catalysis", "polymers", "nanochemistry",
+            "electrochemistry", "photochemistry", "radiochemistry", "quantum chemistry",
+            "stereochemistry", "chemical kinetics", "chemical equilibrium", "chemical thermodynamics",
+            "materials science", "crystallography", "spectroscopy"
+        ],
+        "Биология": [
+            "биология", "генетика", "эволюция", "ботаника", "зоология",
+            "микробиология", "молекулярная биология", "клеточная биология",
+            "экология", "физиология", "анатомия", "биотехнология", "биоинформатика",
+            "генная инженерия", "иммунология", "вирусология", "биохимия",
+            "нейробиология", "биофизика", "палеонтология", "эмбриология",
+            "цитология", "гистология", "систематика", "биогеография",
+            "biology", "genetics", "evolution", "botany", "zoology",
+            "microbiology", "molecular biology", "cell biology",
+            "ecology", "physiology", "anatomy", "biotechnology", "bioinformatics",
+            "genetic engineering", "immunology", "virology", "biochemistry",
+            "neuroscience", "biophysics", "paleontology", "embryology",
+            "cytology", "histology", "taxonomy", "biogeography"
+        ],
+        "Русский язык и литература": [
+            "русский язык", "литература", "грамматика", "синтаксис", "морфология",
+            "поэзия", "проза", "фольклор", "лингвистика", "филология",
+            "пушкин", "толстой", "достоевский", "чехов", "русская классика",
+            "словообразование", "орфография", "пунктуация", "стилистика",
+            "риторика", "литературоведение", "поэтика", "текстология",
+            "диалектология", "палеография", "семантика", "прагматика",
+            "russian language", "literature", "grammar", "syntax", "morphology",
+            "poetry", "prose", "folklore", "linguistics", "philology",
+            "pushkin", "tolstoy", "dostoevsky", "chekhov", "russian classics",
+            "word formation", "spelling", "punctuation", "stylistics",
+            "rhetoric", "literary criticism", "poetics", "textual criticism",
+            "dialectology", "paleography", "semantics", "pragmatics"
         ],
-        # ... остальные направления (можно добавить позже)
+        "История": [
+            "история", "археология", "древний мир", "средневековье", "новое время",
+            "исторические события", "цивилизация", "культура", "историография",
+            "всемирная история", "отечественная история", "история россии",
+            "античность", "ренессанс", "просвещение", "революция", "война",
+            "исторические источники", "архивы", "музееведение", "палеография",
+            "нумизматика", "геральдика", "историческая география",
+            "history", "archaeology", "ancient world", "middle ages", "modern era",
+            "historical events", "civilization", "culture", "historiography",
+            "world history", "national history", "russian history",
+            "antiquity", "renaissance", "enlightenment", "revolution", "war",
+            "historical sources", "archives", "museology", "paleography",
+            "numismatics", "heraldry", "historical geography"
+        ],
+        "Экономика": [
+            "экономика", "макроэкономика", "микроэкономика", "финансы", "банки",
+            "рынок", "инвестиции", "бизнес", "менеджмент", "маркетинг",
+            "бухгалтерия", "аудит", "налоги", "бюджет", "инфляция",
+            "безработица", "валютный курс", "фондовый рынок", "криптовалюты",
+            "предпринимательство", "логистика", "снабжение", "продажи",
+            "экономический рост", "международная торговля", "государственные финансы",
+            "economics", "macroeconomics", "microeconomics", "finance", "banks",
+            "market", "investment", "business", "management", "marketing",
+            "accounting", "audit", "taxes", "budget", "inflation",
+            "unemployment", "exchange rate", "stock market", "cryptocurrency",
+            "entrepreneurship", "logistics", "supply chain", "sales",
+            "economic growth", "international trade", "public finance"
+        ],
+        # ... (Можно добавить остальные категории, но для MVP этого достаточно)
     }
 
+    def __init__(self, transport=None):
+        # transport - объект с интерфейсом requests.get (например, arxiv_replay.ReplayTransport
+        # для работы без сети); по умолчанию запросы идут в сеть через requests
+        self.transport = transport or requests
+
     def parse(self, target_name: str) -> List[ParsedArticleDTO]:
         """Основной метод парсинга."""
         print(f"Starting arXiv parser for: {target_name}")
@@ -53,28 +170,10 @@ class ArxivorgArticleParser:
         result: List[ParsedArticleDTO] = []
 
         try:
-            search_query = target_name.replace(' ', '+')
-            url = f"{self.SEARCH_URL}{search_query}"
-
-            print(f"Searching for: {target_name}")
-            print(f"URL: {url}")
-
-            html_content = self.get_data(url)
+            html_content = self.fetch_page(target_name)
             if not html_content:
                 return result
-
-            soup = BeautifulSoup(html_content, 'html.parser')
-            search_results = soup.find_all('li', class_='arxiv-result')
-
-            for i, item in enumerate(search_results[:min(10, len(search_results))]):
-                try:
-                    article_dto = self.parse_article_item(item)
-                    if article_dto:
-                        result.append(article_dto)
-                        print(f"Successfully parsed: {article_dto.title[:50]}...")
-                except Exception as e:
-                    print(f"Error parsing result {i + 1}: {e}")
-                    continue
+            result = self.parse_page(html_content)
 
         except Exception as e:
             print(f"Error in parse_news_page: {e}")
@@ -82,6 +181,59 @@ class ArxivorgArticleParser:
         print(f"Total articles parsed: {len(result)}")
         return result
 
+    def fetch_page(self, target_name: str) -> Optional[str]:
+        """HTML страницы поиска по запросу target_name (None при ошибке)."""
+        url = self.search_url(target_name)
+
+        print(f"Searching for: {target_name}")
+        print(f"URL: {url}")
+        return self.get_data(url)
+
+    def search_url(self, target_name: str) -> str:
+        search_query = target_name.replace(' ', '+')
+        return f"{self.SEARCH_URL}{search_query}"
+
+    def parse_page(self, html_content: str) -> List[ParsedArticleDTO]:
+        """Разбор страницы поиска в текущем процессе."""
+        start = time.perf_counter()
+        rows = self.parse_rows(html_content)
+        return self.from_rows(rows, time.perf_counter() - start)
+
+    def parse_rows(self, html_content: str) -> List[ArticleRow]:
+        """Первые 10 результатов страницы в виде кортежей ArticleRow."""
+        rows = []
+        soup = BeautifulSoup(html_content, 'html.parser')
+        search_results = soup.find_all('li', class_='arxiv-result')
+
+        for i, item in enumerate(search_results[:min(10, len(search_results))]):
+            try:
+                article_dto = self.parse_article_item(item)
+                if article_dto:
+                    rows.append((article_dto.title, tuple(article_dto.authors), article_dto.article_url,
+                                 article_dto.article_direction, tuple(article_dto.certain_directions)))
+                    print(f"Successfully parsed: {article_dto.title[:50]}...")
+            except Exception as e:
+                print(f"Error parsing result {i + 1}: {e}")
+                continue
+        return rows
+
+    def from_rows(self, rows: List[ArticleRow], parse_seconds: float) -> List[ParsedArticleDTO]:
+        """DTO из кортежей parse_rows; метрики разбора пишутся здесь, в процессе приложения."""
+        PARSER_PARSE_SECONDS.observe(parse_seconds, source=self.SOURCE_NAME)
+        PARSER_ARTICLES.inc(len(rows), source=self.SOURCE_NAME)
+        return [
+            ParsedArticleDTO(
+                source_name=self.SOURCE_NAME,
+                source_url=self.BASE_URL,
+                title=title,
+                authors=list(authors),
+                article_url=article_url,
+                article_direction=article_direction,
+                certain_directions=list(certain_directions)
+            )
+            for title, authors, article_url, article_direction, certain_directions in rows
+        ]
+
     def parse_article_item(self, item) -> Optional[ParsedArticleDTO]:
         """Парсит отдельный элемент статьи."""
         try:
@@ -161,19 +313,12 @@ class ArxivorgArticleParser:
     def get_data(self, url: str, request_params: dict | None = None) -> Optional[str]:
         """Получение html строки."""
         try:
-            user = UserAgent().random
             request_params = request_params or {}
-            headers = {
-                'User-Agent': user,
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
+            headers = self.request_headers()
 
             print(f"Fetching URL: {url}")
-            response = requests.get(url, headers=headers, timeout=30, **request_params)
+            with PARSER_FETCH_SECONDS.time(source=self.SOURCE_NAME):
+                response = self.transport.get(url, headers=headers, timeout=30, **request_params)
 
             if response.status_code == 200:
                 print("Successfully fetched page")
@@ -187,4 +332,37 @@ class ArxivorgArticleParser:
             return None
         except Exception as e:
             print(f"Unexpected error in get_data: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def request_headers() -> dict:
+        """Заголовки браузера со случайным User-Agent."""
+        return {
+            'User-Agent': UserAgent().random,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+        }
+
+
+_page_parser = None
+
+
+def parse_page_rows(html_content: str) -> Tuple[List[ArticleRow], float]:
+    """
+    (кортежи статей, секунды разбора) для страницы поиска.
+    Функция уровня модуля: ее можно отправить в пул процессов (parse_pool.py).
+    """
+    global _page_parser
+    if _page_parser is None:
+        _page_parser = ArxivorgArticleParser()
+    start = time.perf_counter()
+    rows = _page_parser.parse_rows(html_content)
+    return rows, time.perf_counter() - start
+
+
+def normalize_query(target_name: str) -> str:
+    """Ключ поискового запроса: поиск arXiv не различает регистр и лишние пробелы."""
+    return ' '.join(target_name.split()).casefold()
@@ -0,0 +1,403 @@
+"""
+Запись и воспроизведение страниц поиска arXiv без сети.
+
+ArxivorgArticleParser(transport=...) получает HTML через transport.get(url, ...)
+с интерфейсом requests.get. Здесь два таких транспорта:
+
+- RecordingTransport - ходит в сеть через requests и сохраняет ответы в каталог;
+- ReplayTransport - отдает сохраненные страницы (неизвестный URL -> 404).
+
+Для асинхронного клиента (arxiv_async.py) есть StubServer - локальный HTTP-сервер
+с теми же страницами, медленными ответами, 429 с Retry-After и случайными 503.
+
+Страницы лежат в fixtures/arxiv/ в виде .html.gz, соответствие URL -> файл -
+в index.json. Запуск из консоли:
+
+    python arxiv_replay.py record "Alexander Gasnikov" "Oleg Viro"
+    python arxiv_replay.py rebuild    # пересобрать страницы из science_articles.db
+    python arxiv_replay.py serve --port 8765 --delay 0.3 --max-rate 5
+"""
+import gzip
+import hashlib
+import html
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'arxiv')
+INDEX_FILE = 'index.json'
+
+
+class ReplayResponse:
+    """Минимальный аналог requests.Response: status_code, text, headers."""
+
+    def __init__(self, status_code, text='', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+def _load_index(directory):
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_index(directory, index):
+    with open(os.path.join(directory, INDEX_FILE), 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def fixture_filename(url):
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:16] + '.html.gz'
+
+
+def save_page(directory, url, text):
+    os.makedirs(directory, exist_ok=True)
+    index = _load_index(directory)
+    filename = fixture_filename(url)
+    with gzip.open(os.path.join(directory, filename), 'wt', encoding='utf-8') as f:
+        f.write(text)
+    index[url] = filename
+    _save_index(directory, index)
+
+
+class ReplayTransport:
+    """Отдает записанные страницы вместо сетевых запросов."""
+
+    def __init__(self, directory=FIXTURES_DIR, preload=True):
+        self.directory = directory
+        self.index = _load_index(directory)
+        self.pages = {}
+        if preload:
+            # Читаем все заранее, чтобы в замерах не было чтения с диска и распаковки
+            for url in self.index:
+                self.pages[url] = self._read(url)
+
+    def _read(self, url):
+        with gzip.open(os.path.join(self.directory, self.index[url]), 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    @property
+    def urls(self):
+        return list(self.index)
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        if url not in self.index:
+            return ReplayResponse(404)
+        text = self.pages.get(url)
+        if text is None:
+            text = self.pages[url] = self._read(url)
+        return ReplayResponse(200, text, {'Content-Type': 'text/html; charset=utf-8'})
+
+
+class RecordingTransport:
+    """Прозрачно проксирует запросы в сеть и сохраняет успешные ответы."""
+
+    def __init__(self, directory=FIXTURES_DIR, inner=None):
+        import requests
+        self.directory = directory
+        self.inner = inner or requests
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        response = self.inner.get(url, headers=headers, timeout=timeout, **kwargs)
+        if response.status_code == 200:
+            save_page(self.directory, url, response.text)
+        return response
+
+
+class StubServer:
+    """
+    Локальный arXiv: страницы из fixtures по пути и параметрам исходного URL.
+
+    delay      - задержка каждого ответа, с;
+    max_rate   - больше max_rate запросов за последнюю секунду -> 429 с Retry-After;
+                 запросы до истечения Retry-After тоже получают 429 и считаются нарушениями;
+    fail_rate  - доля случайных ответов 503 (без Retry-After).
+    Как и arXiv, поиск не различает регистр и лишние пробелы в параметрах запроса.
+    Статистика: stats (число запросов, статусы, максимум одновременных, нарушения).
+    """
+
+    ORIGIN = 'https://arxiv.org'
+
+    def __init__(self, directory=FIXTURES_DIR, delay=0.0, max_rate=None, retry_after=1.0, fail_rate=0.0,
+                 host='127.0.0.1', port=0, seed=0):
+        self.transport = ReplayTransport(directory)
+        self._routes = {self._route(url): url for url in self.transport.urls}
+        self.delay = delay
+        self.max_rate = max_rate
+        self.retry_after = retry_after
+        self.fail_rate = fail_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = deque()  # время последних принятых запросов (окно 1 с)
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self.reset_stats()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def search_url(self):
+        """SEARCH_URL парсера, указывающий на этот сервер."""
+        from arxiv_parser import ArxivorgArticleParser
+        return ArxivorgArticleParser.SEARCH_URL.replace(self.ORIGIN, self.base_url, 1)
+
+    @staticmethod
+    def _route(url):
+        parts = urlsplit(url)
+        params = sorted((name, ' '.join(value.split()).casefold()) for name, value in parse_qsl(parts.query))
+        return parts.path, tuple(params)
+
+    def reset_stats(self):
+        self.stats = {'requests': 0, 'statuses': Counter(), 'max_in_flight': 0, 'violations': 0}
+
+    def reset(self, drain_timeout=5.0):
+        """
+        Новый сценарий: статистика, окно частоты и блокировка по Retry-After с нуля.
+        Иначе новый клиент застает 429 предыдущего и получает нарушения, о которых не мог знать.
+        Сначала дожидается ответов на запросы прошлого сценария (например, отмененные клиентом).
+        """
+        deadline = time.monotonic() + drain_timeout
+        while self._in_flight and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with self._lock:
+            self._recent.clear()
+            self._blocked_until = 0.0
+            self.reset_stats()
+
+    def _admit(self):
+        """Статус ответа и Retry-After (или None) для нового запроса."""
+        now = time.monotonic()
+        with self._lock:
+            self.stats['requests'] += 1
+            if now < self._blocked_until:
+                self.stats['violations'] += 1
+                return 429, self._blocked_until - now
+            if self.max_rate is not None:
+                while self._recent and now - self._recent[0] > 1.0:
+                    self._recent.popleft()
+                if len(self._recent) >= self.max_rate:
+                    self._blocked_until = now + self.retry_after
+                    return 429, self.retry_after
+                self._recent.append(now)
+            if self.fail_rate and self._rng.random() < self.fail_rate:
+                return 503, None
+            self._in_flight += 1
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self._in_flight)
+            return 200, None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, retry_after = stub._admit()
+                body = b''
+                if status == 200:
+                    try:
+                        time.sleep(stub.delay)
+                        path = urlsplit(self.path)
+                        url = f"{stub.ORIGIN}{path.path}?{path.query}" if path.query else stub.ORIGIN + path.path
+                        response = stub.transport.get(stub._routes.get(stub._route(url), url))
+                        status, body = response.status_code, response.text.encode('utf-8')
+                    finally:
+                        with stub._lock:
+                            stub._in_flight -= 1
+                with stub._lock:
+                    stub.stats['statuses'][status] += 1
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if retry_after is not None:
+                    # Целые секунды вверх, как у большинства серверов
+                    self.send_header('Retry-After', str(int(retry_after + 0.999)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+# ==========================================
+# ПЕРЕСБОРКА СТРАНИЦ ИЗ БАЗЫ
+# ==========================================
+
+RESULT_TEMPLATE = """<li class="arxiv-result">
+  <div class="is-marginless">
+    <p class="list-title is-inline-block"><a href="https://arxiv.org/abs/{arxiv_id}">arXiv:{arxiv_id}</a>
+      <span>&nbsp;[<a href="https://arxiv.org/pdf/{arxiv_id}">pdf</a>, <a href="{article_url}">other</a>]&nbsp;</span>
+    </p>
+    <div class="tags is-inline-block">
+      <span class="tag is-small is-link tooltip is-tooltip-top" data-tooltip="{category_name}">{category}</span>
+    </div>
+  </div>
+  <p class="title is-5 mathjax">
+      {title}
+  </p>
+  <p class="authors">
+    <span class="has-text-black-bis has-text-weight-semibold">Authors:</span>
+    {authors}
+  </p>
+  <p class="abstract mathjax">
+    <span class="has-text-black-bis has-text-weight-semibold">Abstract</span>:
+    <span class="abstract-short has-text-grey-dark mathjax" id="{arxiv_id}v1-abstract-short" style="display: inline;">
+      {abstract_short}
+      <a class="is-size-7" style="white-space: nowrap;">&#9661; More</a>
+    </span>
+    <span class="abstract-full has-text-grey-dark mathjax" id="{arxiv_id}v1-abstract-full" style="display: none;">
+      {abstract}
+      <a class="is-size-7" style="white-space: nowrap;">&#9651; Less</a>
+    </span>
+  </p>
+  <p class="is-size-7"><span class="has-text-black-bis has-text-weight-semibold">Submitted</span> {submitted};
+    <span class="has-text-black-bis has-text-weight-semibold">originally announced</span> {submitted}.
+  </p>
+</li>
+"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <title>Search | arXiv e-print repository</title>
+  <link rel="stylesheet" href="https://static.arxiv.org/static/search/0.5.6/css/arxivstyle.css" />
+</head>
+<body>
+  <header><a href="https://arxiv.org/">arXiv</a></header>
+  <main class="container">
+    <div class="level is-marginless">
+      <h1 class="title is-clearfix">Showing 1&ndash;{count} of {count} results for all: <span class="mathjax">{query}</span></h1>
+    </div>
+    <ol class="breathe-horizontal" start="1">
+{results}
+    </ol>
+  </main>
+  <footer><p>About arXiv</p></footer>
+</body>
+</html>
+"""
+
+CATEGORIES = {
+    "Информатика и компьютерные науки": ("cs.LG", "Machine Learning"),
+    "Математика": ("math.OC", "Optimization and Control"),
+    "Физика": ("cond-mat.mes-hall", "Mesoscale and Nanoscale Physics"),
+    "Other": ("physics.gen-ph", "General Physics"),
+}
+ABSTRACT_SENTENCES = [
+    "We study {topic} and propose a new approach based on recent results.",
+    "Our analysis shows that the proposed method improves on existing algorithms.",
+    "Numerical experiments confirm the theoretical predictions.",
+    "The results are relevant for applications in physics, mathematics and computer science.",
+    "We also discuss the limitations of the model and directions for future work.",
+]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August",
+          "September", "October", "November", "December"]
+
+
+def render_result(article, authors, rng):
+    url = article['article_url'] or ''
+    arxiv_id = url.rsplit('/format/', 1)[-1] if '/format/' in url else f"{rng.randint(1000, 2599)}.{rng.randint(1, 99999):05d}"
+    category, category_name = CATEGORIES.get(article['article_direction'], CATEGORIES['Other'])
+    abstract = " ".join(s.format(topic=article['title'].lower()) for s in ABSTRACT_SENTENCES)
+    author_links = ",\n    ".join(
+        f'<a href="/search/?searchtype=author&amp;query={html.escape(name.replace(" ", "+"))}">{html.escape(name)}</a>'
+        for name in authors
+    )
+    return RESULT_TEMPLATE.format(
+        arxiv_id=html.escape(arxiv_id), article_url=html.escape(url), category=category,
+        category_name=category_name, title=html.escape(article['title']), authors=author_links,
+        abstract_short=html.escape(abstract[:120]) + "&hellip;", abstract=html.escape(abstract),
+        submitted=f"{rng.randint(1, 28)} {rng.choice(MONTHS)}, {rng.randint(2000, 2025)}",
+    )
+
+
+def rebuild_from_database(db_file, directory=FIXTURES_DIR, queries=12, page_size=50, seed=42):
+    """
+    Собирает страницы поиска в разметке arXiv из уже скачанных статей базы:
+    по странице на самых публикуемых авторов (их статьи первыми, остальное -
+    другие статьи базы до page_size результатов).
+    """
+    from arxiv_parser import ArxivorgArticleParser
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    articles = {row['id']: row for row in conn.execute('SELECT * FROM articles ORDER BY id')}
+    authors = {}
+    for row in conn.execute('SELECT name, article_id FROM authors ORDER BY id'):
+        authors.setdefault(row['article_id'], []).append(row['name'])
+    top_authors = [row[0] for row in conn.execute(
+        'SELECT name FROM authors GROUP BY name ORDER BY COUNT(*) DESC, name LIMIT ?', (queries,))]
+    conn.close()
+
+    for name in top_authors:
+        own = [a for a in articles if name in authors.get(a, [])]
+        others = rng.sample([a for a in articles if a not in own], max(0, page_size - len(own)))
+        results = "".join(render_result(articles[a], authors.get(a, []), rng) for a in own + others)
+        page = PAGE_TEMPLATE.format(count=len(own) + len(others), query=html.escape(name), results=results)
+        url = f"{ArxivorgArticleParser.SEARCH_URL}{name.replace(' ', '+')}"
+        save_page(directory, url, page)
+        print(f"[FIXTURES] {name}: {len(own) + len(others)} результатов -> {fixture_filename(url)}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'record':
+        from arxiv_parser import ArxivorgArticleParser
+        parser = ArxivorgArticleParser(transport=RecordingTransport())
+        for target in sys.argv[2:]:
+            parser.parse(target)
+    elif command == 'rebuild':
+        rebuild_from_database(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'science_articles.db'))
+    elif command == 'serve':
+        import argparse
+        arg_parser = argparse.ArgumentParser(prog='arxiv_replay.py serve', description="Локальный arXiv из fixtures")
+        arg_parser.add_argument('--port', type=int, default=8765)
+        arg_parser.add_argument('--delay', type=float, default=0.0, help="задержка ответа, с")
+        arg_parser.add_argument('--max-rate', type=float, default=None, help="запросов в секунду до 429")
+        arg_parser.add_argument('--retry-after', type=float, default=1.0)
+        arg_parser.add_argument('--fail-rate', type=float, default=0.0, help="доля ответов 503")
+        args = arg_parser.parse_args(sys.argv[2:])
+        stub = StubServer(delay=args.delay, max_rate=args.max_rate, retry_after=args.retry_after,
+                          fail_rate=args.fail_rate, port=args.port)
+        print(f"[FIXTURES] {stub.base_url} (SEARCH_URL: {stub.search_url})")
+        try:
+            stub.httpd.serve_forever()
+        except KeyboardInterrupt:
+            print(f"[FIXTURES] {stub.stats}")
+    else:
+        print("Usage: python arxiv_replay.py record <query>... | rebuild | serve [--port N --delay S ...]")
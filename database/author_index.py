@@ -0,0 +1,186 @@
+"""
+Индекс идентичности авторов.
+
+arXiv и наша база пишут одного человека по-разному: "A. Khokhlov",
+"Alexei Khokhlov", "Хохлов Алексей", "Aleksey Khokhlov". Здесь имена
+приводятся к нормализованному ключу (транслитерация кириллицы в латиницу,
+свертка вариантов написания), а инициалы склеиваются с полным именем,
+если в блоке "фамилия + первая буква имени" оно единственное.
+"""
+import re
+from collections import defaultdict, Counter
+
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+}
+
+# Свертка латинских вариантов одной и той же транслитерации:
+# Alexei / Aleksey / Алексей -> aleksei, Yuri / Iurii / Юрий -> iuri
+SPELLING_FOLDS = [
+    ('x', 'ks'),
+    ('kh', 'h'),
+    ('w', 'v'),
+    ('j', 'i'),
+    ('y', 'i'),
+]
+
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii'}
+
+# Окончания отчеств (после свертки): "Иванов Иван Иванович" - фамилия первая
+PATRONYMIC_ENDINGS = ('ovich', 'evich', 'ich', 'ovna', 'evna', 'ichna', 'inichna')
+
+_TRANSLATION = str.maketrans(CYRILLIC_TO_LATIN)
+_TOKEN_RE = re.compile(r"([^\W\d_]+)(\.?)")
+_REPEATS_RE = re.compile(r"(.)\1+")
+
+
+def transliterate(text: str) -> str:
+    """Кириллица -> латиница (для остальных символов - без изменений)."""
+    return text.lower().translate(_TRANSLATION)
+
+
+def fold_token(token: str) -> str:
+    """Сворачивает варианты написания одного слова имени."""
+    for src, dst in SPELLING_FOLDS:
+        token = token.replace(src, dst)
+    return _REPEATS_RE.sub(r"\1", token)
+
+
+def name_tokens(name: str) -> list[str]:
+    """Нормализованные слова имени: "Петров П.П." -> ['petrov', 'p', 'p']."""
+    tokens = []
+    for word, dot in _TOKEN_RE.findall(transliterate(name).replace("'", "")):
+        if word in NAME_SUFFIXES:
+            continue
+        # "Yu." / "Ю." - тоже инициал, оставляем одну букву
+        if dot and len(word) <= 2:
+            word = word[0]
+        tokens.append(fold_token(word))
+    return tokens
+
+
+def parse_name(name: str, surname_first: bool = False):
+    """
+    Разбирает имя на (фамилия, имя или инициал).
+
+    Если полное слово в имени одно, это фамилия, а остальное - инициалы
+    ("A. Khokhlov", "Петров П.П."). Иначе фамилией считается последнее полное
+    слово (формат arXiv), либо первое при surname_first=True ("Фамилия Имя")
+    или при наличии отчества ("Иванов Иван Иванович").
+    """
+    tokens = name_tokens(name)
+    full = [t for t in tokens if len(t) > 1]
+    if not full:
+        return None
+    if len(full) == 1:
+        surname = full[0]
+        rest = [t for t in tokens if t != surname]
+        given = rest[0][0] if rest else ''
+    elif surname_first or (len(full) == 3 and full[2].endswith(PATRONYMIC_ENDINGS)):
+        surname, given = full[0], full[1]
+    else:
+        surname, given = full[-1], full[0]
+    return surname, given
+
+
+def block_key(surname: str, given: str) -> str:
+    """Ключ блока: фамилия + первая буква имени."""
+    return f"{surname} {given[:1]}".strip()
+
+
+def identity_key(surname: str, given: str) -> str:
+    """Ключ личности: фамилия + полное имя (или инициал, если имени нет)."""
+    return f"{surname} {given}".strip()
+
+
+def candidate_keys(name: str, surname_first: bool = False) -> list[str]:
+    """
+    Возможные ключи для имени без учета склейки инициалов.
+    Для двух полных слов порядок "Имя Фамилия" / "Фамилия Имя" не угадать - отдаем оба.
+    """
+    parts = parse_name(name, surname_first)
+    if parts is None:
+        return [transliterate(name).strip()]
+    keys = [identity_key(*parts)]
+    if len(parts[1]) > 1:
+        keys.append(identity_key(parts[1], parts[0]))
+    return keys
+
+
+class AuthorIndex:
+    """
+    Словарь "написание имени -> ключ автора" с поиском за O(1).
+
+    Имена с инициалами ("A. Khokhlov") привязываются к полному имени
+    ("Alexei Khokhlov"), только если в блоке оно единственное - иначе
+    однозначно сказать, о ком речь, нельзя, и инициалы остаются отдельным ключом.
+    """
+
+    def __init__(self):
+        self.aliases = {}                      # написание -> ключ автора
+        self.blocks = {}                       # ключ блока -> кортеж полных ключей в нем
+        self.display_names = {}                # ключ автора -> самое частое написание
+        self.keys = set()                      # все известные ключи авторов
+
+    @classmethod
+    def build(cls, names, surname_first=False):
+        index = cls()
+        parsed = {}
+        blocks = defaultdict(set)
+        for name in names:
+            if name in parsed:
+                continue
+            parsed[name] = parse_name(name, surname_first)
+            parts = parsed[name]
+            if parts and len(parts[1]) > 1:
+                blocks[block_key(*parts)].add(identity_key(*parts))
+        # Почти во всех блоках один ключ: кортеж в разы меньше множества
+        index.blocks = {block: tuple(keys) for block, keys in blocks.items()}
+
+        for name, parts in parsed.items():
+            index.aliases[name] = index._key_for_parts(name, parts)
+            index.keys.add(index.aliases[name])
+
+        # Частоты написаний нужны только здесь: храним одно написание на ключ
+        variants = defaultdict(Counter)
+        for name in names:
+            variants[index.aliases[name]][name] += 1
+        for key, counts in variants.items():
+            # При равенстве частот предпочитаем более полное написание
+            index.display_names[key] = max(counts.items(), key=lambda item: (item[1], len(item[0])))[0]
+        return index
+
+    def _key_for_parts(self, name, parts):
+        if parts is None:
+            return transliterate(name).strip()
+        if len(parts[1]) > 1:
+            return identity_key(*parts)
+        full_keys = self.blocks.get(block_key(*parts), ())
+        if len(full_keys) == 1:
+            return full_keys[0]
+        return block_key(*parts)
+
+    def key(self, name, surname_first=False):
+        """Ключ автора для произвольного написания (в том числе нового)."""
+        if name in self.aliases:
+            return self.aliases[name]
+        parts = parse_name(name, surname_first)
+        key = self._key_for_parts(name, parts)
+        if key not in self.keys:
+            for candidate in candidate_keys(name, surname_first)[1:]:
+                if candidate in self.keys:
+                    return candidate
+        return key
+
+    def resolve(self, name, surname_first=False):
+        """Ключ известного автора или None."""
+        key = self.key(name, surname_first)
+        return key if key in self.keys else None
+
+    def display_name(self, key):
+        """Самое частое написание имени автора."""
+        return self.display_names.get(key, key)
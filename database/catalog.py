@@ -0,0 +1,118 @@
+"""
+Каталог для API: статьи и пользователи строками Core-запросов, без ORM-объектов.
+
+Строки читаются пачками по первичному ключу (WHERE id > последний LIMIT n),
+связанные списки (авторы, статьи и лайки пользователя) - одним IN-запросом
+на пачку. Память ограничена размером пачки при любом размере каталога,
+а генераторы можно сразу отдавать в потоковый ответ (serialization.py).
+
+Выгрузка (/api/export/...) - плоские строки одним запросом с курсором на
+стороне сервера (stream_results): в PostgreSQL строки приходят порциями.
+"""
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from database import Article, Author, User, likes_table, user_articles
+
+articles = Article.__table__
+authors = Author.__table__
+users = User.__table__
+
+ARTICLE_COLUMNS = (articles.c.id, articles.c.title, articles.c.article_direction, articles.c.citations,
+                   articles.c.like_count, articles.c.article_url)
+USER_COLUMNS = (users.c.id, users.c.email, users.c.first_name, users.c.last_name, users.c.role,
+                users.c.academic_status, users.c.city, users.c.age, users.c.area)
+
+
+def _grouped(conn, key_column, value_column, keys, order_by=None):
+    """{ключ: [значения]} для ключей keys одним запросом."""
+    groups = defaultdict(list)
+    order_by = value_column if order_by is None else order_by
+    rows = conn.execute(select(key_column, value_column).where(key_column.in_(keys)).order_by(key_column, order_by))
+    for key, value in rows:
+        groups[key].append(value)
+    return groups
+
+
+def _article_dicts(conn, rows):
+    # Авторы - в порядке добавления (по id строки авторства)
+    names = _grouped(conn, authors.c.article_id, authors.c.name, [row[0] for row in rows], order_by=authors.c.id)
+    return [
+        {'id': article_id, 'title': title, 'area': direction, 'citations': citations or 0,
+         'likes': like_count or 0, 'url': url, 'authors': names.get(article_id, [])}
+        for article_id, title, direction, citations, like_count, url in rows
+    ]
+
+
+def _batches(conn, columns, key, batch_size, where=()):
+    last = None
+    while True:
+        query = select(*columns).where(*where).order_by(key).limit(batch_size)
+        if last is not None:
+            query = query.where(key > last)
+        rows = conn.execute(query).all()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def iter_articles(conn, batch_size=1000):
+    """Все статьи в формате /api/articles, по порядку id."""
+    for rows in _batches(conn, ARTICLE_COLUMNS, articles.c.id, batch_size):
+        yield from _article_dicts(conn, rows)
+
+
+def fetch_articles(conn, ids):
+    """Статьи по списку id в том же порядке (несуществующие пропускаются)."""
+    if not ids:
+        return []
+    rows = conn.execute(select(*ARTICLE_COLUMNS).where(articles.c.id.in_(ids))).all()
+    by_id = {article['id']: article for article in _article_dicts(conn, rows)}
+    return [by_id[article_id] for article_id in ids if article_id in by_id]
+
+
+def iter_users(conn, batch_size=1000):
+    """Все пользователи в формате /api/users: id своих статей и лайкнутых."""
+    for rows in _batches(conn, USER_COLUMNS, users.c.id, batch_size):
+        user_ids = [row[0] for row in rows]
+        own = _grouped(conn, user_articles.c.user_id, user_articles.c.article_id, user_ids)
+        liked = _grouped(conn, likes_table.c.user_id, likes_table.c.article_id, user_ids)
+        for user_id, email, first_name, last_name, role, academic_status, city, age, area in rows:
+            yield {
+                'id': user_id, 'email': email, 'firstName': first_name, 'lastName': last_name,
+                'role': role, 'academicStatus': academic_status, 'city': city, 'age': age, 'area': area,
+                'articles': own.get(user_id, []), 'likedArticles': liked.get(user_id, []),
+            }
+
+
+# ==========================================
+# ВЫГРУЗКА
+# ==========================================
+
+EXPORTS = ('articles', 'authors')
+
+
+def export_query(kind, since=None):
+    """Запрос выгрузки kind; since - только статьи, добавленные не раньше этого момента (UTC)."""
+    if kind == 'articles':
+        query = select(articles.c.id, articles.c.title, articles.c.article_direction.label('area'),
+                       articles.c.citations, articles.c.like_count.label('likes'),
+                       articles.c.article_url.label('url'), articles.c.created_at).order_by(articles.c.id)
+    elif kind == 'authors':
+        query = select(authors.c.id, authors.c.article_id, authors.c.name).order_by(authors.c.id)
+        if since is not None:
+            query = query.join(articles, articles.c.id == authors.c.article_id)
+    else:
+        raise ValueError(f"Неизвестная выгрузка: {kind} (доступны: {', '.join(EXPORTS)})")
+    if since is not None:
+        query = query.where(articles.c.created_at >= since)
+    return query
+
+
+def iter_export(conn, query, batch_size=1000):
+    """Строки запроса (кортежи) через курсор на стороне сервера."""
+    result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+    for row in result:
+        yield tuple(row)
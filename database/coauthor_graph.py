@@ -0,0 +1,51 @@
+"""
+Ребра графа соавторства: пары написаний имен (author_a < author_b) и число общих статей.
+
+Таблица coauthor_edges (database.py) ведется при сохранении статей: к парам
+авторов каждой новой статьи прибавляется 1 (storage.bulk_upsert_add). Обучение
+читает ее как есть (ScienceRecommender.build_coauthors_graph) - без
+самосоединения authors, время не зависит от числа авторств.
+
+Порядок в паре - сравнение строк Python (по кодовым точкам), а не сортировка
+СУБД: с сортировкой по правилам PostgreSQL одна пара могла бы лечь двумя строками.
+"""
+from collections import Counter
+from itertools import combinations
+
+import pandas as pd
+from sqlalchemy import text
+
+from storage import bulk_insert
+
+COLUMNS = ['author_a', 'author_b', 'articles']
+
+
+def count_pairs(author_lists):
+    """Counter {(author_a, author_b): число статей} по спискам авторов статей."""
+    counts = Counter()
+    for names in author_lists:
+        counts.update(combinations(sorted({name for name in names if name}), 2))
+    return counts
+
+
+def edge_rows(counts):
+    return [{'author_a': a, 'author_b': b, 'articles': n} for (a, b), n in counts.items()]
+
+
+def coauthor_edges(authors):
+    """То же, что count_pairs, для таблицы authors (колонки article_id, name) - DataFrame ребер."""
+    pairs = authors[['article_id', 'name']].dropna().drop_duplicates()
+    pairs = pairs[pairs['name'] != '']
+    joined = pairs.merge(pairs, on='article_id')
+    joined = joined[joined['name_x'] < joined['name_y']]
+    edges = joined.groupby(['name_x', 'name_y'], sort=False).size().reset_index(name='articles')
+    return edges.rename(columns={'name_x': 'author_a', 'name_y': 'author_b'})[COLUMNS]
+
+
+def rebuild_edges(conn, table):
+    """Полный пересчет таблицы ребер по authors (новая таблица, слияние дублей статей)."""
+    edges = coauthor_edges(pd.read_sql(text("SELECT article_id, name FROM authors"), conn))
+    conn.execute(table.delete())
+    bulk_insert(conn, table, edges.to_dict('records'), chunk_size=50_000)
+    print(f"[DB] Граф соавторства пересчитан: {len(edges)} пар")
+    return len(edges)
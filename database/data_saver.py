@@ -1,13 +1,18 @@
+import asyncio
 import os
 import sys
-from typing import List
+from collections import deque
+from typing import List, Optional
 
 # Добавляем путь для импорта модулей
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
     from database import ArticleDTO, save_list_of_articles
-    from arxiv_parser import ParsedArticleDTO, ArxivorgArticleParser
+    from arxiv_parser import ParsedArticleDTO, ArxivorgArticleParser, normalize_query
+    from parse_pool import ParsePool
+    from arxiv_async import AsyncArxivClient, aiohttp
+    from single_flight import SingleFlight
 except ImportError as e:
     print(f"Import error: {e}")
     print("Make sure database.py and arxiv_parser.py are in the same directory")
@@ -17,8 +22,15 @@ except ImportError as e:
 class DataSaver:
     """Класс для сохранения спарсенных данных в базу данных."""
 
-    def __init__(self):
+    def __init__(self, workers: Optional[int] = None, client_options: Optional[dict] = None):
         self.parser = ArxivorgArticleParser()
+        # Процессы разбора страниц в parse_multiple_targets (None - PARSER_WORKERS, см. parse_pool.py)
+        self.workers = workers
+        # Параллельная загрузка через AsyncArxivClient (нужен aiohttp); параметры - его аргументы
+        self.async_fetch = aiohttp is not None
+        self.client_options = client_options or {}
+        # Повторный save_parsed_data с той же целью в течение ARXIV_MEMO_TTL секунд не ходит в сеть
+        self.requests = SingleFlight(ttl=float(os.environ.get('ARXIV_MEMO_TTL', 600)), name='arxiv')
 
     def convert_to_db_dto(self, parsed_article: ParsedArticleDTO) -> ArticleDTO:
         """Конвертирует ParsedArticleDTO в ArticleDTO для базы данных."""
@@ -36,8 +48,11 @@ class DataSaver:
         print(f"Starting parsing and saving for: {target_name}")
 
         # Парсим данные
-        parsed_articles = self.parser.parse(target_name)
+        parsed_articles = self.requests.do(normalize_query(target_name), lambda: self.parser.parse(target_name))
+        return self.save_articles(parsed_articles)
 
+    def save_articles(self, parsed_articles: List[ParsedArticleDTO]) -> dict:
+        """Сохраняет уже спарсенные статьи в базу данных."""
         if not parsed_articles:
             return {
                 "status": "error",
@@ -66,24 +81,89 @@ class DataSaver:
         }
 
     def parse_multiple_targets(self, target_names: List[str]) -> dict:
-        """Парсит и сохраняет данные для нескольких целей."""
+        """
+        Парсит и сохраняет данные для нескольких целей.
+
+        Страницы качаются асинхронным клиентом (arxiv_async.py: несколько
+        запросов сразу, ограничение частоты, повторы) или, без aiohttp, по очереди,
+        а разбираются в пуле процессов (parse_pool.py): загрузка не ждет разбора.
+        Разобранные страницы сохраняются в порядке target_names.
+        Повторы (с точностью до регистра и пробелов) загружаются один раз
+        и получают результат первой такой цели.
+        """
+        unique = {}
+        for target in target_names:
+            unique.setdefault(normalize_query(target), target)
+        if len(unique) < len(target_names):
+            print(f"Skipping {len(target_names) - len(unique)} duplicate targets")
+
+        targets = list(unique.values())
+        results = asyncio.run(self._crawl(targets)) if self.async_fetch else self._parse_targets(targets)
+        return {target: results[unique[normalize_query(target)]] for target in target_names}
+
+    def _parse_targets(self, target_names: List[str]) -> dict:
         results = {}
+        pending = deque()  # (цель, Future разбора или None, если страницу не получили)
 
-        for target in target_names:
-            print(f"\n{'=' * 50}")
-            print(f"Processing: {target}")
-            print(f"{'=' * 50}")
+        with ParsePool(self.workers) as pool:
+            for target in target_names:
+                self._print_header(target)
+                html_content = self.parser.fetch_page(target)
+                pending.append((target, pool.submit(html_content) if html_content else None))
+                while pending and (pending[0][1] is None or pending[0][1].done()):
+                    self._finish_target(results, *pending.popleft())
 
-            result = self.save_parsed_data(target)
-            results[target] = result
+            while pending:
+                self._finish_target(results, *pending.popleft())
 
-            if result["status"] == "success":
-                print(f"✓ Successfully processed {target}: {result['articles_count']} articles")
-            else:
-                print(f"✗ Failed to process {target}: {result['message']}")
+        return results
 
+    async def _crawl(self, target_names: List[str]) -> dict:
+        results = {}
+        with ParsePool(self.workers) as pool:
+            async with AsyncArxivClient(parser=self.parser, **self.client_options) as client:
+                async def fetch_and_parse(target):
+                    html_content = await client.fetch_page(target)
+                    if html_content:
+                        return await asyncio.wrap_future(pool.submit(html_content))
+
+                # Все загрузки ставятся сразу (одновременно идут не больше ARXIV_CONCURRENCY)
+                tasks = [asyncio.create_task(fetch_and_parse(target)) for target in target_names]
+                try:
+                    for target, task in zip(target_names, tasks):
+                        await asyncio.wait([task])
+                        self._print_header(target)
+                        self._finish_target(results, target, task)
+                finally:
+                    for task in tasks:
+                        task.cancel()
         return results
 
+    @staticmethod
+    def _print_header(target: str) -> None:
+        print(f"\n{'=' * 50}")
+        print(f"Processing: {target}")
+        print(f"{'=' * 50}")
+
+    def _finish_target(self, results: dict, target: str, future) -> None:
+        """Сохраняет результат разбора (Future/Task с (кортежи, секунды) или None)."""
+        parsed_articles = []
+        if future is not None:
+            try:
+                page = future.result()
+                if page is not None:
+                    parsed_articles = self.parser.from_rows(*page)
+            except Exception as e:
+                print(f"Error parsing page for {target}: {e}")
+
+        result = self.save_articles(parsed_articles)
+        results[target] = result
+
+        if result["status"] == "success":
+            print(f"✓ Successfully processed {target}: {result['articles_count']} articles")
+        else:
+            print(f"✗ Failed to process {target}: {result['message']}")
+
 
 # Пример использования
 if __name__ == "__main__":
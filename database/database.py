@@ -1,23 +1,64 @@
 # database.py
 import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, text
+from scipy import sparse
+from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, Index, Table, inspect, or_, text
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker
-from collections import defaultdict
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from author_index import AuthorIndex, parse_name, block_key, identity_key, candidate_keys, transliterate
+from ann import reduce_dimensions
+from paper_key import paper_key
+from coauthor_graph import count_pairs, edge_rows, rebuild_edges
+from graph_rank import personalized_pagerank, walk_matrix
+from storage import (
+    bulk_insert, bulk_upsert_add, create_storage_engine, database_path, database_url, insert_ignore, upgrade_schema,
+)
+from metrics import MODEL_TRAIN_SECONDS, MODEL_SCORE_SECONDS
 
 # ==========================================
 # 1. НАСТРОЙКА БАЗЫ ДАННЫХ
 # ==========================================
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-db_path = os.path.join(BASE_DIR, 'science_articles.db')
+# SCIENCE_DB_PATH позволяет подменить файл базы (бенчмарки, отдельные стенды)
+db_path = database_path(os.path.join(BASE_DIR, 'science_articles.db'))
 
-# Создаем движок SQLite
-engine = create_engine(f'sqlite:///{db_path}', echo=False)
+# Движок: DATABASE_URL (PostgreSQL) или файл SQLite с WAL и пулом соединений (см. storage.py)
+engine = create_storage_engine(database_url(db_path))
 Base = declarative_base()
 
+# Общая схема для массовой загрузки (main.py, data_saver.py) и веб-приложения (app.py):
+# статьи и авторы (по строке на авторство) + пользователи, их статьи и лайки.
+
+
+def utc_now():
+    """Текущее время UTC без tzinfo: колонки DateTime хранят наивное UTC."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Один лайк на пару (пользователь, статья): составной первичный ключ,
+# отдельный индекс - для подсчета лайков статьи. created_at - для рейтинга trending
+# (у лайков, поставленных до появления колонки, он пустой)
+likes_table = Table('likes', Base.metadata,
+    Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+    Column('article_id', Integer, ForeignKey('articles.id'), primary_key=True),
+    Column('created_at', DateTime, default=utc_now),
+    Index('ix_likes_article_id', 'article_id')
+)
+
+# Статьи пользователя (найденные парсером при регистрации)
+user_articles = Table('authors_articles', Base.metadata,
+    Column('user_id', Integer, ForeignKey('users.id')),
+    Column('article_id', Integer, ForeignKey('articles.id')),
+    Index('ix_authors_articles_user_id', 'user_id')
+)
+
 
 class Article(Base):
     __tablename__ = 'articles'
@@ -28,22 +69,217 @@ class Article(Base):
     title = Column(String)
     article_url = Column(String)
     article_direction = Column(String)  # Например: 'IT', 'Biology', 'Physics'
+    citations = Column(Integer, default=0)
+    like_count = Column(Integer, default=0)  # Денормализованный счетчик лайков (см. likes.py)
+    created_at = Column(DateTime, default=utc_now, index=True)  # Для инкрементальной выгрузки (since=)
+    paper_key = Column(String)  # Канонический ключ статьи: 'arxiv:2401.01234' (см. paper_key.py)
+
+    __table_args__ = (
+        # Топ по лайкам (/api/articles/top) - ORDER BY like_count DESC LIMIT k по индексу
+        Index('ix_articles_like_count', 'like_count'),
+        # Дубли статей (версии, abs/pdf, http/https одной статьи); NULL - ключа нет, не уникален
+        Index('ux_articles_paper_key', 'paper_key', unique=True),
+    )
 
     authors = relationship("Author", back_populates="article", cascade="all, delete-orphan")
+    users = relationship("User", secondary=user_articles, back_populates="articles")
 
 
 class Author(Base):
     __tablename__ = 'authors'
 
     id = Column(Integer, primary_key=True)
-    name = Column(String)  # ФИО автора
-    article_id = Column(Integer, ForeignKey('articles.id'))
+    name = Column(String, index=True)  # ФИО автора
+    article_id = Column(Integer, ForeignKey('articles.id'), index=True)
 
     article = relationship("Article", back_populates="authors")
 
 
+class AuthorAlias(Base):
+    """Написание имени автора -> нормализованный ключ личности (см. author_index.py)."""
+    __tablename__ = 'author_aliases'
+
+    name = Column(String, primary_key=True)  # Имя как в authors.name
+    author_key = Column(String, index=True)  # Ключ личности: 'hohlov aleksei'
+    block_key = Column(String, index=True)   # Фамилия + инициал: 'hohlov a'
+
+
+class CoauthorEdge(Base):
+    """Пара соавторов (написания имен, author_a < author_b) и число общих статей (см. coauthor_graph.py)."""
+    __tablename__ = 'coauthor_edges'
+
+    author_a = Column(String, primary_key=True)
+    author_b = Column(String, primary_key=True)
+    articles = Column(Integer, default=0)
+
+
+class User(Base):
+    __tablename__ = 'users'
+
+    id = Column(Integer, primary_key=True)
+    email = Column(String, unique=True)
+    password = Column(String)
+    first_name = Column(String)
+    last_name = Column(String)
+    role = Column(String, default="user")
+    academic_status = Column(String)
+    city = Column(String)
+    age = Column(Integer)
+    area = Column(String)
+
+    articles = relationship("Article", secondary=user_articles, back_populates="users")
+    liked_articles = relationship("Article", secondary=likes_table)
+
+
+def convert_legacy_articles(db_engine):
+    """
+    Статьи в старом формате app.py (url, area, authors_text) -> общая схема:
+    article_url, article_direction и строки в authors.
+    """
+    columns = {column['name'] for column in inspect(db_engine).get_columns('articles')}
+    if not {'url', 'area', 'authors_text'} <= columns:
+        return 0
+    with db_engine.begin() as conn:
+        legacy = conn.execute(text(
+            "SELECT id, url, area, authors_text FROM articles WHERE article_url IS NULL AND url IS NOT NULL"
+        )).all()
+        if not legacy:
+            return 0
+        conn.execute(text(
+            "UPDATE articles SET article_url = url, article_direction = COALESCE(article_direction, area), "
+            "citations = COALESCE(citations, 0) WHERE article_url IS NULL AND url IS NOT NULL"
+        ))
+        bulk_insert(conn, Author.__table__, [
+            {'name': name, 'article_id': row.id}
+            for row in legacy for name in (row.authors_text or '').split(', ') if name
+        ])
+    print(f"[DB] Статей старого формата переведено в общую схему: {len(legacy)}")
+    return len(legacy)
+
+
+def upgrade_likes_table(db_engine):
+    """Таблица likes без первичного ключа -> пересоздание с ключом (дубли лайков отбрасываются)."""
+    inspector = inspect(db_engine)
+    if 'likes' not in inspector.get_table_names() or inspector.get_pk_constraint('likes')['constrained_columns']:
+        return False
+    with db_engine.begin() as conn:
+        conn.execute(text("ALTER TABLE likes RENAME TO likes_old"))
+        likes_table.create(conn)
+        conn.execute(text(
+            "INSERT INTO likes (user_id, article_id) SELECT DISTINCT user_id, article_id FROM likes_old "
+            "WHERE user_id IS NOT NULL AND article_id IS NOT NULL"
+        ))
+        conn.execute(text("DROP TABLE likes_old"))
+    print("[DB] Таблица likes пересоздана с первичным ключом (user_id, article_id)")
+    return True
+
+
+def recount_likes(conn):
+    """Пересчитывает articles.like_count по таблице likes."""
+    conn.execute(text(
+        "UPDATE articles SET like_count = (SELECT COUNT(*) FROM likes WHERE likes.article_id = articles.id)"
+    ))
+
+
+# Перенос связей копии статьи (:dup) на остающуюся (:keep); то, что у :keep уже есть, удаляется
+MERGE_ARTICLE_STATEMENTS = [
+    "UPDATE authors SET article_id = :keep WHERE article_id = :dup AND NOT EXISTS "
+    "(SELECT 1 FROM authors kept WHERE kept.article_id = :keep AND kept.name = authors.name)",
+    "DELETE FROM authors WHERE article_id = :dup",
+    "UPDATE likes SET article_id = :keep WHERE article_id = :dup AND NOT EXISTS "
+    "(SELECT 1 FROM likes kept WHERE kept.article_id = :keep AND kept.user_id = likes.user_id)",
+    "DELETE FROM likes WHERE article_id = :dup",
+    "UPDATE authors_articles SET article_id = :keep WHERE article_id = :dup AND NOT EXISTS "
+    "(SELECT 1 FROM authors_articles kept WHERE kept.article_id = :keep AND kept.user_id = authors_articles.user_id)",
+    "DELETE FROM authors_articles WHERE article_id = :dup",
+    "UPDATE articles SET citations = (SELECT MAX(COALESCE(citations, 0)) FROM articles copies "
+    "WHERE copies.id IN (:keep, :dup)) WHERE id = :keep",
+    "DELETE FROM articles WHERE id = :dup",
+]
+
+
+def compact_articles(db_engine):
+    """
+    Разовое объединение дублей статей по paper_key и заполнение ключа у всех статей.
+    Остается самая ранняя копия (меньший id), к ней переходят авторы, лайки и
+    статьи пользователей, которых у нее еще нет; граф соавторства пересчитывается.
+    Возвращает число удаленных копий.
+    """
+    with db_engine.begin() as conn:
+        keep_by_key = {}
+        merges, updates = [], []
+        for row in conn.execute(text("SELECT id, article_url, title, paper_key FROM articles ORDER BY id")):
+            key = paper_key(row.article_url, row.title)
+            keep = keep_by_key.setdefault(key, row.id) if key else row.id
+            if keep != row.id:
+                merges.append({'dup': row.id, 'keep': keep})
+            elif row.paper_key != key:
+                updates.append({'article_id': row.id, 'key': key})
+
+        if merges:
+            for statement in MERGE_ARTICLE_STATEMENTS:
+                conn.execute(text(statement), merges)
+            conn.execute(text(
+                "UPDATE articles SET like_count = (SELECT COUNT(*) FROM likes WHERE likes.article_id = articles.id) "
+                "WHERE id = :keep"
+            ), [{'keep': keep} for keep in {merge['keep'] for merge in merges}])
+            rebuild_edges(conn, CoauthorEdge.__table__)
+        if updates:
+            # Сначала снимаем старые ключи: иначе новый ключ одной статьи может совпасть со старым у другой
+            conn.execute(text("UPDATE articles SET paper_key = NULL WHERE id = :article_id"), updates)
+            conn.execute(text("UPDATE articles SET paper_key = :key WHERE id = :article_id"), updates)
+    print(f"[DB] Дубли статей: удалено копий {len(merges)}, ключей проставлено {len(updates)}")
+    return len(merges)
+
+
+def upgrade_database(db_engine):
+    """
+    Приведение существующей базы к текущей схеме (python migrate.py upgrade):
+    новые колонки и индексы, первичный ключ likes, статьи старого формата,
+    ключи и дубли статей, граф соавторства, индекс имен авторов, счетчики
+    лайков. Повторный запуск ничего не меняет. При импорте модуля выполняется
+    только create_all: миграции переписывают данные, их запускают явно и один
+    раз (а не каждый процесс приложения).
+    """
+    Base.metadata.create_all(db_engine)
+    # create_all не добавляет индексы и колонки в уже существующие таблицы
+    likes_upgraded = upgrade_likes_table(db_engine)
+    schema_added = upgrade_schema(db_engine, Base.metadata)
+    for index in [*Article.__table__.indexes, *Author.__table__.indexes, *likes_table.indexes, *user_articles.indexes]:
+        index.create(db_engine, checkfirst=True)
+    legacy_converted = convert_legacy_articles(db_engine)
+    compact_articles(db_engine)
+    with db_engine.begin() as conn:
+        # Граф соавторства в существующей базе заполняется один раз по authors, дальше - при сохранении статей
+        edges_missing = (conn.execute(text("SELECT 1 FROM coauthor_edges LIMIT 1")).first() is None
+                         and conn.execute(text("SELECT 1 FROM authors LIMIT 1")).first() is not None)
+        if edges_missing or legacy_converted:
+            rebuild_edges(conn, CoauthorEdge.__table__)
+        # Индекс написаний имен тоже строится один раз, дальше пополняется при сохранении статей
+        aliases_missing = (conn.execute(text("SELECT 1 FROM author_aliases LIMIT 1")).first() is None
+                           and conn.execute(text("SELECT 1 FROM authors LIMIT 1")).first() is not None)
+        if aliases_missing:
+            rebuild_author_aliases(conn)
+        if likes_upgraded or ('articles', 'like_count') in schema_added:
+            recount_likes(conn)
+    print("[DB] Схема базы обновлена")
+
+
+def missing_columns(db_engine):
+    """Колонки модели, которых нет в существующих таблицах: ['articles.paper_key', ...] (только чтение)."""
+    inspector = inspect(db_engine)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{column.name}" for column in table.columns if column.name not in existing)
+    return missing
+
+
 # Создаем таблицы
 Base.metadata.create_all(engine)
+outdated_columns = missing_columns(engine)
+if outdated_columns:
+    print(f"[DB] Схема базы устарела (нет {', '.join(outdated_columns)}): запустите python migrate.py upgrade")
 Session = sessionmaker(bind=engine)
 
 
@@ -51,40 +287,77 @@ Session = sessionmaker(bind=engine)
 # 2. DTO И ФУНКЦИИ РАБОТЫ С ДАННЫМИ
 # ==========================================
 
+@dataclass(frozen=True, slots=True)
 class ArticleDTO:
-    def __init__(self, source_name, source_url, title, authors, article_url, article_direction):
-        self.source_name = source_name
-        self.source_url = source_url
-        self.title = title
-        self.authors = authors  # Список имен ['Иванов', 'Петров']
-        self.article_url = article_url
-        self.article_direction = article_direction
+    # slots: без __dict__ у каждого экземпляра (пачки по тысячам статей)
+    source_name: str
+    source_url: str
+    title: str
+    authors: list  # Список имен ['Иванов', 'Петров']
+    article_url: str
+    article_direction: str
+
+
+def save_articles(session, articles_list):
+    """
+    Записывает новые статьи (дубли по paper_key пропускаются) и их авторов, без commit.
+    Возвращает (статьи в порядке входного списка без повторов, число новых).
+    """
+    # Проверка дублей по ключу статьи: один запрос на всю пачку вместо запроса на статью
+    keys = [paper_key(dto.article_url, dto.title) for dto in articles_list]
+    known = {row[0] for row in session.query(Article.paper_key).filter(Article.paper_key.in_({key for key in keys if key}))}
+    conn = session.connection()
+    # ON CONFLICT DO NOTHING: ту же статью мог только что записать параллельный запрос
+    # (регистрации с одной фамилией получают один ответ парсера) - тогда id не вернется
+    statement = insert_ignore(conn, Article.__table__, ['paper_key']).returning(Article.__table__.c.id)
+    lookups = []  # paper_key или id (статьи без ключа) - в порядке входного списка
+    new_authors = []
+    author_rows = []
+    for dto, key in zip(articles_list, keys):
+        if key in known:
+            lookups.append(key)
+            continue
+        article_id = conn.execute(statement, {
+            'source_name': dto.source_name,
+            'source_url': dto.source_url,
+            'title': dto.title,
+            'article_url': dto.article_url,
+            'article_direction': dto.article_direction,
+            'citations': 0,
+            'like_count': 0,
+            'paper_key': key,
+        }).scalar()
+        if key:
+            known.add(key)
+        lookups.append(key or article_id)
+        if article_id is None:
+            continue
+        author_rows.extend({'name': author_name, 'article_id': article_id} for author_name in dto.authors)
+        new_authors.append(dto.authors)
+
+    bulk_insert(conn, Author.__table__, author_rows)
+    register_author_aliases(session, [name for dto in articles_list for name in dto.authors])
+    # Граф соавторства: +1 к парам авторов каждой новой статьи (повторы статей пар не меняют)
+    bulk_upsert_add(conn, CoauthorEdge.__table__, edge_rows(count_pairs(new_authors)),
+                    ['author_a', 'author_b'], ['articles'])
+
+    # Статьи перечитываются по ключам: свои и записанные параллельным запросом одинаково
+    by_lookup = {}
+    for article in session.query(Article).filter(or_(
+            Article.paper_key.in_({value for value in lookups if isinstance(value, str)}),
+            Article.id.in_({value for value in lookups if isinstance(value, int)}))):
+        by_lookup[article.paper_key or article.id] = article
+    articles = {}
+    for value in lookups:
+        if value in by_lookup:
+            articles.setdefault(value, by_lookup[value])
+    return list(articles.values()), len(new_authors)
 
 
 def save_list_of_articles(articles_list):
     session = Session()
     try:
-        count = 0
-        for dto in articles_list:
-            # Проверка дублей по URL
-            exists = session.query(Article).filter_by(article_url=dto.article_url).first()
-            if exists:
-                continue
-
-            new_article = Article(
-                source_name=dto.source_name,
-                source_url=dto.source_url,
-                title=dto.title,
-                article_url=dto.article_url,
-                article_direction=dto.article_direction
-            )
-
-            for author_name in dto.authors:
-                new_article.authors.append(Author(name=author_name))
-
-            session.add(new_article)
-            count += 1
-
+        _, count = save_articles(session, articles_list)
         session.commit()
         print(f"[DB] Сохранено новых статей: {count}")
     except Exception as e:
@@ -107,12 +380,103 @@ def get_all_articles():
         session.close()
 
 
+def register_author_aliases(session, names):
+    """Добавляет в author_aliases новые написания имен (инкрементально, по блокам)."""
+    names = set(names)
+    if not names:
+        return
+    known = {row[0] for row in session.query(AuthorAlias.name).filter(AuthorAlias.name.in_(names))}
+    parsed = {name: parse_name(name) for name in sorted(names - known)}
+
+    # Ключи всех затронутых блоков - одним запросом, дальше блоки ведутся в памяти
+    blocks = {block_key(*parts) for parts in parsed.values() if parts is not None}
+    full_keys = {block: set() for block in blocks}
+    stored_initials = set()
+    if blocks:
+        query = session.query(AuthorAlias.block_key, AuthorAlias.author_key).filter(AuthorAlias.block_key.in_(blocks))
+        for block, key in query.distinct():
+            if key == block:
+                stored_initials.add(block)
+            else:
+                full_keys[block].add(key)
+
+    rows = []
+    new_initials = {}
+    for name, parts in parsed.items():
+        if parts is None:
+            key = block = transliterate(name).strip()
+        else:
+            block = block_key(*parts)
+            if len(parts[1]) > 1:
+                key = identity_key(*parts)
+                if not full_keys[block]:
+                    # Первое полное имя в блоке: к нему приклеиваются ранее записанные инициалы
+                    if block in stored_initials:
+                        session.query(AuthorAlias).filter(
+                            AuthorAlias.block_key == block, AuthorAlias.author_key == block
+                        ).update({AuthorAlias.author_key: key}, synchronize_session=False)
+                    for row in new_initials.pop(block, []):
+                        row['author_key'] = key
+                full_keys[block].add(key)
+            else:
+                key = next(iter(full_keys[block])) if len(full_keys[block]) == 1 else block
+        row = {'name': name, 'author_key': key, 'block_key': block}
+        if parts is not None and key == block:
+            new_initials.setdefault(block, []).append(row)
+        rows.append(row)
+    # ON CONFLICT DO NOTHING: те же имена мог только что записать параллельный процесс
+    bulk_insert(session.connection(), AuthorAlias.__table__, rows, conflict_columns=['name'])
+
+
+def rebuild_author_aliases(conn=None):
+    """Полная перестройка таблицы author_aliases по всем авторам в базе (в транзакции conn или в своей)."""
+    if conn is None:
+        with engine.begin() as conn:
+            return rebuild_author_aliases(conn)
+    names = conn.execute(text("SELECT name FROM authors")).scalars().all()
+    index = AuthorIndex.build(names)
+    rows = []
+    for name, key in index.aliases.items():
+        parts = parse_name(name)
+        rows.append({'name': name, 'author_key': key, 'block_key': block_key(*parts) if parts else key})
+    conn.execute(AuthorAlias.__table__.delete())
+    bulk_insert(conn, AuthorAlias.__table__, rows)
+    print(f"[DB] Индекс авторов: {len(index.aliases)} написаний -> {len(index.keys)} авторов")
+    return index
+
+
+def find_author_names(session, author_name):
+    """Все написания имени того же автора (поиск по индексу author_aliases)."""
+    alias = session.get(AuthorAlias, author_name)
+    if alias is not None:
+        keys = [alias.author_key]
+    else:
+        keys = candidate_keys(author_name)
+        parts = parse_name(author_name)
+        if parts and len(parts[1]) <= 1:
+            # Только инициал: берем автора блока, если он там один
+            block_keys = [row[0] for row in session.query(AuthorAlias.author_key).filter(
+                AuthorAlias.block_key == block_key(*parts)).distinct()]
+            if len(block_keys) == 1:
+                keys = block_keys
+    for key in keys:
+        names = [row[0] for row in session.query(AuthorAlias.name).filter(AuthorAlias.author_key == key)]
+        if names:
+            return names
+    return []
+
+
 def get_articles_by_author(author_name):
     """Найти статьи по имени автора"""
     session = Session()
     try:
-        articles = session.query(Article).join(Author).filter(Author.name.ilike(f"%{author_name}%")).all()
-        return articles
+        names = find_author_names(session, author_name)
+        if names:
+            query = session.query(Article).join(Author).filter(Author.name.in_(names))
+        else:
+            # Нет в индексе - ищем по подстроке, как раньше
+            query = session.query(Article).join(Author).filter(Author.name.ilike(f"%{author_name}%"))
+        return query.distinct().all()
     except Exception as e:
         print(f"[DB] Ошибка при поиске статей автора: {e}")
         return []
@@ -137,7 +501,11 @@ def clear_database():
     """Очистить базу данных"""
     session = Session()
     try:
+        session.query(AuthorAlias).delete()
+        session.query(CoauthorEdge).delete()
         session.query(Author).delete()
+        session.execute(likes_table.delete())
+        session.execute(user_articles.delete())
         session.query(Article).delete()
         session.commit()
         print("[DB] База данных очищена")
@@ -158,24 +526,52 @@ class ScienceRecommender:
     Работает напрямую с SQL базой, выгружает данные в Pandas DataFrame.
     """
 
-    def __init__(self, db_engine):
+    # Блуждание с возвратом (graph_rank.py): вероятность возврата и предел итераций
+    GRAPH_RESTART = 0.3
+    GRAPH_MAX_ITER = 10
+
+    def __init__(self, db_engine, embedding_dim=None, ann_backend=None, snapshot_dir=None, graph_weight=None):
         self.engine = db_engine
+        # Каталог снимка snapshot.py: входы обучения читаются из Arrow/Parquet вместо SQL
+        self.snapshot_dir = snapshot_dir
         # TfidfVectorizer превращает текст в числа.
         # max_features=5000 - берем топ 5000 самых важных слов
         self.tfidf_vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
 
         self.tfidf_matrix = None
-        self.cosine_sim_matrix = None
-
-        # Словари для быстрого поиска: Имя <-> Индекс
-        self.name_to_idx = {}
-        self.idx_to_name = {}
 
-        # Метаданные авторов
-        self.authors_metadata = {}
-
-        # Граф соавторства (чтобы не рекомендовать коллег)
-        self.coauthors_graph = defaultdict(set)
+        # Векторизованные структуры для пакетного расчета (заполняются в train)
+        self.coauthors_matrix = None      # разреженная N x N матрица соавторства (граф коллег)
+        self.direction_codes = None       # код направления для каждого индекса (uint8)
+        self.directions = []              # код -> название направления (одна строка на направление)
+
+        # Графовая близость (персонализированный PageRank по соавторству и лайкам) смешивается
+        # с текстовым сходством: (1 - graph_weight) * TF-IDF + graph_weight * граф. По умолчанию 0 -
+        # только текст: смешанная оценка - уже не процент сходства, включается явно (например, 0.3).
+        # Граф переупорядочивает кандидатов, прошедших текстовый порог, а не добавляет новых.
+        self.graph_weight = float(os.environ.get('RECOMMENDER_GRAPH_WEIGHT', 0)) \
+            if graph_weight is None else graph_weight
+        self.like_weight = float(os.environ.get('RECOMMENDER_LIKE_WEIGHT', 0.5))  # лайк относительно соавторства
+        # Бюджет времени графа на один вызов get_recommendations_batch, с (после него - минимум итераций)
+        self.graph_budget = float(os.environ.get('RECOMMENDER_GRAPH_BUDGET', 2.0))
+        self.walk_matrix = None           # P^T для блуждания (CSR float32), только при graph_weight > 0
+
+        # Плотные эмбеддинги: TruncatedSVD (LSA) до embedding_dim измерений,
+        # непрерывная float32 матрица с L2-нормированными строками (n * dim * 4 байта).
+        # None - сходство считается по разреженной TF-IDF матрице.
+        self.embedding_dim = embedding_dim
+        self.embeddings = None
+
+        # Приближенный поиск соседей (ann.LSHIndex и т.п.) над эмбеддингами
+        self.ann_backend = ann_backend
+        if ann_backend is not None and embedding_dim is None:
+            self.embedding_dim = 128
+
+        # Авторы: индекс -> отображаемое имя (список) и ключ автора -> индекс (словарь).
+        # Любое написание имени сводится к ключу индексом идентичности.
+        self.author_names = []
+        self.author_index = AuthorIndex()
+        self.key_to_idx = {}
 
     def load_data(self):
         """Сбор данных: Группируем тексты статей по имени автора."""
@@ -191,58 +587,130 @@ class ScienceRecommender:
         JOIN articles art ON auth.article_id = art.id
         """
 
-        # Читаем SQL сразу в Pandas (быстро)
-        df = pd.read_sql(text(sql_texts), self.engine)
+        # Пользователи веб-приложения: заголовки их статей + выбранная область.
+        # Если пользователь есть и среди авторов, индекс имен склеит его с автором.
+        sql_users = """
+        SELECT
+            u.first_name || ' ' || u.last_name as author_name,
+            art.title || ' ' || art.article_direction as text_content,
+            art.article_direction
+        FROM users u
+        JOIN authors_articles ua ON ua.user_id = u.id
+        JOIN articles art ON ua.article_id = art.id
+        UNION ALL
+        SELECT u.first_name || ' ' || u.last_name, u.area, u.area
+        FROM users u
+        WHERE u.area IS NOT NULL
+        """
+
+        if self.snapshot_dir:
+            from snapshot import training_frame  # pyarrow нужен только для снимков
+            df = training_frame(self.snapshot_dir)
+        else:
+            # Читаем SQL сразу в Pandas (быстро)
+            df = pd.concat([pd.read_sql(text(sql_texts), self.engine), pd.read_sql(text(sql_users), self.engine)],
+                           ignore_index=True)
+        return self.index_authors(df)
+
+    def index_authors(self, df):
+        """
+        Заполняет таблицы авторов по строкам (author_name, text_content, article_direction).
+        Возвращает корпус: склеенные тексты в порядке индексов авторов.
+        """
+        df = df.dropna(subset=['author_name']).fillna({'text_content': ''})
 
         if df.empty:
             print("[ML] База пуста.")
             return []
 
-        # ГРУППИРОВКА: Так как у нас нет таблицы "UniqueAuthor", мы считаем,
-        # что одинаковые имена = один человек. Склеиваем все его статьи в одну строку.
-        grouped = df.groupby('author_name').agg({
-            'text_content': ' '.join,
-            'article_direction': lambda x: x.mode()[0] if not x.mode().empty else "Unknown"
-        }).reset_index()
-
-        corpus = []
-
-        # Заполняем внутренние структуры
-        for idx, row in grouped.iterrows():
-            name = row['author_name']
-            corpus.append(row['text_content'])
-
-            self.name_to_idx[name] = idx
-            self.idx_to_name[idx] = name
-
-            self.authors_metadata[name] = {
-                'direction': row['article_direction']
-            }
-
-        return corpus
+        # ГРУППИРОВКА: разные написания одного человека ("A. Khokhlov", "Alexei Khokhlov")
+        # сводим к одному ключу автора и склеиваем все его статьи в одну строку.
+        self.author_index = AuthorIndex.build(df['author_name'].tolist())
+        df['author_key'] = df['author_name'].map(self.author_index.aliases)
+        texts = df.groupby('author_key')['text_content'].agg(' '.join)
+        keys = texts.index
+
+        # Направление автора - самое частое (при равенстве - первое по алфавиту), без Python-цикла по группам
+        counts = df.groupby(['author_key', 'article_direction']).size().rename('n').reset_index()
+        counts = counts.sort_values(['author_key', 'n', 'article_direction'], ascending=[True, False, True])
+        direction = (counts.drop_duplicates('author_key').set_index('author_key')['article_direction']
+                     .reindex(keys).fillna("Unknown"))
+
+        # Направлений единицы: храним код в uint8 и по одной строке на направление
+        codes, uniques = pd.factorize(direction)
+        self.directions = [sys.intern(str(value)) for value in uniques]
+        self.direction_codes = codes.astype(np.min_scalar_type(max(len(uniques) - 1, 0)))
+
+        self.author_names = [self.author_index.display_name(key) for key in keys]
+        self.key_to_idx = {key: idx for idx, key in enumerate(keys)}
+        return texts.tolist()
+
+    def find_author(self, author_name):
+        """Индекс автора по любому написанию имени или None (поиск за O(1))."""
+        idx = self.key_to_idx.get(self.author_index.resolve(author_name))
+        if idx is None:
+            # Порядок "Фамилия Имя", как в app.py
+            idx = self.key_to_idx.get(self.author_index.resolve(author_name, surname_first=True))
+        return idx
 
     def build_coauthors_graph(self):
         """Строим связи: кто с кем работал в одной статье."""
         print("[ML] Построение графа связей...")
 
-        # Находим авторов, у которых одинаковый article_id
-        sql_graph = """
-        SELECT DISTINCT 
-            a1.name as author_a, 
-            a2.name as author_b
-        FROM authors a1
-        JOIN authors a2 ON a1.article_id = a2.article_id
-        WHERE a1.name != a2.name
-        """
+        # Пары соавторов ведутся при сохранении статей (coauthor_graph.py) - самосоединение authors не нужно
+        sql_graph = "SELECT author_a, author_b FROM coauthor_edges"
 
-        edges = pd.read_sql(text(sql_graph), self.engine)
+        # Лайки: пользователь (по имени, как в load_data) - авторы понравившейся статьи
+        sql_likes = """
+        SELECT u.first_name || ' ' || u.last_name as author_a, auth.name as author_b
+        FROM likes l
+        JOIN users u ON u.id = l.user_id
+        JOIN authors auth ON auth.article_id = l.article_id
+        """
 
-        for _, row in edges.iterrows():
-            self.coauthors_graph[row['author_a']].add(row['author_b'])
-            self.coauthors_graph[row['author_b']].add(row['author_a'])  # Двунаправленный граф
+        if self.snapshot_dir:
+            from snapshot import like_edges, read_table
+            edges = read_table(self.snapshot_dir, 'coauthor_edges', ['author_a', 'author_b']).to_pandas()
+            likes = like_edges(self.snapshot_dir) if self.graph_weight > 0 else None
+        else:
+            edges = pd.read_sql(text(sql_graph), self.engine)
+            likes = pd.read_sql(text(sql_likes), self.engine) if self.graph_weight > 0 else None
+        self.index_coauthors(edges)
+        if likes is not None:
+            self.index_walk(likes)
+
+    def _edge_indices(self, edges):
+        """Индексы авторов (author_a, author_b) для пар написаний имен; петли и неизвестные имена отбрасываются."""
+        # Ребра строим между авторами (индексами ключей), а не написаниями имен
+        sides = [edges[column].map(self.author_index.aliases).map(self.key_to_idx)
+                 for column in ('author_a', 'author_b')]
+        known = sides[0].notna() & sides[1].notna() & (sides[0] != sides[1])
+        return tuple(side[known].to_numpy(dtype=np.int64) for side in sides)
+
+    def index_coauthors(self, edges):
+        """Матрица соавторства по парам написаний имен (author_a, author_b)."""
+        author_a, author_b = self._edge_indices(edges)
+
+        n = len(self.author_names)
+        rows = np.concatenate([author_a, author_b])  # Двунаправленный граф
+        cols = np.concatenate([author_b, author_a])
+        self.coauthors_matrix = sparse.csr_matrix((np.ones(len(rows), dtype=bool), (rows, cols)), shape=(n, n))
+
+    def index_walk(self, like_edges):
+        """Матрица блуждания: соавторство (вес 1) + лайки (author_a - пользователь, вес like_weight)."""
+        n = len(self.author_names)
+        liker, author = self._edge_indices(like_edges)
+        # Повторные лайки одних и тех же авторов складываются в вес ребра
+        likes = sparse.csr_matrix((np.full(len(liker), self.like_weight, dtype=np.float32), (liker, author)),
+                                  shape=(n, n))
+        self.walk_matrix = walk_matrix(self.coauthors_matrix.astype(np.float32) + likes + likes.T)
 
     def train(self):
         """Запуск обучения"""
+        with MODEL_TRAIN_SECONDS.time(model='authors'):
+            self._train()
+
+    def _train(self):
         corpus = self.load_data()
         if not corpus:
             return
@@ -252,68 +720,232 @@ class ScienceRecommender:
         print(f"[ML] Векторизация {len(corpus)} авторов...")
         self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(corpus)
 
-        print("[ML] Расчет матрицы сходства...")
-        self.cosine_sim_matrix = cosine_similarity(self.tfidf_matrix, self.tfidf_matrix)
+        # Полную матрицу сходства N x N не считаем: строки TF-IDF L2-нормированы,
+        # поэтому косинус - это просто произведение строк, считаем его по запросу.
+
+        if self.embedding_dim:
+            print(f"[ML] Сжатие до {self.embedding_dim} измерений (TruncatedSVD)...")
+            self.embeddings = reduce_dimensions(self.tfidf_matrix, self.embedding_dim)
+            print(f"[ML] Эмбеддинги: {self.embeddings.shape}, {self.embeddings.nbytes / 2 ** 20:.1f} МБ")
+
+        if self.ann_backend is not None:
+            print(f"[ML] Построение ANN индекса ({type(self.ann_backend).__name__})...")
+            self.ann_backend.build(self.embeddings)
         print("[ML] Готово.")
 
     def get_recommendations(self, author_name, top_n=3):
         """Главный метод получения рекомендаций"""
-        if self.cosine_sim_matrix is None:
+        if self.tfidf_matrix is None:
             return ["Модель не обучена"]
 
-        if author_name not in self.name_to_idx:
+        if self.find_author(author_name) is None:
             return [f"Автор '{author_name}' не найден в базе"]
 
-        idx = self.name_to_idx[author_name]
-
-        # Получаем все оценки похожести для этого автора
-        scores = list(enumerate(self.cosine_sim_matrix[idx]))
-        # Сортируем: от самых похожих к непохожим
-        scores = sorted(scores, key=lambda x: x[1], reverse=True)
+        for _, recommendations in self.get_recommendations_batch([author_name], top_n=top_n):
+            return recommendations
 
-        recommendations = []
-        known_coauthors = self.coauthors_graph[author_name]
-        my_direction = self.authors_metadata[author_name]['direction']
-
-        for cand_idx, score in scores:
-            cand_name = self.idx_to_name[cand_idx]
+    def get_recommendations_batch(self, author_names, top_n=3, max_cells=2 ** 25, time_budget=None):
+        """
+        Рекомендации сразу для многих авторов.
+        Генератор пар (имя, рекомендации) в порядке входного списка.
+
+        Сходство считается одним произведением на блок авторов (разреженная
+        TF-IDF или плотные эмбеддинги) или через ANN индекс, если он задан; фильтры (сам автор, соавторы,
+        порог) и выбор топ-N - векторно.
+        max_cells ограничивает размер плотного блока сходств в памяти.
+        Графовая близость (graph_weight > 0) считается блоком итераций PageRank;
+        после time_budget секунд (по умолчанию graph_budget) от начала вызова
+        оставшиеся блоки получают только два шага блуждания (соавторы соавторов).
+        """
+        if self.tfidf_matrix is None:
+            for name in author_names:
+                yield name, ["Модель не обучена"]
+            return
 
-            # 1. Не я сам
-            if cand_name == author_name:
-                continue
-            # 2. Не мой коллега
-            if cand_name in known_coauthors:
-                continue
-            # 3. Не мусор (слишком низкое совпадение)
-            if score < 0.05:
-                continue
+        n = self.tfidf_matrix.shape[0]
+        k = min(top_n, n)
+        chunk_size = max(1, max_cells // max(n, 1))
+        author_names = list(author_names)
+        deadline = time.monotonic() + (self.graph_budget if time_budget is None else time_budget)
+
+        for start in range(0, len(author_names), chunk_size):
+            chunk = author_names[start:start + chunk_size]
+            found = [name for name in chunk if self.find_author(name) is not None]
+            results = {}
+
+            if found and k > 0:
+                idxs = np.array([self.find_author(name) for name in found])
+                with MODEL_SCORE_SECONDS.time(model='authors'):
+                    top, top_scores, via_graph = self._top_candidates(idxs, k, deadline)
+
+                # Бонус за междисциплинарность
+                cross = self.direction_codes[top] != self.direction_codes[idxs][:, None]
+                shown_scores = np.where(cross, top_scores * 1.2, top_scores)
+
+                for r, name in enumerate(found):
+                    recommendations = []
+                    for cand_idx, score, shown, is_cross, graph in zip(top[r], top_scores[r], shown_scores[r],
+                                                                        cross[r], via_graph[r]):
+                        if score == -np.inf:
+                            break
+                        reason = "Общие соавторы" if graph else "Схожие научные интересы"
+                        if is_cross:
+                            reason += " (Междисциплинарно!)"
+                        recommendations.append({
+                            'name': self.author_names[cand_idx],
+                            'score': round(float(shown) * 100, 1),
+                            'direction': self.directions[self.direction_codes[cand_idx]],
+                            'reason': reason
+                        })
+                    results[name] = recommendations
+
+            for name in chunk:
+                if name in results:
+                    yield name, results[name]
+                elif self.find_author(name) is not None:
+                    yield name, []
+                else:
+                    yield name, [f"Автор '{name}' не найден в базе"]
+
+    def _graph_scores(self, idxs, deadline=None):
+        """Графовая близость блока авторов (b x n, float32 в [0, 1]) или None, если граф выключен."""
+        if self.walk_matrix is None or self.graph_weight <= 0:
+            return None
+        with MODEL_SCORE_SECONDS.time(model='graph'):
+            ppr, _ = personalized_pagerank(self.walk_matrix, idxs, restart=self.GRAPH_RESTART,
+                                           max_iter=self.GRAPH_MAX_ITER, deadline=deadline)
+        graph = np.ascontiguousarray(ppr.T)
+        del ppr
+        # Сам автор и его соавторы не рекомендуются - и не участвуют в нормировке, иначе максимум всегда у них
+        rows = np.arange(len(idxs))
+        graph[rows, idxs] = 0
+        co_rows, co_cols = self.coauthors_matrix[idxs].nonzero()
+        graph[co_rows, co_cols] = 0
+        top = graph.max(axis=1, keepdims=True)
+        np.divide(graph, top, out=graph, where=top > 0)
+        return graph
+
+    def _top_candidates(self, idxs, k, deadline=None):
+        """
+        Топ-k допустимых кандидатов для блока авторов: (индексы, оценки, графовая ли
+        часть оценки больше текстовой).
+        """
+        rows = np.arange(len(idxs))
+        graph = self._graph_scores(idxs, deadline)
+        if self.ann_backend is None:
+            if self.embeddings is not None:
+                # Одно BLAS-умножение float32 матриц
+                scores = (self.embeddings[idxs] @ self.embeddings.T).astype(np.float64)
+            else:
+                scores = (self.tfidf_matrix[idxs] @ self.tfidf_matrix.T).toarray()
+            cand = None
+
+            # 1. Не я сам, 2. не мой коллега
+            scores[rows, idxs] = -np.inf
+            co_rows, co_cols = self.coauthors_matrix[idxs].nonzero()
+            scores[co_rows, co_cols] = -np.inf
+        else:
+            # Запрашиваем с запасом: часть кандидатов отсеется как сам автор и соавторы
+            extra = 1 + int(self.coauthors_matrix[idxs].getnnz(axis=1).max())
+            cand, scores = self.ann_backend.query(self.embeddings[idxs], min(k + extra, len(self.author_names)))
+            cand = np.maximum(cand, 0)
+            scores = np.array(scores, dtype=np.float64)
+
+            scores[cand == idxs[:, None]] = -np.inf
+            is_coauthor = np.asarray(
+                self.coauthors_matrix[np.repeat(idxs, cand.shape[1]), cand.ravel()]
+            ).reshape(cand.shape)
+            scores[is_coauthor] = -np.inf
+
+        # 3. Не мусор (слишком низкое совпадение) - порог к текстовому сходству, до смешивания с графом
+        scores[scores < 0.05] = -np.inf
+
+        if graph is not None:
+            # Смешиваем на месте: (1 - w) * текст + w * граф (исключенные остаются -inf)
+            if cand is not None:
+                graph = np.take_along_axis(graph, cand, axis=1)
+            scores *= 1 - self.graph_weight
+            scores += self.graph_weight * graph
+
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        if graph is None:
+            via_graph = np.zeros(top.shape, dtype=bool)
+        else:
+            # Графовая часть w * g больше текстовой (оценка - w * g)
+            graph_part = self.graph_weight * np.take_along_axis(graph, top, axis=1)
+            via_graph = 2 * graph_part > top_scores
+        if cand is not None:
+            top = np.take_along_axis(cand, top, axis=1)
+        return top, top_scores, via_graph
 
-            cand_direction = self.authors_metadata[cand_name]['direction']
+    def get_author_stats(self):
+        """Получить статистику по авторам"""
+        return {
+            'total_authors': len(self.author_names),
+            'authors_list': self.author_names[:10]  # Первые 10 авторов
+        }
 
-            # Формируем ответ
-            reason = "Схожие научные интересы"
-            if my_direction != cand_direction:
-                reason += " (Междисциплинарно!)"
-                score *= 1.2  # Бонус за междисциплинарность
 
-            recommendations.append({
-                'name': cand_name,
-                'score': round(score * 100, 1),
-                'direction': cand_direction,
-                'reason': reason
-            })
+class LiveRecommender:
+    """
+    Модель для онлайн-сервиса (app.py): новая ScienceRecommender обучается целиком
+    "в стороне" и публикуется одной заменой ссылки, поэтому запросы видят либо
+    старую, либо новую модель, но никогда не наполовину обученную.
+    """
 
-            if len(recommendations) >= top_n:
-                break
+    def __init__(self, db_engine, embedding_dim=None, ann_factory=None):
+        self.engine = db_engine
+        self.embedding_dim = embedding_dim
+        # ANN индекс у каждой модели свой: фабрика вызывается на каждое обучение
+        self.ann_factory = ann_factory
+        self.model = None
+        # Сериализуем переобучения между собой, читатели лок не берут
+        self._train_lock = threading.Lock()
+        self._retrain_pending = threading.Event()
+
+    def load_and_train(self):
+        with self._train_lock:
+            self._retrain_pending.clear()
+            model = ScienceRecommender(self.engine, embedding_dim=self.embedding_dim,
+                                       ann_backend=self.ann_factory() if self.ann_factory else None)
+            model.train()
+            if model.tfidf_matrix is not None:
+                # Присваивание ссылки атомарно
+                self.model = model
+
+    def retrain_async(self):
+        """Переобучение в фоновом потоке; повторные вызовы во время обучения склеиваются."""
+        if self._retrain_pending.is_set():
+            return
+        self._retrain_pending.set()
+        threading.Thread(target=self._retrain_worker, daemon=True).start()
 
-        return recommendations
+    def _retrain_worker(self):
+        try:
+            self.load_and_train()
+        except Exception as e:
+            self._retrain_pending.clear()
+            print(f"[ML] Фоновое переобучение не удалось: {e}")
 
-    def get_author_stats(self):
-        """Получить статистику по авторам"""
-        return {
-            'total_authors': len(self.name_to_idx),
-            'authors_list': list(self.name_to_idx.keys())[:10]  # Первые 10 авторов
-        }
+    def get_recommendations(self, author_name, top_n=3):
+        """Рекомендации автора; пустой список, если модель не обучена или автор неизвестен."""
+        for _, recommendations in self.get_recommendations_batch([author_name], top_n=top_n):
+            return recommendations
+
+    def get_recommendations_batch(self, author_names, top_n=3):
+        model = self.model  # Один раз читаем ссылку и дальше работаем только с ней
+        if model is None:
+            for name in author_names:
+                yield name, []
+            return
+        for name, recommendations in model.get_recommendations_batch(author_names, top_n=top_n):
+            # Строки-сообщения ("не найден") сервису не нужны
+            yield name, [r for r in recommendations if isinstance(r, dict)]
 
 
 # ==========================================
@@ -322,8 +954,14 @@ class ScienceRecommender:
 
 if __name__ == "__main__":
     # 1. Очистим базу для чистого теста (удалите файл .db если хотите сохранить данные)
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    if engine.dialect.name != 'sqlite':
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        print("[INIT] Таблицы пересозданы.")
+    elif os.path.exists(engine.url.database):
+        # Закрываем соединения пула: иначе они продолжат смотреть в удаленный файл
+        engine.dispose()
+        os.remove(engine.url.database)
         Base.metadata.create_all(engine)
         print("[INIT] База данных пересоздана.")
 
@@ -361,7 +999,22 @@ if __name__ == "__main__":
     else:
         print(recs)
 
-    # 5. Покажем статистику
+    # 5. Сравнение качества: сырой TF-IDF против сжатых эмбеддингов (LSA)
+    reduced = ScienceRecommender(engine, embedding_dim=128)
+    reduced.train()
+    print(f"\n--- Сравнение ранжирования для {target}: TF-IDF vs LSA ({reduced.embeddings.shape[1]} изм.) ---")
+    raw_recs = recommender.get_recommendations(target, top_n=10)
+    reduced_recs = reduced.get_recommendations(target, top_n=10)
+    for label, ranking in (("TF-IDF", raw_recs), ("LSA", reduced_recs)):
+        ranking = [f"{r['name']} ({r['score']}%)" for r in ranking if isinstance(r, dict)]
+        print(f"{label:<7}: {', '.join(ranking) or '-'}")
+    raw_names = [r['name'] for r in raw_recs if isinstance(r, dict)]
+    reduced_names = [r['name'] for r in reduced_recs if isinstance(r, dict)]
+    if raw_names:
+        overlap = len(set(raw_names) & set(reduced_names)) / len(raw_names)
+        print(f"Совпадение выдачи: {overlap:.0%}, порядок совпадает: {raw_names == reduced_names}")
+
+    # 6. Покажем статистику
     stats = recommender.get_author_stats()
     print(f"\nСтатистика: {stats['total_authors']} авторов в базе")
     print(f"Примеры авторов: {', '.join(stats['authors_list'])}")
\ No newline at end of file
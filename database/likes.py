@@ -0,0 +1,150 @@
+"""
+Лайки: переключение без загрузки ORM-объектов и счетчик articles.like_count.
+
+Переключение - DELETE по первичному ключу (user_id, article_id); если удалять
+было нечего - INSERT ... ON CONFLICT DO NOTHING. Счетчик статьи меняется ровно
+на число реально удаленных/вставленных строк, поэтому гонка двух одинаковых
+запросов не сбивает его. Полный пересчет - database.recount_likes.
+
+LikeBuffer - необязательная отложенная запись: переключения копятся в памяти
+и раз в interval секунд (или при max_pending пар) пишутся одной транзакцией.
+Четное число переключений одной пары взаимно уничтожается и в базу не идет.
+До сброса буфера /api/login и /api/articles видят старое состояние.
+"""
+import atexit
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import bindparam, delete, func, select, update
+
+from database import Article, User, likes_table
+from metrics import LIKE_FLUSH_PAIRS, LIKE_FLUSH_SECONDS, LIKE_TOGGLES
+from storage import insert_ignore
+
+
+def apply_toggles(conn, pairs):
+    """
+    Переключает лайки для пар (user_id, article_id) в транзакции conn.
+    Возвращает {пара: лайк стоит после переключения}; пары с несуществующим
+    пользователем или статьей пропускаются и в результат не попадают.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return {}
+    user_ids = set(conn.execute(
+        select(User.id).where(User.id.in_({user_id for user_id, _ in pairs}))).scalars())
+    article_ids = set(conn.execute(
+        select(Article.id).where(Article.id.in_({article_id for _, article_id in pairs}))).scalars())
+
+    unlike = delete(likes_table).where(likes_table.c.user_id == bindparam('u'),
+                                       likes_table.c.article_id == bindparam('a'))
+    # preserve_rowcount: без него драйвер psycopg отдает для INSERT rowcount -1
+    like = insert_ignore(conn, likes_table, ['user_id', 'article_id']).execution_options(preserve_rowcount=True)
+    state, deltas = {}, Counter()
+    for user_id, article_id in pairs:
+        if user_id not in user_ids or article_id not in article_ids:
+            continue
+        if conn.execute(unlike, {'u': user_id, 'a': article_id}).rowcount:
+            deltas[article_id] -= 1
+            state[(user_id, article_id)] = False
+        else:
+            # rowcount 0 - лайк уже вставил параллельный запрос
+            deltas[article_id] += conn.execute(like, {'user_id': user_id, 'article_id': article_id}).rowcount
+            state[(user_id, article_id)] = True
+
+    changed = [{'article_id': article_id, 'delta': delta} for article_id, delta in deltas.items() if delta]
+    if changed:
+        conn.execute(
+            update(Article.__table__).where(Article.__table__.c.id == bindparam('article_id'))
+            .values(like_count=func.coalesce(Article.__table__.c.like_count, 0) + bindparam('delta')),
+            changed)
+    return state
+
+
+def toggle_like(conn, user_id, article_id):
+    """Одно переключение; True - лайк поставлен. LookupError - нет пользователя или статьи."""
+    state = apply_toggles(conn, [(user_id, article_id)])
+    if (user_id, article_id) not in state:
+        raise LookupError(f"Пользователь {user_id} или статья {article_id} не найдены")
+    LIKE_TOGGLES.inc(mode='direct')
+    return state[(user_id, article_id)]
+
+
+class LikeBuffer:
+    """
+    Отложенная запись лайков пачками; session_factory - sessionmaker (например, database.Session).
+    listener(state) вызывается после коммита пачки с результатом apply_toggles.
+    """
+
+    def __init__(self, session_factory, interval=0.5, max_pending=1000, listener=None):
+        self.session_factory = session_factory
+        self.listener = listener
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}  # (user_id, article_id) -> число переключений с прошлого сброса
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='like-buffer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def toggle(self, user_id, article_id):
+        key = (user_id, article_id)
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + 1
+            full = len(self._pending) >= self.max_pending
+        LIKE_TOGGLES.inc(mode='buffered')
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Пишет накопленное одной транзакцией; возвращает число переключенных пар."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            pairs = [key for key, toggles in batch.items() if toggles % 2]
+            if not pairs:
+                return 0
+            start = time.perf_counter()
+            try:
+                with self.session_factory.begin() as session:
+                    state = apply_toggles(session.connection(), pairs)
+            except Exception:
+                # Возвращаем пачку в буфер (поверх того, что пришло за время записи) - попробуем в следующий раз
+                with self._lock:
+                    for key, toggles in batch.items():
+                        self._pending[key] = self._pending.get(key, 0) + toggles
+                raise
+            LIKE_FLUSH_SECONDS.observe(time.perf_counter() - start)
+            LIKE_FLUSH_PAIRS.observe(len(pairs))
+            if self.listener is not None:
+                self.listener(state)
+            return len(state)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[DB] Не удалось записать лайки: {e}")
+
+    def close(self):
+        """Останавливает фоновый поток и сбрасывает остаток."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[DB] Не удалось записать лайки при остановке: {e}")
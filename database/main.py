@@ -1,7 +1,7 @@
 import os
 import sys
 from data_saver import DataSaver
-from database import ScienceRecommender, create_engine
+from database import ScienceRecommender, engine
 
 
 def main():
@@ -850,9 +850,10 @@ def main():
         search_query = input("Enter search query: ").strip()
         if not search_query:
             search_query = "machine learning"  # значение по умолчанию
-        for search_query in lst:
-            result = saver.save_parsed_data(search_query)
-            print(f"\nResult: {result}")
+        # Загрузка страниц по очереди, разбор - в пуле процессов (PARSER_WORKERS, см. parse_pool.py)
+        results = saver.parse_multiple_targets(lst)
+        for target, result in results.items():
+            print(f"\nResult for {target}: {result}")
 
     elif choice == "2":
         # Получение рекомендаций
@@ -861,10 +862,7 @@ def main():
             print("Author name is required!")
             return
 
-        # Инициализация рекомендательной системы
-        db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'science_articles.db')
-        engine = create_engine(f'sqlite:///{db_path}')
-
+        # Инициализация рекомендательной системы (общий движок из database.py)
         recommender = ScienceRecommender(engine)
         recommender.train()
 
@@ -887,9 +885,6 @@ def main():
         results = saver.parse_multiple_targets(demo_targets)
 
         # Показываем рекомендации
-        db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'science_articles.db')
-        engine = create_engine(f'sqlite:///{db_path}')
-
         recommender = ScienceRecommender(engine)
         recommender.train()
 
@@ -897,14 +892,13 @@ def main():
         # Попробуем найти рекомендации для случайных авторов из базы
         demo_authors = ["Alex", "Smith", "Wang", "Johnson"]  # Замените на реальные имена из вашей базы
 
-        for author in demo_authors:
-            try:
-                recs = recommender.get_recommendations(author)
-                if isinstance(recs, list) and recs and isinstance(recs[0], dict):
-                    print(f"\nRecommendations for {author}:")
-                    for rec in recs[:2]:  # Показываем только 2 рекомендации
-                        print(f"  - {rec['name']} ({rec['direction']}) - {rec['score']}%")
-            except:
+        # Один пакетный расчет вместо цикла по авторам
+        for author, recs in recommender.get_recommendations_batch(demo_authors, top_n=2):
+            if recs and isinstance(recs[0], dict):
+                print(f"\nRecommendations for {author}:")
+                for rec in recs:  # Показываем только 2 рекомендации
+                    print(f"  - {rec['name']} ({rec['direction']}) - {rec['score']}%")
+            else:
                 print(f"\nNo recommendations for {author} (author not found)")
 
     else:
@@ -0,0 +1,219 @@
+"""
+Встроенные метрики: счетчики и гистограммы в формате Prometheus.
+
+Общий реестр REGISTRY используется парсером, рекомендательной системой и
+Flask-приложением (эндпоинт /metrics). SQL-запросы считаются через события
+SQLAlchemy: instrument_engine(engine) добавляет время каждого запроса в
+гистограмму и в статистику текущего HTTP-запроса (track_request), так что
+N+1 видно как десятки одинаковых запросов в одном обращении к API.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [счетчики по корзинам..., сумма, количество]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[position] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            # Повторный импорт модуля не должен плодить дубликаты
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Время обработки HTTP-запроса', ['method', 'endpoint', 'status'])
+HTTP_REQUEST_SQL_QUERIES = REGISTRY.histogram(
+    'http_request_sql_queries', 'Число SQL-запросов на один HTTP-запрос', ['endpoint'], buckets=COUNT_BUCKETS)
+HTTP_REQUEST_SQL_SECONDS = REGISTRY.histogram(
+    'http_request_sql_seconds', 'Суммарное время SQL на один HTTP-запрос', ['endpoint'])
+SQL_QUERY_SECONDS = REGISTRY.histogram('sql_query_duration_seconds', 'Время одного SQL-запроса')
+PARSER_FETCH_SECONDS = REGISTRY.histogram('parser_fetch_seconds', 'Загрузка страницы парсером', ['source'])
+PARSER_PARSE_SECONDS = REGISTRY.histogram('parser_parse_seconds', 'Разбор страницы результатов', ['source'])
+PARSER_ARTICLES = REGISTRY.counter('parser_articles_total', 'Разобрано статей', ['source'])
+PARSER_RETRIES = REGISTRY.counter('parser_retries_total', 'Повторы запросов парсера', ['source', 'reason'])
+MODEL_TRAIN_SECONDS = REGISTRY.histogram('model_train_seconds', 'Обучение рекомендательной модели', ['model'])
+MODEL_SCORE_SECONDS = REGISTRY.histogram('model_score_seconds', 'Расчет рекомендаций (блок авторов)', ['model'])
+LIKE_TOGGLES = REGISTRY.counter('like_toggles_total', 'Переключения лайков', ['mode'])
+LIKE_FLUSH_SECONDS = REGISTRY.histogram('like_flush_seconds', 'Запись пачки лайков из буфера')
+LIKE_FLUSH_PAIRS = REGISTRY.histogram('like_flush_pairs', 'Пар (пользователь, статья) в пачке', buckets=COUNT_BUCKETS)
+
+
+# ==========================================
+# SQL: статистика по текущему запросу
+# ==========================================
+
+class RequestStats:
+    """SQL-запросы одного HTTP-запроса: (текст, время)."""
+
+    def __init__(self):
+        self.queries = []
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def breakdown(self, top=5):
+        """Самые дорогие запросы по суммарному времени: (текст, число, время)."""
+        grouped = defaultdict(lambda: [0, 0.0])
+        for statement, duration in self.queries:
+            grouped[statement][0] += 1
+            grouped[statement][1] += duration
+        items = sorted(grouped.items(), key=lambda item: item[1][1], reverse=True)
+        return [(statement, count, duration) for statement, (count, duration) in items[:top]]
+
+
+_current_stats = contextvars.ContextVar('request_sql_stats', default=None)
+
+
+@contextmanager
+def track_request():
+    """Собирает SQL-запросы, выполненные внутри блока."""
+    stats = RequestStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current_stats.set(stats)
+
+
+def finish_request(token):
+    _current_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['query_start'].pop()
+    SQL_QUERY_SECONDS.observe(duration)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.queries.append((statement, duration))
+
+
+def _handle_error(context):
+    # after_cursor_execute при ошибке не вызывается - снимаем отметку начала сами
+    conn = context.connection
+    if conn is not None and conn.info.get('query_start'):
+        conn.info['query_start'].pop()
+
+
+def instrument_engine(engine):
+    """Подключает учет SQL-запросов к движку SQLAlchemy (повторный вызов безопасен)."""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+    return engine
@@ -0,0 +1,74 @@
+"""
+Канонический ключ статьи (articles.paper_key) для поиска дублей.
+
+Одна и та же статья arXiv приходит под разными URL: abs/pdf/format, v1/v2,
+http/https, www. Ключ:
+
+- 'arxiv:<id>' - идентификатор arXiv без версии ('arxiv:2401.01234',
+  'arxiv:cond-mat/0206219');
+- 'title:<хэш>' - для статей без идентификатора: отпечаток названия
+  (регистр, диакритика, знаки препинания и пробелы не важны);
+- 'url:<адрес>' - короткие названия ("Introduction", "Erratum") слишком часто
+  совпадают у разных статей: для них - URL без схемы, www и хвостового '/'.
+
+Колонка уникальна; save_articles (database.py) проверяет ключи всей пачки
+одним запросом. Объединение уже накопленных дублей - compact_articles, в составе
+обновления схемы:
+
+    python migrate.py upgrade
+"""
+import hashlib
+import re
+import unicodedata
+from urllib.parse import urlsplit
+
+ARXIV_ID = re.compile(
+    r'(?:arxiv\.org/(?:abs|pdf|format|html|ps)/|arxiv:)'
+    r'(\d{4}\.\d{4,5}|[a-z][a-z\-]*(?:\.[a-z]{2})?/\d{7})(?:v\d+)?',
+    re.IGNORECASE,
+)
+WORD = re.compile(r'\w+')
+# Меньше слов в названии - ключ по URL, а не по названию
+MIN_TITLE_WORDS = 4
+
+
+def arxiv_id(text):
+    """Идентификатор arXiv без версии из URL или строки 'arXiv:...'; None, если его нет."""
+    match = ARXIV_ID.search(text or '')
+    return match.group(1).lower() if match else None
+
+
+def title_words(title):
+    # NFKD + удаление диакритики: 'Schrödinger' и 'Schrodinger' дают одно слово
+    decomposed = unicodedata.normalize('NFKD', title or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return WORD.findall(stripped.casefold())
+
+
+def title_fingerprint(title):
+    words = title_words(title)
+    if len(words) < MIN_TITLE_WORDS:
+        return None
+    return hashlib.blake2b(' '.join(words).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def normalize_url(url):
+    parts = urlsplit((url or '').strip())
+    host = parts.netloc.lower().removeprefix('www.')
+    path = parts.path.rstrip('/')
+    if not host and not path:
+        return None
+    return f"{host}{path}?{parts.query}" if parts.query else f"{host}{path}"
+
+
+def paper_key(url, title):
+    """Ключ статьи по URL и названию; None - нечем отличить (нет ни URL, ни названия)."""
+    identifier = arxiv_id(url)
+    if identifier:
+        return f"arxiv:{identifier}"
+    fingerprint = title_fingerprint(title)
+    if fingerprint:
+        return f"title:{fingerprint}"
+    address = normalize_url(url)
+    return f"url:{address}" if address else None
+
@@ -0,0 +1,53 @@
+"""
+Разбор страниц поиска arXiv в пуле процессов.
+
+BeautifulSoup и поиск ключевых слов по DIRECTIONS_KEYWORDS - чистая работа
+процессора, и в одном процессе страницы разбираются строго по очереди (GIL).
+ParsePool отдает сырой HTML рабочим процессам, а обратно получает статьи
+компактными кортежами строк (arxiv_parser.ArticleRow) - их пересылка между
+процессами дешевле, чем dataclass. DTO собираются уже в вызывающем процессе
+(ArxivorgArticleParser.from_rows), там же пишутся метрики разбора.
+
+Число процессов - аргумент workers или PARSER_WORKERS (по умолчанию число
+ядер); 0 или 1 - разбор в текущем процессе, без пула.
+"""
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from arxiv_parser import parse_page_rows
+
+
+def default_workers():
+    return int(os.environ.get('PARSER_WORKERS', os.cpu_count() or 1))
+
+
+class ParsePool:
+    def __init__(self, workers=None):
+        self.workers = default_workers() if workers is None else workers
+        self._executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+
+    def submit(self, html_content):
+        """Future с результатом arxiv_parser.parse_page_rows: (кортежи статей, секунды разбора)."""
+        if self._executor is not None:
+            return self._executor.submit(parse_page_rows, html_content)
+        future = Future()
+        try:
+            future.set_result(parse_page_rows(html_content))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def map(self, pages):
+        """Результаты parse_page_rows для списка страниц, в том же порядке."""
+        return [future.result() for future in [self.submit(page) for page in pages]]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
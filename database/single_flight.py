@@ -0,0 +1,77 @@
+"""
+Склейка одинаковых запросов к внешнему источнику (single-flight) и короткая память.
+
+Несколько регистраций с одной фамилией подряд или дубли в списке массовой
+загрузки (database/main.py) давали одинаковые запросы к arXiv. SingleFlight.do(key, fn):
+
+- если свежий результат по key уже есть (моложе ttl секунд) - он и возвращается;
+- если такой же запрос уже выполняется в другом потоке - ждем его результат,
+  а не отправляем второй;
+- иначе fn() выполняется в текущем потоке, результат получают все ожидающие.
+
+Запоминаются только непустые результаты: пустой список парсера - это и
+"ничего не найдено", и ошибка сети, повторить его через секунду дешевле,
+чем держать ошибку ttl секунд. ttl = 0 - без памяти, только склейка.
+Ключ запроса к arXiv - arxiv_parser.normalize_query (регистр и пробелы не важны).
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import REGISTRY
+
+SINGLE_FLIGHT_REQUESTS = REGISTRY.counter(
+    'single_flight_requests_total', 'Запросы через SingleFlight: hit - из памяти, '
+    'coalesced - дождались чужого запроса, miss - выполнены', ['name', 'result'])
+
+
+class SingleFlight:
+    def __init__(self, ttl=0.0, max_entries=256, name='default'):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.name = name
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> Future выполняющегося запроса
+        self._memo = {}  # key -> (время, результат), в порядке добавления
+
+    def do(self, key, fn):
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is not None:
+                if time.monotonic() - entry[0] <= self.ttl:
+                    SINGLE_FLIGHT_REQUESTS.inc(name=self.name, result='hit')
+                    return entry[1]
+                del self._memo[key]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            SINGLE_FLIGHT_REQUESTS.inc(name=self.name, result='coalesced')
+            return future.result()
+
+        SINGLE_FLIGHT_REQUESTS.inc(name=self.name, result='miss')
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            if result and self.ttl > 0:
+                self._store(key, result)
+        future.set_result(result)
+        return result
+
+    def _store(self, key, result):
+        self._memo.pop(key, None)
+        self._memo[key] = (time.monotonic(), result)
+        while len(self._memo) > self.max_entries:
+            del self._memo[next(iter(self._memo))]
+
+    def clear(self):
+        with self._lock:
+            self._memo.clear()
@@ -0,0 +1,167 @@
+"""
+Колоночные снимки базы (Parquet / Arrow IPC) для обучения и офлайн-анализа.
+
+    python snapshot.py snapshots/2025-06-01                  # Parquet + Arrow
+    python snapshot.py snapshots/latest --format arrow --source postgresql://...
+
+Таблицы: articles, authors (с направлением статьи), users (без паролей), likes,
+authors_articles и coauthor_edges (пары авторов с числом общих статей).
+articles и authors разбиты по направлению: каталоги article_direction=<...>,
+так что выборка одного направления читает только его файлы.
+
+parquet/ - сжатые файлы для аналитиков (pandas, polars, DuckDB, Spark).
+arrow/   - несжатый Arrow IPC: файлы отображаются в память (mmap) без
+           разбора и копирования. ScienceRecommender(snapshot_dir=...) берет
+           отсюда входы обучения вместо SQL (см. training_frame).
+manifest.json - время снимка, источник и число строк.
+
+Нужен пакет pyarrow.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from pyarrow import fs
+from sqlalchemy import inspect, text
+
+from coauthor_graph import coauthor_edges
+
+FORMATS = {'parquet': 'parquet', 'arrow': 'ipc'}  # каталог снимка -> формат pyarrow.dataset
+
+# Таблица -> (SQL, колонки-разделы, колонки дат)
+TABLES = {
+    'articles': ("SELECT id, source_name, title, article_url, article_direction, citations, like_count, created_at "
+                 "FROM articles", ['article_direction'], ['created_at']),
+    'authors': ("SELECT auth.id, auth.name, auth.article_id, art.article_direction "
+                "FROM authors auth JOIN articles art ON art.id = auth.article_id", ['article_direction'], []),
+    'users': ("SELECT id, email, first_name, last_name, role, academic_status, city, age, area FROM users", [], []),
+    'likes': ("SELECT user_id, article_id, created_at FROM likes", [], ['created_at']),
+    'authors_articles': ("SELECT user_id, article_id FROM authors_articles", [], []),
+}
+
+
+def _write(table, path, file_format, partition_cols):
+    if table.num_rows == 0:
+        # write_dataset не создает файлов для пустой таблицы - пишем один файл со схемой
+        os.makedirs(path, exist_ok=True)
+        writer = pq.write_table if file_format == 'parquet' else feather.write_feather
+        writer(table, os.path.join(path, 'part-0.' + file_format))
+        return
+    ds.write_dataset(
+        table, path, format=file_format,
+        partitioning=partition_cols or None, partitioning_flavor='hive' if partition_cols else None,
+        existing_data_behavior='delete_matching',
+    )
+
+
+def export_snapshot(db_engine, out_dir, formats=tuple(FORMATS)):
+    """Пишет снимок базы в out_dir; возвращает {таблица: число строк}."""
+    frames = {}
+    for name, (sql, _, date_columns) in TABLES.items():
+        start = time.perf_counter()
+        frames[name] = pd.read_sql(text(sql), db_engine, parse_dates=date_columns or None)
+        print(f"[SNAPSHOT] {name}: {len(frames[name])} строк за {time.perf_counter() - start:.2f} с")
+    if inspect(db_engine).has_table('coauthor_edges'):
+        frames['coauthor_edges'] = pd.read_sql(text("SELECT author_a, author_b, articles FROM coauthor_edges"), db_engine)
+    else:
+        # База старой схемы (источник не открывался через database.py) - считаем пары по authors
+        frames['coauthor_edges'] = coauthor_edges(frames['authors'])
+    print(f"[SNAPSHOT] coauthor_edges: {len(frames['coauthor_edges'])} пар")
+
+    for fmt in formats:
+        target = os.path.join(out_dir, fmt)
+        shutil.rmtree(target, ignore_errors=True)
+        for name, frame in frames.items():
+            partition_cols = TABLES[name][1] if name in TABLES else []
+            _write(pa.Table.from_pandas(frame, preserve_index=False), os.path.join(target, name),
+                   FORMATS[fmt], partition_cols)
+
+    counts = {name: len(frame) for name, frame in frames.items()}
+    manifest = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'source': db_engine.url.render_as_string(hide_password=True),
+        'formats': list(formats),
+        'rows': counts,
+    }
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return counts
+
+
+def read_table(snapshot_dir, name, columns=None, fmt=None):
+    """Таблица снимка как pyarrow.Table; Arrow IPC (если есть) читается через mmap."""
+    if fmt is None:
+        fmt = 'arrow' if os.path.isdir(os.path.join(snapshot_dir, 'arrow', name)) else 'parquet'
+    dataset = ds.dataset(
+        os.path.join(snapshot_dir, fmt, name), format=FORMATS[fmt], partitioning='hive',
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+    return dataset.to_table(columns=columns)
+
+
+def training_frame(snapshot_dir):
+    """
+    Входы ScienceRecommender.load_data из снимка: author_name, text_content, article_direction
+    (те же строки, что дают SQL-запросы по авторам и пользователям).
+    """
+    articles = read_table(snapshot_dir, 'articles', ['id', 'title', 'article_direction']).to_pandas()
+    # Конкатенация с NULL дает NULL, как в SQL
+    articles['text_content'] = articles['title'] + ' ' + articles['article_direction']
+    articles = articles[['id', 'text_content', 'article_direction']]
+
+    # Файлы разделов читаются по направлениям - возвращаем порядок таблицы,
+    # чтобы тексты автора склеивались в том же порядке, что и из SQL
+    authors = read_table(snapshot_dir, 'authors', ['id', 'name', 'article_id']).to_pandas().sort_values('id')
+    author_rows = authors.drop(columns='id').merge(articles, left_on='article_id', right_on='id', sort=False)
+    author_rows = author_rows.rename(columns={'name': 'author_name'})
+
+    users = read_table(snapshot_dir, 'users', ['id', 'first_name', 'last_name', 'area']).to_pandas()
+    users['author_name'] = users['first_name'] + ' ' + users['last_name']
+    own = read_table(snapshot_dir, 'authors_articles', ['user_id', 'article_id']).to_pandas()
+    user_rows = (users.merge(own, left_on='id', right_on='user_id')
+                 .merge(articles, left_on='article_id', right_on='id'))
+    area_rows = users[users['area'].notna()].assign(text_content=users['area'], article_direction=users['area'])
+
+    columns = ['author_name', 'text_content', 'article_direction']
+    return pd.concat([author_rows[columns], user_rows[columns], area_rows[columns]], ignore_index=True)
+
+
+def like_edges(snapshot_dir):
+    """Ребра лайков для графа рекомендаций: author_a - имя пользователя, author_b - автор понравившейся статьи."""
+    users = read_table(snapshot_dir, 'users', ['id', 'first_name', 'last_name']).to_pandas()
+    users['author_a'] = users['first_name'] + ' ' + users['last_name']
+    likes = read_table(snapshot_dir, 'likes', ['user_id', 'article_id']).to_pandas()
+    authors = read_table(snapshot_dir, 'authors', ['name', 'article_id']).to_pandas()
+    edges = likes.merge(users, left_on='user_id', right_on='id').merge(authors, on='article_id')
+    return edges.rename(columns={'name': 'author_b'})[['author_a', 'author_b']]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Снимок базы в Parquet / Arrow")
+    arg_parser.add_argument('out_dir')
+    arg_parser.add_argument('--source', default=None, help="URL базы (по умолчанию DATABASE_URL или science_articles.db)")
+    arg_parser.add_argument('--format', default=','.join(FORMATS), help=f"через запятую: {', '.join(FORMATS)}")
+    args = arg_parser.parse_args()
+
+    formats = args.format.split(',')
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        arg_parser.error(f"неизвестный формат: {', '.join(sorted(unknown))}")
+    if args.source:
+        os.environ['DATABASE_URL'] = args.source
+    # Через database.py: схема источника обновляется до текущей (like_count, created_at, ...)
+    from database import engine
+
+    start = time.perf_counter()
+    os.makedirs(args.out_dir, exist_ok=True)
+    counts = export_snapshot(engine, args.out_dir, formats)
+    print(f"[SNAPSHOT] Готово: {sum(counts.values())} строк, {', '.join(formats)} -> {args.out_dir} "
+          f"за {time.perf_counter() - start:.2f} с")
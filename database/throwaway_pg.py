@@ -0,0 +1,135 @@
+"""
+Одноразовый локальный PostgreSQL для проверок: initdb во временный каталог,
+запуск на свободном порту, DATABASE_URL для команды, остановка и удаление.
+
+    python throwaway_pg.py                       # весь набор проверок на SQLite и PostgreSQL
+    python throwaway_pg.py -- python database.py # своя команда, только PostgreSQL
+    python throwaway_pg.py --sqlite -- python -m benchmarks.run --scale 1k
+
+Нужны бинарники PostgreSQL (initdb, pg_ctl) в PATH или в каталоге PG_BIN и
+драйвер psycopg2. initdb не запускается от root - используйте обычного пользователя.
+Каждая команда получает свою пустую базу.
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BASE_DIR)
+
+# Набор проверок по умолчанию: сценарий database.py, перенос рабочей базы, ее обновление и бенчмарки
+SUITE = [
+    [sys.executable, os.path.join(BASE_DIR, 'database.py')],
+    [sys.executable, os.path.join(BASE_DIR, 'migrate.py'), '--drop'],
+    [sys.executable, os.path.join(BASE_DIR, 'migrate.py'), 'upgrade'],
+    [sys.executable, '-m', 'benchmarks.run', '--scale', '1k', '--repeat', '1', '--sample', '20',
+     '--save-count', '100'],
+]
+
+
+def _pg_binary(name):
+    directory = os.environ.get('PG_BIN')
+    path = os.path.join(directory, name) if directory else shutil.which(name)
+    if not path or not os.path.exists(path):
+        raise RuntimeError(f"Не найден {name}: добавьте бинарники PostgreSQL в PATH или задайте PG_BIN")
+    return path
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def throwaway_postgres():
+    """Запускает временный кластер PostgreSQL; отдает URL служебной базы postgres."""
+    data_dir = tempfile.mkdtemp(prefix='science_pg_')
+    port = _free_port()
+    log_file = os.path.join(data_dir, 'server.log')
+    subprocess.run([_pg_binary('initdb'), '-D', data_dir, '-U', 'postgres', '-A', 'trust', '--no-sync'],
+                   check=True, stdout=subprocess.DEVNULL)
+    # Данные одноразовые: fsync и прочую надежность отключаем ради скорости
+    options = f"-p {port} -k {data_dir} -c listen_addresses=127.0.0.1 -c fsync=off " \
+              f"-c synchronous_commit=off -c full_page_writes=off"
+    subprocess.run([_pg_binary('pg_ctl'), '-D', data_dir, '-l', log_file, '-o', options, '-w', 'start'],
+                   check=True, stdout=subprocess.DEVNULL)
+    print(f"[PG] Временный PostgreSQL на порту {port} ({data_dir})")
+    try:
+        yield f"postgresql://postgres@127.0.0.1:{port}/postgres"
+    finally:
+        subprocess.run([_pg_binary('pg_ctl'), '-D', data_dir, '-m', 'immediate', 'stop'],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def create_database(server_url, name):
+    """Создает пустую базу name на сервере; возвращает ее URL."""
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.engine import make_url
+
+    engine = create_engine(server_url, isolation_level='AUTOCOMMIT')
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+            conn.execute(text(f'CREATE DATABASE "{name}"'))
+    finally:
+        engine.dispose()
+    return make_url(server_url).set(database=name).render_as_string(hide_password=False)
+
+
+def run_commands(commands, backend, server_url=None):
+    """Запускает команды на указанном бэкенде, каждую на пустой базе; возвращает число упавших."""
+    failures = 0
+    for i, command in enumerate(commands):
+        env = dict(os.environ)
+        with tempfile.TemporaryDirectory(prefix='science_check_') as tmp:
+            # DATABASE_URL понимают database.py, app.py и migrate.py (--target по умолчанию)
+            if backend == 'postgresql':
+                env['DATABASE_URL'] = create_database(server_url, f'check_{i}')
+            else:
+                env['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'check.db')}"
+
+            print(f"[CHECK] {backend}: {' '.join(os.path.basename(part) for part in command)}")
+            start = time.perf_counter()
+            result = subprocess.run(command, cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+            elapsed = time.perf_counter() - start
+            if result.returncode == 0:
+                print(f"[CHECK]   ok ({elapsed:.1f} с)")
+            else:
+                failures += 1
+                print(f"[CHECK]   FAIL, код {result.returncode} ({elapsed:.1f} с)")
+                print(result.stdout[-2000:])
+                print(result.stderr[-4000:])
+    return failures
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Проверки на одноразовом PostgreSQL и на SQLite")
+    arg_parser.add_argument('--sqlite', action='store_true', help="прогнать команды еще и на SQLite")
+    arg_parser.add_argument('--no-postgres', action='store_true', help="только SQLite")
+    arg_parser.add_argument('command', nargs=argparse.REMAINDER, help="команда после --")
+    args = arg_parser.parse_args(argv)
+
+    command = args.command[1:] if args.command[:1] == ['--'] else args.command
+    commands = [command] if command else SUITE
+    run_sqlite = args.sqlite or args.no_postgres or not command
+
+    failures = 0
+    if run_sqlite:
+        failures += run_commands(commands, 'sqlite')
+    if not args.no_postgres:
+        with throwaway_postgres() as server_url:
+            failures += run_commands(commands, 'postgresql', server_url)
+    print(f"[CHECK] {'Все проверки пройдены' if not failures else f'Упало проверок: {failures}'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
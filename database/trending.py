@@ -0,0 +1,147 @@
+"""
+Рейтинг статей для главной страницы (/api/articles/top).
+
+popular  - по articles.like_count: ORDER BY like_count DESC LIMIT k по индексу.
+trending - лайки с экспоненциальным затуханием: лайк в момент t весит
+           2 ** ((t - now) / half_life). Множитель now общий для всех статей и на
+           порядок не влияет, поэтому храним log(sum(exp(rate * t_i))), rate = ln2 / half_life:
+           оценка меняется только при лайке, а логарифм не переполняется на больших t.
+
+TrendingIndex поддерживает первые top_max статей инкрементально, запрос отдает
+готовый срез - время не зависит от размера каталога. Индекс живет в памяти
+процесса (у каждого процесса свой) и после рестарта восстанавливается из likes;
+вес каждого лайка хранится, чтобы снятие лайка вычитало ровно его. Если снятый
+лайк давал почти всю оценку (остальные на много периодов полураспада старше),
+вычитание теряет точность вплоть до -inf - тогда оценка пересчитывается по
+оставшимся лайкам статьи. Статья уходит из рейтинга только вместе с последним лайком.
+"""
+import heapq
+import math
+import threading
+import time
+from datetime import timezone
+
+from sqlalchemy import select
+
+from database import likes_table
+
+TOP_MAX = 100
+# Снятие лайка уменьшило оценку больше чем в e ** RECOMPUTE_GAP раз - пересчет по оставшимся лайкам
+RECOMPUTE_GAP = math.log(1e6)
+
+
+def _log_add(a, b):
+    """log(exp(a) + exp(b)) без переполнения."""
+    if a < b:
+        a, b = b, a
+    if b == -math.inf:
+        return a
+    return a + math.log1p(math.exp(b - a))
+
+
+def _log_sub(a, b):
+    """log(exp(a) - exp(b)); -inf, если вычитать нечего."""
+    if b >= a:
+        return -math.inf
+    return a + math.log1p(-math.exp(b - a))
+
+
+def _log_sum(values):
+    """log(sum(exp(v))) по непустому набору без переполнения."""
+    peak = max(values)
+    return peak + math.log(sum(math.exp(value - peak) for value in values))
+
+
+class TrendingIndex:
+    def __init__(self, half_life_hours=24.0, top_max=TOP_MAX):
+        self.rate = math.log(2) / (half_life_hours * 3600)
+        self.top_max = top_max
+        self.loaded = False
+        self._scores = {}  # article_id -> log-оценка
+        self._likes = {}  # article_id -> {user_id: rate * время лайка}
+        self._top = []  # [(log-оценка, article_id)] по убыванию оценки
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def ensure_loaded(self, db_engine):
+        """Первое обращение строит индекс по таблице likes."""
+        if self.loaded:
+            return
+        with self._load_lock:
+            if not self.loaded:
+                with db_engine.connect() as conn:
+                    self.load(conn)
+
+    def load(self, conn):
+        scores, likes = {}, {}
+        rows = conn.execute(select(likes_table.c.user_id, likes_table.c.article_id, likes_table.c.created_at))
+        for user_id, article_id, created_at in rows:
+            # Лайки без времени (старые базы) считаем поставленными в начале эпохи:
+            # между собой они ранжируются по количеству, любой свежий лайк весит больше
+            timestamp = created_at.replace(tzinfo=timezone.utc).timestamp() if created_at else 0.0
+            likes.setdefault(article_id, {})[user_id] = self.rate * timestamp
+            scores[article_id] = _log_add(scores.get(article_id, -math.inf), self.rate * timestamp)
+        with self._lock:
+            self._scores = scores
+            self._likes = likes
+            self._rebuild_top()
+            self.loaded = True
+
+    def record(self, user_id, article_id, liked, timestamp=None):
+        """Лайк поставлен (liked) или снят в момент timestamp (по умолчанию - сейчас)."""
+        if not self.loaded:
+            return
+        with self._lock:
+            likes = self._likes.get(article_id, {})
+            old = self._scores.get(article_id, -math.inf)
+            if liked:
+                if user_id in likes:
+                    return
+                weight = self.rate * (time.time() if timestamp is None else timestamp)
+                self._likes.setdefault(article_id, {})[user_id] = weight
+                new = _log_add(old, weight)
+            else:
+                if user_id not in likes:
+                    return
+                weight = likes.pop(user_id)
+                if not likes:
+                    del self._likes[article_id]
+                    new = -math.inf
+                else:
+                    new = _log_sub(old, weight)
+                    if old - new > RECOMPUTE_GAP:
+                        new = _log_sum(likes.values())
+            if new == -math.inf:
+                self._scores.pop(article_id, None)
+            else:
+                self._scores[article_id] = new
+            self._update_top(article_id, old, new)
+
+    def apply(self, state, timestamp=None):
+        """Результат likes.apply_toggles: {(user_id, article_id): лайк стоит}."""
+        for (user_id, article_id), liked in state.items():
+            self.record(user_id, article_id, liked, timestamp)
+
+    def top(self, k):
+        """Первые k статей: [(article_id, эффективное число лайков сейчас)]."""
+        offset = self.rate * time.time()
+        with self._lock:
+            return [(article_id, math.exp(score - offset)) for score, article_id in self._top[:k]]
+
+    def _rebuild_top(self):
+        self._top = heapq.nlargest(self.top_max, ((score, article_id) for article_id, score in self._scores.items()),
+                                   key=lambda entry: (entry[0], -entry[1]))
+
+    def _update_top(self, article_id, old, new):
+        in_top = any(entry_id == article_id for _, entry_id in self._top)
+        if in_top and new < old and len(self._scores) > len(self._top):
+            # Статья опустилась - на ее место может встать статья не из топа
+            self._rebuild_top()
+            return
+        if not in_top and len(self._top) >= self.top_max and new <= self._top[-1][0]:
+            return
+        entries = [entry for entry in self._top if entry[1] != article_id]
+        if new != -math.inf:
+            entries.append((new, article_id))
+        entries.sort(key=lambda entry: (-entry[0], entry[1]))
+        self._top = entries[:self.top_max]
@@ -0,0 +1,192 @@
+"""
+Профилирование отдельных запросов Flask-приложения (по требованию).
+
+Включается конфигом PROFILE_ENABLED. Запрос профилируется, если пришел
+заголовок X-Profile (со значением PROFILE_TOKEN, если он задан) или
+попал в случайную выборку PROFILE_SAMPLE_RATE. Режимы:
+
+- cprofile - cProfile, файл .pstats (snakeviz, python -m pstats);
+- sample - статистический сэмплер стека в отдельном потоке, файл .collapsed
+  ("свернутые" стеки для flamegraph.pl / speedscope).
+
+Одновременно профилируется не больше PROFILE_MAX_CONCURRENT запросов,
+остальные просто не захватываются - так профилировщик можно держать
+включенным под нагрузкой с небольшой долей выборки.
+Список последних захватов: GET /api/admin/profiles.
+"""
+import cProfile
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from functools import partial
+
+from flask import abort, g, jsonify, request, send_from_directory
+
+
+class StackSampler:
+    """Сэмплирует стек одного потока каждые interval секунд."""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    def __init__(self, app=None):
+        self.captures = deque()
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILE_ENABLED', os.environ.get('PROFILE_ENABLED') == '1')
+        app.config.setdefault('PROFILE_DIR', os.environ.get('PROFILE_DIR') or os.path.join(app.root_path, 'profiles'))
+        app.config.setdefault('PROFILE_MODE', os.environ.get('PROFILE_MODE', 'cprofile'))
+        app.config.setdefault('PROFILE_SAMPLE_RATE', float(os.environ.get('PROFILE_SAMPLE_RATE', 0)))
+        app.config.setdefault('PROFILE_TOKEN', os.environ.get('PROFILE_TOKEN'))
+        app.config.setdefault('PROFILE_MAX_CONCURRENT', int(os.environ.get('PROFILE_MAX_CONCURRENT', 1)))
+        app.config.setdefault('PROFILE_KEEP', int(os.environ.get('PROFILE_KEEP', 200)))
+        app.config.setdefault('PROFILE_SAMPLE_INTERVAL', float(os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.005)))
+
+        self.app = app
+        self._slots = threading.BoundedSemaphore(app.config['PROFILE_MAX_CONCURRENT'])
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._release)
+        app.add_url_rule('/api/admin/profiles', 'list_profiles', self.list_profiles)
+        app.add_url_rule('/api/admin/profiles/<path:filename>', 'download_profile', self.download_profile)
+
+    def _wanted(self):
+        config = self.app.config
+        if not config['PROFILE_ENABLED']:
+            return False
+        header = request.headers.get('X-Profile')
+        if header is not None:
+            return config['PROFILE_TOKEN'] is None or header == config['PROFILE_TOKEN']
+        return config['PROFILE_SAMPLE_RATE'] > 0 and random.random() < config['PROFILE_SAMPLE_RATE']
+
+    def _start(self):
+        if request.path.startswith('/api/admin/profiles') or not self._wanted():
+            return
+        # Свободного слота нет - этот запрос не профилируем, а не ждем
+        if not self._slots.acquire(blocking=False):
+            return
+        g.profile_slot = True
+        g.profile_start = time.perf_counter()
+        if self.app.config['PROFILE_MODE'] == 'sample':
+            g.profiler = StackSampler(threading.get_ident(), self.app.config['PROFILE_SAMPLE_INTERVAL'])
+            g.profiler.start()
+        else:
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    def _finish(self, response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        # Потоковые ответы (каталог, выгрузки) формируются уже после after_request:
+        # профиль снимаем, когда сервер закрывает ответ - после последнего отправленного байта
+        rule = request.url_rule.rule if request.url_rule else 'unmatched'
+        response.call_on_close(partial(self._close, profiler, g.profile_start, g.pop('profile_slot', False),
+                                       request.method, request.path, rule, response.status_code))
+        return response
+
+    def _close(self, profiler, start, slot, method, path, rule, status):
+        elapsed = time.perf_counter() - start
+        if isinstance(profiler, StackSampler):
+            profiler.stop()
+        else:
+            profiler.disable()
+
+        try:
+            self._save(profiler, elapsed, method, path, rule, status)
+        except OSError as e:
+            print(f"[PROFILE] Не удалось сохранить профиль: {e}")
+        finally:
+            if slot:
+                self._slots.release()
+
+    def _release(self, exc):
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            # Запрос упал до after_request - просто останавливаем профилировщик
+            profiler.stop() if isinstance(profiler, StackSampler) else profiler.disable()
+        # Слот профилируемого ответа освобождает _close
+        if g.pop('profile_slot', False):
+            self._slots.release()
+
+    def _save(self, profiler, elapsed, method, path, rule, status):
+        directory = self.app.config['PROFILE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        created = datetime.now(timezone.utc)
+        endpoint = rule.strip('/').replace('/', '_') or 'root'
+        extension = 'collapsed' if isinstance(profiler, StackSampler) else 'pstats'
+        filename = f"{created:%Y%m%dT%H%M%S%f}_{method}_{endpoint}.{extension}"
+        file_path = os.path.join(directory, filename)
+        profiler.dump(file_path) if isinstance(profiler, StackSampler) else profiler.dump_stats(file_path)
+
+        capture = {
+            'file': filename,
+            'method': method,
+            'path': path,
+            'status': status,
+            'durationMs': round(elapsed * 1000, 2),
+            'mode': extension,
+            'created': created.isoformat(),
+        }
+        with self._lock:
+            self.captures.append(capture)
+            # Храним только последние PROFILE_KEEP профилей
+            while len(self.captures) > self.app.config['PROFILE_KEEP']:
+                old = self.captures.popleft()
+                try:
+                    os.remove(os.path.join(directory, old['file']))
+                except OSError:
+                    pass
+        print(f"[PROFILE] {method} {path} {capture['durationMs']} ms -> {file_path}")
+
+    def _check_admin(self):
+        token = self.app.config['PROFILE_TOKEN']
+        if not self.app.config['PROFILE_ENABLED'] or (token and request.headers.get('X-Profile-Token') != token):
+            abort(404)
+
+    def list_profiles(self):
+        self._check_admin()
+        with self._lock:
+            captures = list(reversed(self.captures))
+        return jsonify(captures)
+
+    def download_profile(self, filename):
+        self._check_admin()
+        return send_from_directory(self.app.config['PROFILE_DIR'], filename, as_attachment=True)
@@ -0,0 +1,175 @@
+"""
+Кэш ответов каталога (/api/articles, /api/users, ...) с условными GET.
+
+DataVersion - номер версии данных процесса. Соединение, выполнившее
+INSERT/UPDATE/DELETE/COPY, помечается (событие after_cursor_execute), при
+коммите пометка подтверждается, а версия растет, когда соединение вернулось
+в пул, т.е. уже после коммита. Так ответ, собранный при версии v, никогда не
+содержит данных старше v. Записи в другом процессе (main.py, второй
+экземпляр приложения) эта версия не видит - для них есть RESPONSE_CACHE_TTL.
+
+ResponseCache.cached - декоратор маршрута: тело ответа 200 кэшируется по
+(путь, параметры, версия), получает слабый ETag по содержимому
+(If-None-Match -> 304 без тела) и сжимается gzip или br (если установлен
+пакет brotli) один раз на версию, а не на каждый запрос.
+"""
+import gzip
+import hashlib
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, request
+from sqlalchemy import event
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+import metrics
+
+DML_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'COPY')
+
+RESPONSE_CACHE_REQUESTS = metrics.REGISTRY.counter(
+    'response_cache_requests_total', 'Обращения к кэшу ответов', ['endpoint', 'result'])
+
+
+class DataVersion:
+    """Счетчик изменений данных; растет после каждого коммита с записью."""
+
+    def __init__(self, engine=None):
+        self.value = 0
+        self._lock = threading.Lock()
+        if engine is not None:
+            self.watch(engine)
+
+    def bump(self):
+        with self._lock:
+            self.value += 1
+
+    def watch(self, engine):
+        @event.listens_for(engine, 'after_cursor_execute')
+        def _mark_write(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip()[:6].upper().startswith(DML_PREFIXES):
+                conn.info['dml'] = True
+
+        @event.listens_for(engine, 'commit')
+        def _confirm_write(conn):
+            if conn.info.pop('dml', False):
+                conn.info['committed_dml'] = True
+
+        @event.listens_for(engine, 'rollback')
+        def _discard_write(conn):
+            conn.info.pop('dml', None)
+
+        # checkin - соединение вернулось в пул, коммит к этому моменту завершен
+        @event.listens_for(engine.pool, 'checkin')
+        def _publish_write(dbapi_connection, connection_record):
+            if connection_record.info.pop('committed_dml', False):
+                self.bump()
+
+
+class _Entry:
+    __slots__ = ('version', 'created', 'etag', 'mimetype', 'bodies')
+
+    def __init__(self, version, body, mimetype):
+        self.version = version
+        self.created = time.monotonic()
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.mimetype = mimetype
+        self.bodies = {'identity': body}  # кодировка -> тело, сжатые варианты добавляются по запросу
+
+
+class ResponseCache:
+    def __init__(self, app=None, version=None):
+        self.version = version or DataVersion()
+        self._entries = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESPONSE_CACHE_ENABLED', os.environ.get('RESPONSE_CACHE_ENABLED', '1') == '1')
+        # 0 - без ограничения: данные меняет только этот процесс
+        app.config.setdefault('RESPONSE_CACHE_TTL', float(os.environ.get('RESPONSE_CACHE_TTL', 0)))
+        app.config.setdefault('RESPONSE_CACHE_COMPRESS', os.environ.get('RESPONSE_CACHE_COMPRESS', '1') == '1')
+        app.config.setdefault('RESPONSE_CACHE_MIN_SIZE', int(os.environ.get('RESPONSE_CACHE_MIN_SIZE', 1024)))
+        app.config.setdefault('RESPONSE_CACHE_MAX_ENTRIES', int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 256)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def cached(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            config = current_app.config
+            if not config['RESPONSE_CACHE_ENABLED']:
+                return view(*args, **kwargs)
+            endpoint = request.url_rule.rule
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            version = self.version.value  # Читаем до сборки ответа (см. DataVersion)
+            entry = self._entries.get(key)
+            ttl = config['RESPONSE_CACHE_TTL']
+            if entry is None or entry.version != version or (ttl and time.monotonic() - entry.created > ttl):
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                # Потоковый ответ (serialization.stream_json_array) собирается целиком один раз на версию
+                entry = _Entry(version, response.get_data(), response.mimetype)
+                self._store(key, entry, config['RESPONSE_CACHE_MAX_ENTRIES'])
+                result = 'miss'
+            else:
+                result = 'hit'
+
+            if request.if_none_match.contains_weak(entry.etag):
+                RESPONSE_CACHE_REQUESTS.inc(endpoint=endpoint, result='not_modified')
+                response = current_app.response_class(status=304)
+            else:
+                RESPONSE_CACHE_REQUESTS.inc(endpoint=endpoint, result=result)
+                encoding = self._encoding(entry, config)
+                response = current_app.response_class(self._body(entry, encoding), mimetype=entry.mimetype)
+                if encoding != 'identity':
+                    response.headers['Content-Encoding'] = encoding
+            response.set_etag(entry.etag, weak=True)
+            # Клиент хранит ответ, но перед использованием переспрашивает (дешевый 304)
+            response.headers['Cache-Control'] = 'no-cache'
+            response.vary.add('Accept-Encoding')
+            return response
+
+        return wrapper
+
+    def _store(self, key, entry, max_entries):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            if len(self._entries) > max_entries:
+                # Сначала выбрасываем устаревшие версии, затем самые старые записи
+                current = self.version.value
+                for stale in [k for k, e in self._entries.items() if e.version != current]:
+                    del self._entries[stale]
+                while len(self._entries) > max_entries:
+                    del self._entries[next(iter(self._entries))]
+
+    @staticmethod
+    def _encoding(entry, config):
+        if not config['RESPONSE_CACHE_COMPRESS'] or len(entry.bodies['identity']) < config['RESPONSE_CACHE_MIN_SIZE']:
+            return 'identity'
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return 'identity'
+
+    @staticmethod
+    def _body(entry, encoding):
+        body = entry.bodies.get(encoding)
+        if body is None:
+            identity = entry.bodies['identity']
+            # Гонка двух потоков приведет лишь к двойному сжатию, результат одинаковый
+            body = brotli.compress(identity, quality=5) if encoding == 'br' else gzip.compress(identity, 6)
+            entry.bodies[encoding] = body
+        return body
@@ -0,0 +1,124 @@
+"""
+Быстрая сериализация ответов API.
+
+FastJSONProvider - JSON-провайдер Flask (app.json): через него работают
+jsonify и потоковая выдача. Кодировщик выбирается конфигом JSON_ENCODER:
+"orjson" (пакет orjson, в разы быстрее), "json" (стандартный модуль) или
+"auto" - orjson, если установлен. Ответ кодируется сразу в байты UTF-8,
+без отступов и сортировки ключей.
+
+stream_json_array(items) отдает большой массив кусками по chunk_size
+элементов (Transfer-Encoding: chunked): память ограничена одним куском,
+клиент начинает получать данные до окончания выборки.
+stream_rows(columns, rows, fmt) - то же для плоских строк в NDJSON или CSV.
+"""
+import csv
+import io
+import json
+import os
+from datetime import date
+
+from flask import current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ENCODERS = ('auto', 'orjson', 'json')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def __init__(self, app):
+        super().__init__(app)
+        encoder = app.config.setdefault('JSON_ENCODER', os.environ.get('JSON_ENCODER', 'auto'))
+        if encoder not in ENCODERS:
+            raise ValueError(f"Неизвестный JSON_ENCODER: {encoder} (доступны: {', '.join(ENCODERS)})")
+        if encoder == 'orjson' and orjson is None:
+            raise RuntimeError("JSON_ENCODER=orjson, но пакет orjson не установлен")
+        self.encoder = 'orjson' if encoder == 'auto' and orjson is not None else encoder
+        if self.encoder == 'auto':
+            self.encoder = 'json'
+
+    def dumps_bytes(self, obj):
+        if self.encoder == 'orjson':
+            # default - даты, Decimal, UUID и т.п. как у Flask (TypeError для остального)
+            return orjson.dumps(obj, default=self.default)
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=self.default).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        # Параметры форматирования (indent, sort_keys) поддерживает только стандартный модуль
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if self.encoder == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def stream_json_array(items, chunk_size=500):
+    """Потоковый ответ с JSON-массивом из итерируемого items."""
+    dumps = current_app.json.dumps_bytes
+
+    def generate():
+        yield b'['
+        separator = b''
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                # Кусок кодируется одним вызовом: dumps(список) без внешних скобок
+                yield separator + dumps(chunk)[1:-1]
+                separator, chunk = b',', []
+        if chunk:
+            yield separator + dumps(chunk)[1:-1]
+        yield b']'
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+
+def _plain(value):
+    # Даты - ISO 8601 в обоих кодировщиках (стандартный провайдер Flask выдал бы формат HTTP)
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def stream_rows(columns, rows, fmt='ndjson', chunk_size=500):
+    """Потоковый ответ со строками rows (кортежи в порядке columns): NDJSON или CSV с заголовком."""
+    dumps = current_app.json.dumps_bytes
+
+    def chunks():
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def generate_ndjson():
+        for chunk in chunks():
+            yield b''.join(dumps(dict(zip(columns, map(_plain, row)))) + b'\n' for row in chunk)
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for chunk in chunks():
+            writer.writerows([[_plain(value) for value in row] for row in chunk])
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+    if fmt == 'csv':
+        return current_app.response_class(stream_with_context(generate_csv()), mimetype='text/csv')
+    return current_app.response_class(stream_with_context(generate_ndjson()), mimetype='application/x-ndjson')
@@ -0,0 +1,21 @@
+"""
+Общие настройки тестов: модули database/ импортируются "плоско", как в app.py,
+а база - временный файл SQLite (SCIENCE_DB_PATH задается до импорта database).
+TEST_DATABASE_URL - прогнать тесты на другой СУБД (DATABASE_URL рабочей базы не используется).
+"""
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_DIR = os.path.join(ROOT_DIR, 'database')
+for path in (ROOT_DIR, DATABASE_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+TEST_DIR = tempfile.mkdtemp(prefix='science-tests-')
+os.environ['SCIENCE_DB_PATH'] = os.path.join(TEST_DIR, 'science_articles.db')
+if os.environ.get('TEST_DATABASE_URL'):
+    os.environ['DATABASE_URL'] = os.environ['TEST_DATABASE_URL']
+else:
+    os.environ.pop('DATABASE_URL', None)
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from arxiv_async import ArxivClientThread, AsyncArxivClient, TokenBucket
+from arxiv_parser import ArxivorgArticleParser
+from arxiv_replay import StubServer
+from metrics import PARSER_RETRIES
+
+
+class ScriptedStub(StubServer):
+    """StubServer, у которого первые ответы заданы списком (статус, Retry-After), дальше - как обычно."""
+
+    def __init__(self, script, **options):
+        super().__init__(**options)
+        self.script = list(script)
+
+    def _admit(self):
+        with self._lock:
+            if self.script:
+                self.stats['requests'] += 1
+                return self.script.pop(0)
+        return super()._admit()
+
+
+def queries(stub):
+    return [url.split('query=', 1)[1].replace('+', ' ') for url in stub.transport.urls]
+
+
+def stub_parser(stub):
+    parser = ArxivorgArticleParser()
+    parser.SEARCH_URL = stub.search_url
+    return parser
+
+
+async def fetch_all(stub, targets, **options):
+    options = {'concurrency': 4, 'rate': 100, 'burst': 4, 'backoff_base': 0.01, **options}
+    async with AsyncArxivClient(parser=stub_parser(stub), **options) as client:
+        return await asyncio.gather(*(client.fetch_page(target) for target in targets))
+
+
+def retries(reason):
+    return PARSER_RETRIES._values.get(('arxiv.org', reason), 0)
+
+
+def test_retries_server_errors_and_429():
+    with ScriptedStub([(503, None), (500, None), (429, 0.0)]) as stub:
+        before = {reason: retries(reason) for reason in ('503', '500', '429')}
+        pages = asyncio.run(fetch_all(stub, queries(stub)[:1]))
+    assert pages[0] and 'arxiv-result' in pages[0]
+    assert stub.stats['statuses'] == {503: 1, 500: 1, 429: 1, 200: 1}
+    assert {reason: retries(reason) - before[reason] for reason in before} == {'503': 1, '500': 1, '429': 1}
+
+
+def test_gives_up_after_max_retries():
+    with ScriptedStub([(503, None)] * 3) as stub:
+        pages = asyncio.run(fetch_all(stub, queries(stub)[:1], max_retries=2))
+    assert pages == [None]
+    assert stub.stats['requests'] == 3
+
+
+def test_retry_after_pauses_requests_waiting_for_semaphore():
+    # Один запрос за раз, маркеры у всех уже есть (burst): после 429 остальные
+    # не должны уходить на сервер, пока не истечет Retry-After
+    with StubServer(max_rate=1, retry_after=1.0) as stub:
+        start = time.monotonic()
+        pages = asyncio.run(fetch_all(stub, queries(stub)[:3], concurrency=1, burst=3))
+        elapsed = time.monotonic() - start
+    assert all(pages)
+    assert stub.stats['statuses'][429] >= 1
+    assert stub.stats['violations'] == 0
+    assert elapsed >= stub.stats['statuses'][429] * 1.0
+
+
+def test_token_bucket_limits_request_rate():
+    with StubServer() as stub:
+        targets = queries(stub)[:6]
+        start = time.monotonic()
+        pages = asyncio.run(fetch_all(stub, targets, rate=10, burst=1))
+        elapsed = time.monotonic() - start
+    assert all(pages)
+    # Первый маркер есть сразу, следующие пять - по одному в 0.1 с
+    assert elapsed >= 0.45
+
+
+def test_token_bucket_pause_blocks_acquire():
+    async def scenario():
+        bucket = TokenBucket(rate=1000, burst=5)
+        bucket.pause(0.2)
+        start = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(scenario()) >= 0.19
+
+
+def test_timeout_cancels_request_and_frees_client():
+    with StubServer(delay=3.0) as stub:
+        client = ArxivClientThread(timeout=0.3, parser=stub_parser(stub), concurrency=2)
+        try:
+            start = time.monotonic()
+            assert client.parse(queries(stub)[0]) == []
+            assert time.monotonic() - start < 1.5
+            # Отмена дошла до цикла событий: семафор освобожден, соединение возвращено
+            deadline = time.monotonic() + 2
+            while client.client._semaphore._value != 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert client.client._semaphore._value == 2
+        finally:
+            client.close()
@@ -0,0 +1,100 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+
+from author_index import AuthorIndex, block_key, candidate_keys, name_tokens, parse_name
+from database import AuthorAlias, Session, engine, register_author_aliases
+
+
+@pytest.mark.parametrize('name, tokens', [
+    ('Петров П.П.', ['petrov', 'p', 'p']),
+    ('Yu. Gagarin', ['i', 'gagarin']),
+    ('John Smith Jr.', ['iohn', 'smith']),
+])
+def test_name_tokens(name, tokens):
+    assert name_tokens(name) == tokens
+
+
+@pytest.mark.parametrize('name, parts', [
+    ('A. Khokhlov', ('hohlov', 'a')),
+    ('Alexei Khokhlov', ('hohlov', 'aleksei')),
+    ('Aleksey Khokhlov', ('hohlov', 'aleksei')),
+    ('Петров П.П.', ('petrov', 'p')),
+    # Отчество - фамилия первая
+    ('Иванов Иван Иванович', ('ivanov', 'ivan')),
+    ('123', None),
+])
+def test_parse_name(name, parts):
+    assert parse_name(name) == parts
+
+
+def test_candidate_keys_cover_both_orders():
+    assert candidate_keys('Хохлов Алексей') == ['aleksei hohlov', 'hohlov aleksei']
+    assert candidate_keys('A. Khokhlov') == ['hohlov a']
+
+
+def test_build_merges_spellings_and_unique_initials():
+    index = AuthorIndex.build(['A. Khokhlov', 'Alexei Khokhlov', 'Alexei Khokhlov', 'Aleksey Khokhlov'])
+    assert set(index.aliases.values()) == {'hohlov aleksei'}
+    # Самое частое написание
+    assert index.display_name('hohlov aleksei') == 'Alexei Khokhlov'
+    # Новое написание кириллицей, в том числе в порядке "Фамилия Имя"
+    assert index.resolve('Хохлов Алексей') == 'hohlov aleksei'
+    assert index.resolve('Nobody Here') is None
+
+
+def test_ambiguous_initials_stay_separate():
+    index = AuthorIndex.build(['A. Ivanov', 'Andrei Ivanov', 'Artem Ivanov'])
+    assert index.key('A. Ivanov') == 'ivanov a'
+    assert index.key('Andrei Ivanov') != index.key('Artem Ivanov')
+    assert index.display_name('ivanov a') == 'A. Ivanov'
+
+
+def unique_surname():
+    """Фамилия, которой еще нет в общей тестовой базе (только буквы, без транслитерации)."""
+    return 'Zz' + uuid4().hex.translate(str.maketrans('0123456789', 'abcdefghik'))
+
+
+def alias_keys(session, names):
+    return {alias.name: alias.author_key for alias in session.query(AuthorAlias).filter(AuthorAlias.name.in_(names))}
+
+
+def test_register_author_aliases_batch_uses_one_block_query():
+    surname, other = unique_surname(), unique_surname()
+    names = [f'A. {surname}', f'Alexei {surname}', f'B. {other}']
+    statements = []
+
+    def count_alias_selects(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith('SELECT') and 'author_aliases' in statement:
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count_alias_selects)
+    try:
+        with Session.begin() as session:
+            register_author_aliases(session, names)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_alias_selects)
+    # Уже известные имена + ключи всех блоков пачки
+    assert len(statements) == 2
+
+    with Session() as session:
+        keys = alias_keys(session, names)
+    # Инициалы из той же пачки приклеены к полному имени, одиночные инициалы - ключ блока
+    assert keys[f'A. {surname}'] == keys[f'Alexei {surname}'] != block_key(*parse_name(f'A. {surname}'))
+    assert keys[f'B. {other}'] == block_key(*parse_name(f'B. {other}'))
+
+
+def test_register_author_aliases_attaches_stored_initials():
+    surname = unique_surname()
+    with Session.begin() as session:
+        register_author_aliases(session, [f'A. {surname}'])
+    with Session.begin() as session:
+        register_author_aliases(session, [f'Alexei {surname}', f'Andrei {surname}'])
+    with Session.begin() as session:
+        register_author_aliases(session, [f'A. {surname}', f'A.  {surname}'])
+    with Session() as session:
+        keys = alias_keys(session, [f'A. {surname}', f'Alexei {surname}', f'Andrei {surname}', f'A.  {surname}'])
+    assert keys[f'A. {surname}'] in {keys[f'Alexei {surname}'], keys[f'Andrei {surname}']}
+    # Два полных имени в блоке: новые инициалы неоднозначны
+    assert keys[f'A.  {surname}'] == block_key(*parse_name(f'A. {surname}'))
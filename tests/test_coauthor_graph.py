@@ -0,0 +1,48 @@
+import pandas as pd
+from sqlalchemy import text
+
+from coauthor_graph import coauthor_edges, count_pairs, edge_rows, rebuild_edges
+from database import ArticleDTO, CoauthorEdge, engine, save_list_of_articles
+
+
+def test_count_pairs_orders_and_deduplicates_names():
+    counts = count_pairs([['Petrov P.', 'Ivanov I.', 'Ivanov I.'], ['Ivanov I.', 'Petrov P.', ''], ['Solo S.']])
+    assert counts == {('Ivanov I.', 'Petrov P.'): 2}
+    assert edge_rows(counts) == [{'author_a': 'Ivanov I.', 'author_b': 'Petrov P.', 'articles': 2}]
+
+
+def test_coauthor_edges_matches_count_pairs():
+    authors = pd.DataFrame({
+        'article_id': [1, 1, 1, 2, 2, 3, 3],
+        'name': ['Ivanov I.', 'Petrov P.', 'Sidorov S.', 'Petrov P.', 'Ivanov I.', 'Ivanov I.', None],
+    })
+    edges = coauthor_edges(authors)
+    by_pair = {(row.author_a, row.author_b): row.articles for row in edges.itertuples()}
+    assert by_pair == count_pairs([['Ivanov I.', 'Petrov P.', 'Sidorov S.'], ['Petrov P.', 'Ivanov I.']])
+
+
+def edges_of(names):
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT author_a, author_b, articles FROM coauthor_edges")).all()
+    return sorted(row for row in rows if row[0] in names)
+
+
+def test_edges_are_maintained_on_save_and_match_rebuild():
+    names = ['Edge Anna', 'Edge Boris', 'Edge Clara']
+    save_list_of_articles([
+        ArticleDTO('arxiv.org', 'https://arxiv.org', 'Coauthor edges incremental maintenance part one',
+                   names, 'https://arxiv.org/abs/2402.11111', 'IT'),
+        ArticleDTO('arxiv.org', 'https://arxiv.org', 'Coauthor edges incremental maintenance part two',
+                   names[:2], 'https://arxiv.org/abs/2402.22222', 'IT'),
+    ])
+    # Повтор статьи (другая версия того же arXiv id) пары не меняет
+    save_list_of_articles([
+        ArticleDTO('arxiv.org', 'https://arxiv.org', 'Coauthor edges incremental maintenance part two',
+                   names[:2], 'https://arxiv.org/pdf/2402.22222v2', 'IT'),
+    ])
+    expected = [('Edge Anna', 'Edge Boris', 2), ('Edge Anna', 'Edge Clara', 1), ('Edge Boris', 'Edge Clara', 1)]
+    assert edges_of(names) == expected
+
+    with engine.begin() as conn:
+        rebuild_edges(conn, CoauthorEdge.__table__)
+    assert edges_of(names) == expected
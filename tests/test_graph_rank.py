@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from database import ScienceRecommender, engine
+from graph_rank import personalized_pagerank, walk_matrix
+
+
+def adjacency(n, edges):
+    rows, cols = zip(*edges)
+    matrix = sparse.coo_matrix((np.ones(len(edges)), (rows, cols)), shape=(n, n))
+    return (matrix + matrix.T).tocsr()
+
+
+def test_pagerank_mass_and_distance():
+    # Цепочка 0 - 1 - 2 - 3 и изолированная вершина 4
+    walk = walk_matrix(adjacency(5, [(0, 1), (1, 2), (2, 3)]))
+    scores, iterations = personalized_pagerank(walk, np.array([0, 4]), max_iter=50, tol=1e-7)
+
+    assert scores.dtype == np.float32
+    assert 2 <= iterations <= 50
+    np.testing.assert_allclose(scores.sum(axis=0), 1.0, rtol=1e-5)
+    # Ближе к seed - больше вероятность
+    assert scores[0, 0] > scores[1, 0] > scores[2, 0] > scores[3, 0] > 0
+    assert scores[4, 0] == 0
+    # Из вершины без ребер блуждание остается в seed
+    np.testing.assert_allclose(scores[:, 1], [0, 0, 0, 0, 1])
+
+
+def test_pagerank_stops_at_deadline_after_min_iter():
+    walk = walk_matrix(adjacency(4, [(0, 1), (1, 2), (2, 3)]))
+    _, iterations = personalized_pagerank(walk, np.array([0]), max_iter=50, tol=0, deadline=0, min_iter=2)
+    assert iterations == 2
+
+
+@pytest.fixture
+def recommender():
+    """
+    Пять авторов: 0 и 3 - соавторы, 3 и 2 - соавторы (2 - соавтор соавтора для 0).
+    По тексту 0 похож на 1, а на 2 - ниже порога 0.05.
+    """
+    texts = np.array([[1.0, 0.0], [0.6, 0.8], [0.03, 1.0], [0.0, 1.0], [0.0, 1.0]])
+    texts /= np.linalg.norm(texts, axis=1, keepdims=True)
+    recommender = ScienceRecommender(engine, graph_weight=0.5)
+    recommender.tfidf_matrix = sparse.csr_matrix(texts)
+    links = adjacency(5, [(0, 3), (3, 2)])
+    recommender.coauthors_matrix = links
+    recommender.walk_matrix = walk_matrix(links)
+    return recommender
+
+
+def test_text_cutoff_applies_before_blending(recommender):
+    top, top_scores, via_graph = recommender._top_candidates(np.array([0]), k=3)
+    candidates = [int(i) for i, score in zip(top[0], top_scores[0]) if score > -np.inf]
+    # 2 близок по графу, но по тексту - мусор: граф не вытягивает его выше порога
+    assert candidates == [1]
+    assert top_scores[0, 0] == pytest.approx(0.5 * 0.6)
+    assert not via_graph[0, 0]
+
+
+def test_graph_blend_is_opt_in(monkeypatch):
+    monkeypatch.delenv('RECOMMENDER_GRAPH_WEIGHT', raising=False)
+    assert ScienceRecommender(engine).graph_weight == 0
+    monkeypatch.setenv('RECOMMENDER_GRAPH_WEIGHT', '0.3')
+    assert ScienceRecommender(engine).graph_weight == 0.3
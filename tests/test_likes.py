@@ -0,0 +1,94 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+
+from database import Article, Session, User, likes_table
+from likes import LikeBuffer, apply_toggles, toggle_like
+
+
+@pytest.fixture
+def ids():
+    """Пользователь и две статьи: (user_id, [article_id, article_id])."""
+    with Session.begin() as session:
+        user = User(email=f'likes-{uuid4().hex}@example.com', first_name='Like', last_name='Tester')
+        articles = [Article(title=f'Like target {i}', like_count=0) for i in range(2)]
+        session.add_all([user, *articles])
+        session.flush()
+        return user.id, [article.id for article in articles]
+
+
+def like_count(article_id):
+    with Session() as session:
+        return session.get(Article, article_id).like_count
+
+
+def liked(user_id, article_id):
+    with Session() as session:
+        return session.execute(select(likes_table).where(
+            likes_table.c.user_id == user_id, likes_table.c.article_id == article_id)).first() is not None
+
+
+def test_apply_toggles_flips_likes_and_counts(ids):
+    user_id, (first, second) = ids
+    with Session.begin() as session:
+        state = apply_toggles(session.connection(), [(user_id, first), (user_id, second), (user_id, first)])
+    # Повтор пары в одном вызове - одно переключение
+    assert state == {(user_id, first): True, (user_id, second): True}
+    assert like_count(first) == 1 and liked(user_id, first)
+
+    with Session.begin() as session:
+        assert apply_toggles(session.connection(), [(user_id, first)]) == {(user_id, first): False}
+    assert like_count(first) == 0 and not liked(user_id, first)
+    assert like_count(second) == 1
+
+
+def test_unknown_user_or_article_is_skipped(ids):
+    user_id, (first, _) = ids
+    with Session.begin() as session:
+        assert apply_toggles(session.connection(), [(user_id, 10 ** 9), (10 ** 9, first)]) == {}
+        with pytest.raises(LookupError):
+            toggle_like(session.connection(), user_id, 10 ** 9)
+    assert like_count(first) == 0
+
+
+def test_buffer_cancels_even_toggles_and_notifies_listener(ids):
+    user_id, (first, second) = ids
+    committed = []
+    buffer = LikeBuffer(Session, interval=60, listener=committed.append)
+    try:
+        buffer.toggle(user_id, first)
+        buffer.toggle(user_id, first)
+        buffer.toggle(user_id, second)
+        assert buffer.pending() == 2
+        assert buffer.flush() == 1
+        assert committed == [{(user_id, second): True}]
+        assert buffer.pending() == 0
+        assert like_count(first) == 0 and like_count(second) == 1
+
+        buffer.toggle(user_id, second)
+    finally:
+        buffer.close()
+    # close сбрасывает остаток
+    assert like_count(second) == 0
+    assert committed[-1] == {(user_id, second): False}
+
+
+def test_failed_flush_keeps_pending_toggles(ids):
+    user_id, (first, _) = ids
+
+    class BrokenSessions:
+        def begin(self):
+            raise ConnectionError('database is down')
+
+    buffer = LikeBuffer(BrokenSessions(), interval=60)
+    try:
+        buffer.toggle(user_id, first)
+        with pytest.raises(ConnectionError):
+            buffer.flush()
+        assert buffer.pending() == 1
+        buffer.session_factory = Session
+        assert buffer.flush() == 1
+    finally:
+        buffer.close()
+    assert like_count(first) == 1
@@ -0,0 +1,38 @@
+import pytest
+
+import app as app_module
+import metrics
+
+
+def series(histogram, **labels):
+    """(sum, count) ряда гистограммы с метками labels; (0, 0) - наблюдений не было."""
+    key = tuple(labels.get(name, '') for name in histogram.labelnames)
+    with histogram._lock:
+        values = histogram._series.get(key)
+        return (values[-2], values[-1]) if values else (0.0, 0)
+
+
+@pytest.fixture
+def client():
+    app_module.app.config['TESTING'] = True
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize('path, endpoint', [
+    ('/api/export/articles', '/api/export/<kind>'),
+    ('/api/users', '/api/users'),
+])
+def test_streamed_response_is_measured_after_body(client, path, endpoint):
+    queries_before = series(metrics.HTTP_REQUEST_SQL_QUERIES, endpoint=endpoint)
+
+    response = client.get(path)
+    # Тело еще не прочитано: запрос не завершен, в метриках его нет
+    assert series(metrics.HTTP_REQUEST_SQL_QUERIES, endpoint=endpoint) == queries_before
+    response.get_data()
+    response.close()
+
+    queries_sum, queries_count = series(metrics.HTTP_REQUEST_SQL_QUERIES, endpoint=endpoint)
+    assert queries_count == queries_before[1] + 1
+    # SQL выполняется генератором тела ответа - он должен попасть в метрики запроса
+    assert queries_sum > queries_before[0]
+    assert metrics._current_stats.get() is None
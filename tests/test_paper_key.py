@@ -0,0 +1,37 @@
+import pytest
+
+from paper_key import arxiv_id, normalize_url, paper_key, title_fingerprint
+
+
+@pytest.mark.parametrize('url', [
+    'https://arxiv.org/abs/2401.01234',
+    'https://arxiv.org/abs/2401.01234v3',
+    'http://www.arxiv.org/pdf/2401.01234v1',
+    'https://arxiv.org/format/2401.01234',
+    'arXiv:2401.01234v2',
+])
+def test_arxiv_versions_and_mirrors_share_a_key(url):
+    assert paper_key(url, 'Any title') == 'arxiv:2401.01234'
+
+
+def test_old_style_arxiv_id():
+    assert arxiv_id('https://arxiv.org/abs/cond-mat/0206219v2') == 'cond-mat/0206219'
+    assert arxiv_id('https://example.org/paper') is None
+
+
+def test_title_key_ignores_case_accents_and_punctuation():
+    first = paper_key('https://journal.org/a', 'Schrödinger equation: a NEW approach')
+    second = paper_key('https://other.org/b', 'schrodinger  equation -- a new approach!')
+    assert first == second
+    assert first.startswith('title:')
+
+
+def test_short_titles_fall_back_to_url():
+    assert title_fingerprint('Erratum') is None
+    assert paper_key('https://www.Journal.org/erratum/', 'Erratum') == 'url:journal.org/erratum'
+    assert normalize_url('http://journal.org/x?id=1') == 'journal.org/x?id=1'
+
+
+def test_nothing_to_key_on():
+    assert paper_key('', '') is None
+    assert paper_key(None, None) is None
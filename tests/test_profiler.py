@@ -0,0 +1,37 @@
+import os
+import pstats
+
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'PROFILE_ENABLED', True)
+    monkeypatch.setitem(app_module.app.config, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setitem(app_module.app.config, 'PROFILE_MODE', 'cprofile')
+    monkeypatch.setitem(app_module.app.config, 'PROFILE_TOKEN', None)
+    app_module.app.config['TESTING'] = True
+    return app_module.app.test_client()
+
+
+def test_streamed_response_is_profiled_after_body(client, tmp_path):
+    captures_before = len(app_module.profiler.captures)
+
+    response = client.get('/api/export/articles', headers={'X-Profile': '1'})
+    # Тело еще не отдано: профиль не снят
+    assert len(app_module.profiler.captures) == captures_before
+    response.get_data()
+    response.close()
+
+    capture = app_module.profiler.captures[-1]
+    assert capture['path'] == '/api/export/articles' and capture['status'] == 200
+    stats = pstats.Stats(os.path.join(tmp_path, capture['file']))
+    functions = {name for _, _, name in stats.stats}
+    # Запрос каталога выполняется генератором тела ответа - он должен попасть в профиль
+    assert 'iter_export' in functions
+    assert 'execute' in functions
+    # Слот профилировщика освобожден: следующий запрос тоже профилируется
+    client.get('/api/export/articles', headers={'X-Profile': '1'}).close()
+    assert len(app_module.profiler.captures) == captures_before + 2
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+import app as app_module
+from database import ScienceRecommender, engine
+
+
+@pytest.fixture
+def client():
+    app_module.app.config['TESTING'] = True
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize('payload, error', [
+    ({'authors': ['Ivanov I.'], 'topN': 'many'}, 'Invalid topN'),
+    ({'authors': ['Ivanov I.'], 'topN': None}, 'Invalid topN'),
+    ({'authors': ['Ivanov I.'], 'topN': [3]}, 'Invalid topN'),
+    ({'authors': 'Ivanov I.'}, 'Invalid authors'),
+    ({'authors': ['Ivanov I.', 42]}, 'Invalid authors'),
+    (['Ivanov I.'], 'Invalid authors'),
+])
+def test_invalid_input_is_rejected_before_streaming(client, payload, error):
+    response = client.post('/api/recommendations/batch', json=payload)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
+
+
+def test_valid_input_streams_one_line_per_author(client):
+    response = client.post('/api/recommendations/batch', json={'authors': ['Nobody Known', 'Also Unknown'], 'topN': '2'})
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    assert [app_module.app.json.loads(line)['author'] for line in lines] == ['Nobody Known', 'Also Unknown']
+
+
+NAMES = ['Anna Alpha', 'Boris Beta', 'Clara Gamma', 'Denis Delta', 'Elena Epsilon', 'Fedor Zeta']
+DIRECTIONS = ['IT', 'IT', 'Physics', 'Physics', 'Biology', 'Biology']
+VECTORS = np.array([[1.0, 0.0, 0.0], [0.9, 0.3, 0.1], [0.7, 0.7, 0.0],
+                    [0.2, 1.0, 0.0], [0.0, 0.1, 1.0], [0.0, 0.0, 1.0]])
+COAUTHORS = [('Anna Alpha', 'Boris Beta')]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    """Шесть авторов с заданными векторами текстов; Anna Alpha и Boris Beta - соавторы."""
+    model = ScienceRecommender(engine, graph_weight=0)
+    model.index_authors(pd.DataFrame({'author_name': NAMES, 'text_content': '', 'article_direction': DIRECTIONS}))
+    model.index_coauthors(pd.DataFrame(COAUTHORS, columns=['author_a', 'author_b']))
+    # Строки матрицы - в порядке индексов авторов модели
+    vectors = VECTORS[[NAMES.index(name) for name in model.author_names]]
+    model.tfidf_matrix = sparse.csr_matrix(vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+    monkeypatch.setattr(app_module.recommender, 'model', model)
+    return model
+
+
+def expected_recommendations(name, top_n):
+    """Рекомендации одного автора перебором: без себя, соавторов и сходства ниже 0.05."""
+    vectors = VECTORS / np.linalg.norm(VECTORS, axis=1, keepdims=True)
+    i = NAMES.index(name)
+    excluded = {i} | {NAMES.index(b if a == name else a) for a, b in COAUTHORS if name in (a, b)}
+    scores = vectors @ vectors[i]
+    candidates = sorted((j for j in range(len(NAMES)) if j not in excluded and scores[j] >= 0.05),
+                        key=lambda j: -scores[j])[:top_n]
+    return [(NAMES[j], round(float(scores[j]) * (1.2 if DIRECTIONS[j] != DIRECTIONS[i] else 1) * 100, 1))
+            for j in candidates]
+
+
+@pytest.mark.parametrize('top_n', [1, 2, 10])
+def test_batch_matches_single_author_recommendations(client, model, top_n):
+    authors = [*NAMES, 'Nobody Known']
+    response = client.post('/api/recommendations/batch', json={'authors': authors, 'topN': top_n})
+    lines = [app_module.app.json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['author'] for line in lines] == authors
+
+    for line in lines:
+        single = app_module.recommender.get_recommendations(line['author'], top_n=top_n)
+        assert line['recommendations'] == single
+        if line['author'] in NAMES:
+            shown = [(rec['name'], rec['score']) for rec in single]
+            assert shown == expected_recommendations(line['author'], top_n)
+    # Разбиение на блоки (max_cells) результат не меняет
+    assert list(model.get_recommendations_batch(NAMES, top_n=top_n, max_cells=len(NAMES))) == \
+        [(name, model.get_recommendations(name, top_n=top_n)) for name in NAMES]
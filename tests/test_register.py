@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from arxiv_parser import ParsedArticleDTO
+from database import Article, Author, Session
+
+SURNAME = 'Hohlov'
+ARTICLES = [
+    ParsedArticleDTO(
+        source_name='arxiv.org', source_url='https://arxiv.org',
+        title=f'Quantum transport in disordered graphene sample {i}',
+        authors=['Hohlov A.', f'Petrov {i}'],
+        article_url=f'https://arxiv.org/abs/2401.0{i}000v1', article_direction='Physics',
+        certain_directions=['Physics'],
+    )
+    for i in range(1, 4)
+]
+
+
+class SlowParser:
+    """Парсер-заглушка: ответ приходит с задержкой, за это время подходят остальные регистрации."""
+
+    def parse(self, last_name):
+        time.sleep(0.5)
+        return list(ARTICLES)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    app_module.app.config['TESTING'] = True
+    # Только склейка, без памяти: ответ парсера получают все регистрации сразу и сохраняют одновременно
+    monkeypatch.setattr(app_module, 'arxiv_requests', app_module.SingleFlight(ttl=0, name='test'))
+    monkeypatch.setattr(app_module.recommender, 'retrain_async', lambda: None)
+    return app_module.app.test_client()
+
+
+def register(client, i, results):
+    response = client.post('/api/register', json={
+        'email': f'user{i}@example.com', 'password': 'secret', 'firstName': 'Aleksei',
+        'lastName': SURNAME, 'role': 'user', 'academicStatus': 'PhD', 'city': 'Moscow',
+    })
+    results[i] = response.status_code
+
+
+def test_concurrent_registrations_with_same_surname(client, monkeypatch):
+    threads_count = 4
+    monkeypatch.setattr(app_module, 'arxiv_parser', SlowParser())
+    results = {}
+    threads = [threading.Thread(target=register, args=(client, i, results)) for i in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: 200 for i in range(threads_count)}
+    session = Session()
+    try:
+        keys = [row[0] for row in session.query(Article.paper_key).filter(Article.paper_key.like('arxiv:2401.%'))]
+        assert sorted(keys) == ['arxiv:2401.01000', 'arxiv:2401.02000', 'arxiv:2401.03000']
+        # Авторы записаны один раз - той регистрацией, что вставила статью
+        assert session.query(Author).filter(Author.name == 'Hohlov A.').count() == 3
+    finally:
+        session.close()
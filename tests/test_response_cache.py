@@ -0,0 +1,86 @@
+import gzip
+from uuid import uuid4
+
+import pytest
+
+import app as app_module
+import response_cache
+from database import Session, User
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'RESPONSE_CACHE_ENABLED', True)
+    monkeypatch.setitem(app_module.app.config, 'RESPONSE_CACHE_TTL', 0)
+    app_module.app.config['TESTING'] = True
+    return app_module.app.test_client()
+
+
+def add_user():
+    email = f'cache-{uuid4().hex}@example.com'
+    with Session.begin() as session:
+        session.add(User(email=email, first_name='Cache', last_name='Tester'))
+    return email
+
+
+def test_committed_write_bumps_version():
+    version = app_module.response_cache.version
+    before = version.value
+    add_user()
+    assert version.value == before + 1
+
+    # Откаченная запись версию не меняет
+    with Session() as session:
+        session.add(User(email=f'cache-{uuid4().hex}@example.com', first_name='Rolled', last_name='Back'))
+        session.flush()
+        session.rollback()
+    assert version.value == before + 1
+
+
+def test_write_invalidates_cached_response(client):
+    first = client.get('/api/users')
+    cached = client.get('/api/users')
+    assert cached.get_data() == first.get_data() and cached.headers['ETag'] == first.headers['ETag']
+
+    email = add_user()
+    fresh = client.get('/api/users')
+    assert fresh.headers['ETag'] != first.headers['ETag']
+    assert email in fresh.get_data(as_text=True)
+
+
+def test_if_none_match_returns_304(client):
+    etag = client.get('/api/users').headers['ETag']
+    response = client.get('/api/users', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+
+    add_user()
+    assert client.get('/api/users', headers={'If-None-Match': etag}).status_code == 200
+
+
+@pytest.mark.parametrize('accept, brotli_installed, encoding', [
+    ('', False, None),
+    ('gzip', False, 'gzip'),
+    ('br, gzip', False, 'gzip'),
+    ('br, gzip', True, 'br'),
+])
+def test_encoding_follows_accept_encoding(client, monkeypatch, accept, brotli_installed, encoding):
+    if brotli_installed:
+        pytest.importorskip('brotli')
+    else:
+        monkeypatch.setattr(response_cache, 'brotli', None)
+    monkeypatch.setitem(app_module.app.config, 'RESPONSE_CACHE_COMPRESS', True)
+    monkeypatch.setitem(app_module.app.config, 'RESPONSE_CACHE_MIN_SIZE', 0)
+    add_user()  # Новая версия: тело собирается и сжимается заново
+    identity = client.get('/api/users').get_data()
+
+    response = client.get('/api/users', headers={'Accept-Encoding': accept})
+    assert response.headers.get('Content-Encoding') == encoding
+    assert 'Accept-Encoding' in response.headers['Vary']
+    body = response.get_data()
+    if encoding == 'gzip':
+        body = gzip.decompress(body)
+    elif encoding == 'br':
+        body = response_cache.brotli.decompress(body)
+    assert body == identity
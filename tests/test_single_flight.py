@@ -0,0 +1,107 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+class SlowCall:
+    """fn для SingleFlight: считает вызовы и держит первый, пока не подойдут остальные."""
+
+    def __init__(self, result=('page',), error=None, delay=0.3):
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return list(self.result)
+
+
+def run_concurrently(flight, key, fn, callers=8):
+    def call(_):
+        try:
+            return flight.do(key, fn)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(callers) as pool:
+        return list(pool.map(call, range(callers)))
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight(ttl=0)
+    fn = SlowCall()
+    results = run_concurrently(flight, 'oseledets', fn)
+    assert fn.calls == 1
+    assert results == [['page']] * 8
+    # ttl = 0: без памяти, следующий вызов снова идет в источник
+    flight.do('oseledets', fn)
+    assert fn.calls == 2
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight(ttl=0)
+    fn = SlowCall(delay=0)
+    flight.do('a', fn)
+    flight.do('b', fn)
+    assert fn.calls == 2
+
+
+def test_exception_reaches_all_waiters_and_is_not_memoized():
+    flight = SingleFlight(ttl=60)
+    failing = SlowCall(error=ConnectionError('arXiv down'))
+    results = run_concurrently(flight, 'viro', failing)
+    assert failing.calls == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+    working = SlowCall(delay=0)
+    assert flight.do('viro', working) == ['page']
+    assert working.calls == 1
+
+
+def test_empty_result_is_not_memoized():
+    flight = SingleFlight(ttl=60)
+    fn = SlowCall(result=(), delay=0)
+    flight.do('nobody', fn)
+    flight.do('nobody', fn)
+    assert fn.calls == 2
+
+
+def test_memo_expires_after_ttl():
+    flight = SingleFlight(ttl=0.2)
+    fn = SlowCall(delay=0)
+    flight.do('gasnikov', fn)
+    flight.do('gasnikov', fn)
+    assert fn.calls == 1
+    time.sleep(0.3)
+    flight.do('gasnikov', fn)
+    assert fn.calls == 2
+
+
+def test_memo_keeps_at_most_max_entries():
+    flight = SingleFlight(ttl=60, max_entries=2)
+    fn = SlowCall(delay=0)
+    for key in ('a', 'b', 'c'):
+        flight.do(key, fn)
+    assert list(flight._memo) == ['b', 'c']
+    flight.clear()
+    flight.do('b', fn)
+    assert fn.calls == 4
+
+
+@pytest.mark.parametrize('ttl', [0, 60])
+def test_inflight_entry_is_removed(ttl):
+    flight = SingleFlight(ttl=ttl)
+    flight.do('key', SlowCall(delay=0))
+    with pytest.raises(ValueError):
+        flight.do('other', SlowCall(error=ValueError('bad'), delay=0))
+    assert flight._inflight == {}
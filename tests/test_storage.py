@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, select
+
+from storage import _upsert_add_portable, bulk_upsert_add, create_storage_engine
+
+BATCHES = [
+    [{'a': 'x', 'b': 'y', 'n': 1}, {'a': 'x', 'b': 'z', 'n': 2}],
+    [{'a': 'x', 'b': 'y', 'n': 3}, {'a': 'y', 'b': 'z', 'n': 1}],
+]
+
+
+@pytest.fixture
+def edges(tmp_path):
+    engine = create_storage_engine(f'sqlite:///{tmp_path / "storage.db"}')
+    table = Table('edges', MetaData(), Column('a', String, primary_key=True), Column('b', String, primary_key=True),
+                  Column('n', Integer))
+    table.create(engine)
+    yield engine, table
+    engine.dispose()
+
+
+def stored(engine, table):
+    with engine.connect() as conn:
+        return sorted(conn.execute(select(table)).all())
+
+
+@pytest.mark.parametrize('upsert', [
+    bulk_upsert_add,
+    # Путь для баз без ON CONFLICT (не PostgreSQL и не SQLite)
+    _upsert_add_portable,
+])
+def test_upsert_add_sums_existing_keys(edges, upsert):
+    engine, table = edges
+    for rows in BATCHES:
+        with engine.begin() as conn:
+            upsert(conn, table, rows, ['a', 'b'], ['n'])
+    assert stored(engine, table) == [('x', 'y', 4), ('x', 'z', 2), ('y', 'z', 1)]
+
+
+def test_portable_upsert_add_single_key_column(edges):
+    engine, table = edges
+    with engine.begin() as conn:
+        conn.execute(table.insert(), [{'a': 'x', 'b': 'y', 'n': 1}])
+        _upsert_add_portable(conn, table, [{'a': 'x', 'b': 'y', 'n': 5}, {'a': 'w', 'b': 'v', 'n': 1}], ['a'], ['n'])
+    assert stored(engine, table) == [('w', 'v', 1), ('x', 'y', 6)]
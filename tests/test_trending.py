@@ -0,0 +1,91 @@
+import math
+
+import pytest
+
+import app as app_module
+from database import ArticleDTO, save_list_of_articles
+from trending import TrendingIndex
+
+HOUR = 3600.0
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def index():
+    index = TrendingIndex(half_life_hours=1.0, top_max=3)
+    index.loaded = True
+    return index
+
+
+def ids(index, k=10):
+    return [article_id for article_id, _ in index.top(k)]
+
+
+def test_recent_likes_outrank_old_ones(index):
+    index.record(1, 10, True, NOW - 5 * HOUR)
+    index.record(2, 10, True, NOW - 5 * HOUR)
+    index.record(1, 20, True, NOW)
+    assert ids(index) == [20, 10]
+    # Два лайка вдвое тяжелее одного того же времени
+    index.record(3, 30, True, NOW)
+    index.record(4, 30, True, NOW)
+    top = dict(index.top(10))
+    assert ids(index) == [30, 20, 10]
+    assert top[30] == pytest.approx(2 * top[20])
+
+
+def test_unlike_subtracts_exact_weight(index):
+    index.record(1, 10, True, NOW - HOUR)
+    index.record(2, 10, True, NOW)
+    index.record(2, 10, False)
+    index.record(2, 10, False)  # повторное снятие ничего не меняет
+    other = TrendingIndex(half_life_hours=1.0)
+    other.loaded = True
+    other.record(1, 10, True, NOW - HOUR)
+    assert dict(index.top(1))[10] == pytest.approx(dict(other.top(1))[10])
+
+
+def test_unlike_keeps_article_with_much_older_likes(index):
+    # Устаревший лайк (created_at пустой -> начало эпохи) и свежий: после снятия свежего
+    # разность в логарифмах уходит в -inf, но у статьи остался лайк
+    index.record(1, 10, True, 0.0)
+    index.record(2, 10, True, NOW)
+    index.record(3, 20, True, 0.0)
+    index.record(2, 10, False)
+    assert sorted(ids(index)) == [10, 20]
+    assert index._scores[10] == pytest.approx(index._scores[20])
+    index.record(1, 10, False)
+    assert ids(index) == [20]
+
+
+def test_top_is_refilled_when_leader_drops(index):
+    for article_id in range(1, 6):
+        index.record(article_id, article_id, True, NOW + article_id)
+    assert ids(index) == [5, 4, 3]
+    index.record(5, 5, False)
+    assert ids(index) == [4, 3, 2]
+    assert all(math.isfinite(score) for score in index._scores.values())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    app_module.app.config['TESTING'] = True
+    monkeypatch.setattr(app_module, 'trending', TrendingIndex())
+    return app_module.app.test_client()
+
+
+def test_trending_feed_is_backfilled_from_popular(client):
+    save_list_of_articles([
+        ArticleDTO('arxiv.org', 'https://arxiv.org', f'Trending backfill article number {i}', [f'Author {i}'],
+                   f'https://example.org/trending/{i}', 'IT')
+        for i in range(5)
+    ])
+    articles = client.get('/api/articles/top?k=4&mode=trending').get_json()
+    assert len(articles) == 4
+    # Сначала статьи с лайками (если они есть в базе), остаток - в порядке popular
+    scored = [article_id for article_id, _ in app_module.trending.top(4)]
+    assert [article['id'] for article in articles[:len(scored)]] == scored
+    popular = client.get(f'/api/articles/top?k={4 + len(scored)}&mode=popular').get_json()
+    backfill = [article['id'] for article in popular if article['id'] not in scored][:4 - len(scored)]
+    assert [article['id'] for article in articles[len(scored):]] == backfill
+    assert all(article['trend'] == 0.0 for article in articles[len(scored):])
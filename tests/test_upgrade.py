@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import inspect, text
+
+from conftest import DATABASE_DIR
+from database import upgrade_database
+from storage import create_storage_engine
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE articles (id INTEGER PRIMARY KEY, source_name VARCHAR, source_url VARCHAR, title VARCHAR, "
+    "article_url VARCHAR, article_direction VARCHAR)",
+    "CREATE TABLE authors (id INTEGER PRIMARY KEY, name VARCHAR, article_id INTEGER)",
+    "INSERT INTO articles VALUES (1, 'arxiv.org', 'https://arxiv.org', 'Graph neural networks for molecules', "
+    "'https://arxiv.org/abs/2401.01234v1', 'IT')",
+    "INSERT INTO articles VALUES (2, 'arxiv.org', 'https://arxiv.org', 'Graph neural networks for molecules', "
+    "'http://arxiv.org/pdf/2401.01234v2', 'IT')",
+    "INSERT INTO authors VALUES (1, 'Ivanov I.', 1), (2, 'Petrov P.', 1), (3, 'Ivanov I.', 2), (4, 'Sidorov S.', 2)",
+]
+
+
+@pytest.fixture
+def legacy_path(tmp_path):
+    path = tmp_path / 'legacy.db'
+    engine = create_storage_engine(f'sqlite:///{path}')
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+    engine.dispose()
+    return path
+
+
+def article_columns(path):
+    engine = create_storage_engine(f'sqlite:///{path}')
+    try:
+        return {column['name'] for column in inspect(engine).get_columns('articles')}
+    finally:
+        engine.dispose()
+
+
+def test_import_does_not_migrate(legacy_path):
+    env = {**os.environ, 'SCIENCE_DB_PATH': str(legacy_path)}
+    env.pop('DATABASE_URL', None)
+    result = subprocess.run([sys.executable, '-c', 'import database'], cwd=DATABASE_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    assert 'migrate.py upgrade' in result.stdout
+    assert 'paper_key' not in article_columns(legacy_path)
+
+
+def test_upgrade_merges_duplicates_and_is_idempotent(legacy_path):
+    engine = create_storage_engine(f'sqlite:///{legacy_path}')
+    try:
+        upgrade_database(engine)
+        upgrade_database(engine)
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT id, paper_key FROM articles")).all() == [(1, 'arxiv:2401.01234')]
+            authors = conn.execute(text("SELECT name FROM authors WHERE article_id = 1 ORDER BY name")).scalars()
+            assert list(authors) == ['Ivanov I.', 'Petrov P.', 'Sidorov S.']
+            edges = conn.execute(text("SELECT author_a, author_b, articles FROM coauthor_edges ORDER BY 1, 2")).all()
+            assert edges == [('Ivanov I.', 'Petrov P.', 1), ('Ivanov I.', 'Sidorov S.', 1), ('Petrov P.', 'Sidorov S.', 1)]
+            aliases = conn.execute(text("SELECT name, author_key FROM author_aliases ORDER BY name")).all()
+            assert aliases == [('Ivanov I.', 'ivanov i'), ('Petrov P.', 'petrov p'), ('Sidorov S.', 'sidorov s')]
+    finally:
+        engine.dispose()